@@ -1,22 +1,58 @@
 import logging
 from datetime import datetime
+from agents.templates import EMOJI_MAP, has_template, render_item
+
+# Static for every request, so built once
+_FOOTER = "\n".join([
+    "---\n",
+    "### 🚨 Emergency Quick Reference\n",
+    "| Service | Contact |",
+    "|---------|---------|",
+    "| **Emergency** | 911 |",
+    "| **FEMA** | 1-800-621-3362 |",
+    "| **Red Cross** | 1-800-733-2767 |",
+    "| **211 Helpline** | 211 |",
+    "| **Crisis Counseling** | 1-800-985-5990 |",
+    "",
+    "> ℹ️ All resources verified. Visit official websites for current availability.",
+    "> 🗺️ *Check the map for locations with directions*"
+])
+
+# Lite mode (slow connections): plain text, nearest resources only, Indian helplines
+LITE_TOP_N = 5
+_LITE_FOOTER = "Emergency 112 | Ambulance 108 | Fire 101 | Disaster helpline 1078"
+
+# Why a worker result came back degraded (main_agent._degraded_result)
+_DEGRADED_WORDING = {
+    "timeout": "did not respond in time",
+    "error": "failed",
+    "busy": "is overloaded",
+}
 
 class Evaluator:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         
-    def evaluate_results(self, worker_results: list, plan: dict) -> dict:
+    def evaluate_results(self, worker_results: list, plan: dict, lite: bool = False) -> dict:
         self.logger.info("Evaluator processing worker results")
         
+        degraded_results = [r for r in worker_results if r.get("degraded")]
+        degraded = [r.get("resource_type") for r in degraded_results]
         prioritized_results = self._prioritize_resources(worker_results, plan)
         validated_results = self._validate_consistency(prioritized_results)
-        final_response = self._generate_response(validated_results, plan)
+        if lite:
+            final_response = self.render_lite(validated_results, plan, degraded_results)
+        else:
+            final_response = self._generate_response(validated_results, plan)
+            if degraded:
+                final_response = self._degraded_notice(degraded_results) + final_response
         
         return {
             "session_id": plan.get("session_id"),
             "final_response": final_response,
             "resource_count": len(validated_results),
-            "evaluation_confidence": self._calculate_confidence(validated_results)
+            "evaluation_confidence": self._calculate_confidence(validated_results),
+            "degraded": degraded
         }
     
     def _prioritize_resources(self, results: list, plan: dict) -> list:
@@ -42,6 +78,19 @@ class Evaluator:
                 validated.append(result)
         return validated
     
+    def _degraded_reasons(self, degraded_results: list, upper: bool = False) -> str:
+        """'SHELTER, FOOD lookup did not respond in time; MEDICAL lookup failed', grouped by reason."""
+        by_reason = {}
+        for result in degraded_results:
+            resource_type = result.get("resource_type", "unknown")
+            by_reason.setdefault(result.get("degraded_reason", "timeout"), []).append(
+                resource_type.upper() if upper else resource_type)
+        return "; ".join(f"{', '.join(names)} lookup {_DEGRADED_WORDING.get(reason, _DEGRADED_WORDING['error'])}"
+                         for reason, names in by_reason.items())
+    
+    def _degraded_notice(self, degraded_results: list) -> str:
+        return f"> ⏳ **Partial results** - {self._degraded_reasons(degraded_results, upper=True)}. Please retry shortly.\n\n"
+    
     def _generate_map_link(self, lat: float, lon: float, name: str) -> str:
         if lat and lon:
             return f"[🗺️ Get Directions](https://www.google.com/maps/dir/?api=1&destination={lat},{lon})"
@@ -61,6 +110,16 @@ I couldn't find specific resources. Please try these emergency contacts:
 
 Visit **[DisasterAssistance.gov](https://www.disasterassistance.gov)** to apply for help."""
         
+        response_parts = [self.render_header(plan)]
+        for result in results:
+            section = self.render_section(result, plan)
+            if section:
+                response_parts.append(section)
+        response_parts.append(self._render_footer())
+        
+        return "\n".join(response_parts)
+    
+    def render_header(self, plan: dict) -> str:
         user_input = plan.get("user_input", "")
         priority = plan.get("priority", "medium")
         user_coords = plan.get("user_coordinates", {})
@@ -69,7 +128,10 @@ Visit **[DisasterAssistance.gov](https://www.disasterassistance.gov)** to apply
         response_parts = [f"## 🆘 Disaster Resource Results"]
         response_parts.append(f"*Updated: {current_time}*\n")
         
-        if user_coords.get("lat") and user_coords.get("lon"):
+        place = plan.get("location_constraints", {}).get("place")
+        if plan.get("location_constraints", {}).get("coordinates_source") == "gazetteer" and place:
+            response_parts.append(f"📍 **{place['name']}, {place['state']}** - Showing resources near this place")
+        elif user_coords.get("lat") and user_coords.get("lon"):
             response_parts.append(f"📍 **Your Location Detected** - Showing nearby resources")
         else:
             response_parts.append(f"📍 *Enable location for distance info*")
@@ -81,137 +143,56 @@ Visit **[DisasterAssistance.gov](https://www.disasterassistance.gov)** to apply
         
         response_parts.append("\n---\n")
         
-        for result in results:
-            resource_type = result.get("resource_type", "unknown")
-            resource_data = result.get("results", [])
-            
-            if resource_data:
-                emoji_map = {"shelter": "🏠", "food": "🍲", "medical": "🏥", "government": "📋"}
-                emoji = emoji_map.get(resource_type, "📌")
-                
-                response_parts.append(f"### {emoji} {resource_type.upper()} RESOURCES\n")
-                
-                for i, item in enumerate(resource_data[:5], 1):
-                    name = item.get('name', 'Unknown')
-                    verified = "✅" if item.get('verified') else ""
-                    
-                    if resource_type == "shelter":
-                        org = item.get('organization', '')
-                        phone = item.get('phone', 'Not available')
-                        website = item.get('website', '')
-                        services = item.get('services', [])
-                        services_str = ", ".join(services) if isinstance(services, list) else services
-                        pet_info = "🐾 Pet-friendly" if item.get('pet_friendly') == True else ""
-                        hours = item.get('hours', '')
-                        
-                        response_parts.append(f"**{i}. {name}** {verified}")
-                        if org:
-                            response_parts.append(f"   - 🏛️ *{org}*")
-                        response_parts.append(f"   - 📞 **{phone}**")
-                        if website:
-                            response_parts.append(f"   - 🌐 [{website}]({website if website.startswith('http') else 'https://' + website})")
-                        if services_str:
-                            response_parts.append(f"   - 🛠️ {services_str}")
-                        if hours:
-                            response_parts.append(f"   - 🕐 {hours} {pet_info}")
-                        response_parts.append("")
-                    
-                    elif resource_type == "food":
-                        org = item.get('organization', '')
-                        food_type = item.get('type', '')
-                        phone = item.get('phone', 'Not available')
-                        website = item.get('website', '')
-                        services = item.get('services', [])
-                        services_str = ", ".join(services) if isinstance(services, list) else services
-                        hours = item.get('hours', '')
-                        eligibility = item.get('eligibility', '')
-                        
-                        response_parts.append(f"**{i}. {name}** {verified}")
-                        if org:
-                            response_parts.append(f"   - 🏛️ *{org}*")
-                        if food_type:
-                            response_parts.append(f"   - 📦 Type: {food_type}")
-                        response_parts.append(f"   - 📞 **{phone}**")
-                        if website:
-                            response_parts.append(f"   - 🌐 [{website}]({website if website.startswith('http') else 'https://' + website})")
-                        if services_str:
-                            response_parts.append(f"   - 🍽️ {services_str}")
-                        if eligibility:
-                            response_parts.append(f"   - ✅ Eligibility: {eligibility}")
-                        if hours:
-                            response_parts.append(f"   - 🕐 {hours}")
-                        response_parts.append("")
-                    
-                    elif resource_type == "medical":
-                        org = item.get('organization', '')
-                        med_type = item.get('type', '')
-                        phone = item.get('phone', 'Not available')
-                        website = item.get('website', '')
-                        services = item.get('services', [])
-                        services_str = ", ".join(services) if isinstance(services, list) else services
-                        hours = item.get('hours', '')
-                        notes = item.get('notes', '')
-                        
-                        response_parts.append(f"**{i}. {name}** {verified}")
-                        if org:
-                            response_parts.append(f"   - 🏛️ *{org}*")
-                        if med_type:
-                            response_parts.append(f"   - 🏥 Type: {med_type}")
-                        response_parts.append(f"   - 📞 **{phone}**")
-                        if website:
-                            response_parts.append(f"   - 🌐 [{website}]({website if website.startswith('http') else 'https://' + website})")
-                        if services_str:
-                            response_parts.append(f"   - 🩺 {services_str}")
-                        if notes:
-                            response_parts.append(f"   - 💡 *{notes}*")
-                        if hours:
-                            response_parts.append(f"   - 🕐 {hours}")
-                        response_parts.append("")
-                    
-                    elif resource_type == "government":
-                        agency = item.get('agency', '')
-                        phone = item.get('phone', '')
-                        website = item.get('website', '')
-                        services = item.get('services', '')
-                        how_to_apply = item.get('how_to_apply', '')
-                        deadline = item.get('deadline', '')
-                        description = item.get('description', '')
-                        additional = item.get('additional_info', '')
-                        
-                        response_parts.append(f"**{i}. {name}** {verified}")
-                        if agency:
-                            response_parts.append(f"   - 🏛️ *{agency}*")
-                        if phone:
-                            response_parts.append(f"   - 📞 **{phone}**")
-                        if website:
-                            response_parts.append(f"   - 🌐 [{website}]({website if website.startswith('http') else 'https://' + website})")
-                        if services:
-                            response_parts.append(f"   - 📋 {services}")
-                        if how_to_apply:
-                            response_parts.append(f"   - ✍️ **How to Apply:** {how_to_apply}")
-                        if deadline and deadline != "Check with agency":
-                            response_parts.append(f"   - ⏰ Deadline: {deadline}")
-                        if description and not phone:  # For tips
-                            response_parts.append(f"   - {description}")
-                        if additional:
-                            response_parts.append(f"   - ℹ️ {additional}")
-                        response_parts.append("")
-        
-        response_parts.append("---\n")
-        response_parts.append("### 🚨 Emergency Quick Reference\n")
-        response_parts.append("| Service | Contact |")
-        response_parts.append("|---------|---------|")
-        response_parts.append("| **Emergency** | 911 |")
-        response_parts.append("| **FEMA** | 1-800-621-3362 |")
-        response_parts.append("| **Red Cross** | 1-800-733-2767 |")
-        response_parts.append("| **211 Helpline** | 211 |")
-        response_parts.append("| **Crisis Counseling** | 1-800-985-5990 |")
-        response_parts.append("")
-        response_parts.append("> ℹ️ All resources verified. Visit official websites for current availability.")
-        response_parts.append("> 🗺️ *Check the map for locations with directions*")
+        return "\n".join(response_parts)
+    
+    def render_section(self, result: dict, plan: dict) -> str:
+        """Render the Markdown for a single worker result ("" if there is nothing to show)."""
+        if result.get("degraded"):
+            return self._degraded_notice([result])
+        if not self._validate_consistency([result]):
+            return ""
+        
+        resource_type = result.get("resource_type", "unknown")
+        resource_data = result.get("results", [])
+        if not resource_data:
+            return ""
+        
+        response_parts = [f"### {EMOJI_MAP.get(resource_type, '📌')} {resource_type.upper()} RESOURCES\n"]
+        language = plan.get("language", "en")
+        if has_template(resource_type, language):
+            for i, item in enumerate(resource_data[:5], 1):
+                response_parts.append(f"**{i}. {render_item(item, resource_type, language)}")
         
         return "\n".join(response_parts)
     
+    def render_lite(self, results: list, plan: dict, degraded_results: list = (), top_n: int = LITE_TOP_N) -> str:
+        """Plain-text summary: the top_n nearest resources of any type with their phone numbers."""
+        ranked = []
+        for result in results:
+            for rank, item in enumerate(result.get("results", [])):
+                # Without distances, take each type's best in turn
+                ranked.append((item.get("distance_value", float("inf")), rank, result.get("resource_type", ""), item))
+        ranked.sort(key=lambda r: (r[0], r[1]))
+        
+        user_input = plan.get("user_input", "")
+        lines = [f"Help near you for: {user_input[:60]}", ""]
+        if degraded_results:
+            lines += [f"Partial results: {self._degraded_reasons(degraded_results)}, retry shortly.", ""]
+        for i, (_, _, resource_type, item) in enumerate(ranked[:top_n], 1):
+            parts = [f"{i}. {resource_type.title()}: {item.get('name', 'Unknown')}"]
+            if item.get("distance") and item["distance"] != "Unknown":
+                parts.append(item["distance"])
+            if item.get("phone"):
+                parts.append(f"tel {item['phone']}")
+            lines.append(" - ".join(parts))
+        if not ranked:
+            lines.append("No resources found nearby.")
+        lines += ["", _LITE_FOOTER]
+        return "\n".join(lines)
+    
+    def _render_footer(self) -> str:
+        return _FOOTER
+    
     def _calculate_confidence(self, results: list) -> float:
         if not results:
             return 0.0
@@ -0,0 +1,185 @@
+"""
+Compiled Markdown templates for resource listings.
+
+Each resource type has a template: an ordered list of line renderers, built
+once at import. A resource's rendered fragment depends only on the fields its
+template reads and on the language, so fragments are cached under those values.
+Catalog entries are shared by every request and come back from the cache
+already formatted. Only the per-request parts are rendered fresh: list
+numbering, header timestamp and the echoed request.
+"""
+from functools import lru_cache
+
+FRAGMENT_CACHE_SIZE = 4096
+
+EMOJI_MAP = {"shelter": "🏠", "food": "🍲", "medical": "🏥", "government": "📋"}
+
+
+def _website_link(website: str) -> str:
+    return f"   - 🌐 [{website}]({website if website.startswith('http') else 'https://' + website})"
+
+
+def _joined(services) -> str:
+    return ", ".join(services) if isinstance(services, list) else services
+
+
+def _line(field: str, fmt: str, default=None, always: bool = False):
+    """Render fmt with the field's value, skipping the line when it is empty unless always is set."""
+    def render(item):
+        value = item.get(field, default)
+        return fmt.format(value) if value or always else None
+    render.fields = (field,)
+    return render
+
+
+def _website():
+    def render(item):
+        website = item.get("website", "")
+        return _website_link(website) if website else None
+    render.fields = ("website",)
+    return render
+
+
+def _services(emoji: str, default=()):
+    def render(item):
+        services = _joined(item.get("services", list(default)))
+        return f"   - {emoji} {services}" if services else None
+    render.fields = ("services",)
+    return render
+
+
+def _shelter_hours():
+    def render(item):
+        hours = item.get("hours", "")
+        if not hours:
+            return None
+        pet_info = "🐾 Pet-friendly" if item.get("pet_friendly") == True else ""
+        return f"   - 🕐 {hours} {pet_info}"
+    render.fields = ("hours", "pet_friendly")
+    return render
+
+
+def _deadline():
+    def render(item):
+        deadline = item.get("deadline", "")
+        return f"   - ⏰ Deadline: {deadline}" if deadline and deadline != "Check with agency" else None
+    render.fields = ("deadline",)
+    return render
+
+
+def _tip_description():
+    def render(item):
+        description = item.get("description", "")
+        return f"   - {description}" if description and not item.get("phone", "") else None  # For tips
+    render.fields = ("description", "phone")
+    return render
+
+
+_PHONE = _line("phone", "   - 📞 **{}**", "Not available", always=True)
+
+TEMPLATES = {
+    "en": {
+        "shelter": [
+            _line("organization", "   - 🏛️ *{}*"),
+            _PHONE,
+            _website(),
+            _services("🛠️"),
+            _shelter_hours()
+        ],
+        "food": [
+            _line("organization", "   - 🏛️ *{}*"),
+            _line("type", "   - 📦 Type: {}"),
+            _PHONE,
+            _website(),
+            _services("🍽️"),
+            _line("eligibility", "   - ✅ Eligibility: {}"),
+            _line("hours", "   - 🕐 {}")
+        ],
+        "medical": [
+            _line("organization", "   - 🏛️ *{}*"),
+            _line("type", "   - 🏥 Type: {}"),
+            _PHONE,
+            _website(),
+            _services("🩺"),
+            _line("notes", "   - 💡 *{}*"),
+            _line("hours", "   - 🕐 {}")
+        ],
+        "government": [
+            _line("agency", "   - 🏛️ *{}*"),
+            _line("phone", "   - 📞 **{}**"),
+            _website(),
+            _line("services", "   - 📋 {}"),
+            _line("how_to_apply", "   - ✍️ **How to Apply:** {}"),
+            _deadline(),
+            _tip_description(),
+            _line("additional_info", "   - ℹ️ {}")
+        ]
+    }
+}
+
+# Fields each template reads, in a fixed order, so they can form a cache key
+_TEMPLATE_FIELDS = {
+    language: {
+        resource_type: tuple(dict.fromkeys(["name", "verified"] + [f for line in lines for f in line.fields]))
+        for resource_type, lines in templates.items()
+    }
+    for language, templates in TEMPLATES.items()
+}
+
+
+class _Missing:
+    __slots__ = ()
+
+    def __repr__(self):
+        return "<missing>"
+
+
+_MISSING = _Missing()
+
+
+def _freeze(value):
+    return tuple(value) if isinstance(value, list) else value
+
+
+def has_template(resource_type: str, language: str = "en") -> bool:
+    return resource_type in TEMPLATES.get(language, TEMPLATES["en"])
+
+
+def render_item(item: dict, resource_type: str, language: str = "en") -> str:
+    """Render one resource as "<name>** <badge>" plus its detail lines.
+
+    The caller prefixes the list number, which changes from request to request.
+    """
+    language = language if language in TEMPLATES else "en"
+    fields = _TEMPLATE_FIELDS[language][resource_type]
+    key = tuple(_freeze(item[f]) if f in item else _MISSING for f in fields)
+    try:
+        return _render_fragment(resource_type, language, key)
+    except TypeError:  # unhashable field value; render without caching
+        return _render_fragment.__wrapped__(resource_type, language, key)
+
+
+@lru_cache(maxsize=FRAGMENT_CACHE_SIZE)
+def _render_fragment(resource_type: str, language: str, key: tuple) -> str:
+    fields = _TEMPLATE_FIELDS[language][resource_type]
+    item = {f: (list(v) if isinstance(v, tuple) else v) for f, v in zip(fields, key) if v is not _MISSING}
+    name = item.get("name", "Unknown")
+    verified = "✅" if item.get("verified") else ""
+    lines = [f"{name}** {verified}"]
+    for render in TEMPLATES[language][resource_type]:
+        line = render(item)
+        if line is not None:
+            lines.append(line)
+    lines.append("")
+    return "\n".join(lines)
+
+
+def fragment_cache_stats() -> dict:
+    info = _render_fragment.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        "size": info.currsize,
+        "hits": info.hits,
+        "misses": info.misses,
+        "hit_rate": info.hits / lookups if lookups else 0.0
+    }
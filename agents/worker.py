@@ -2,13 +2,13 @@ from tools.tools import ResourceTools
 import logging
 
 class Worker:
-    def __init__(self, worker_type: str):
+    def __init__(self, worker_type: str, http_timeout: float = None):
         self.worker_type = worker_type
         self.logger = logging.getLogger(__name__)
-        self.tools = ResourceTools()
+        self.tools = ResourceTools() if http_timeout is None else ResourceTools(http_timeout)
         
     def execute_task(self, plan: dict) -> dict:
-        self.logger.info(f"{self.worker_type} worker executing task")
+        self.logger.info("%s worker executing task", self.worker_type)
         
         if self.worker_type == "shelter":
             return self._find_shelters(plan)
@@ -21,15 +21,21 @@ class Worker:
         else:
             return {"error": f"Unknown worker type: {self.worker_type}"}
     
+    def refresh_distances(self, result: dict, plan: dict) -> dict:
+        """Re-sort a (cached) result by distance from this plan's user."""
+        items = result.get("results", [])
+        if any(item.get("lat") and item.get("lon") for item in items):
+            coords = plan.get("user_coordinates", {})
+            self.tools._add_distance_info(items, coords.get("lat"), coords.get("lon"))
+        return result
+    
     def _find_shelters(self, plan: dict) -> dict:
-        location = plan.get('location_constraints', {})
-        # Add urgency to location context for filtering
+        # Copy: workers for the same plan run concurrently
+        location = dict(plan.get('location_constraints', {}))
+        # Add urgency to location context for filtering; needs_pets is
+        # already set from the planner's intent classification
         location['urgency'] = plan.get('priority', 'medium')
         
-        # Check if user mentioned pets in their input
-        user_input = plan.get('user_input', '').lower()
-        location['needs_pets'] = any(word in user_input for word in ['pet', 'dog', 'cat', 'animal'])
-        
         return {
             "resource_type": "shelter",
             "results": self.tools.find_nearby_shelters(location),
@@ -38,7 +44,7 @@ class Worker:
         }
     
     def _find_food_distribution(self, plan: dict) -> dict:
-        location = plan.get('location_constraints', {})
+        location = dict(plan.get('location_constraints', {}))
         location['urgency'] = plan.get('priority', 'medium')
         
         return {
@@ -49,7 +55,7 @@ class Worker:
         }
     
     def _find_medical_aid(self, plan: dict) -> dict:
-        location = plan.get('location_constraints', {})
+        location = dict(plan.get('location_constraints', {}))
         location['urgency'] = plan.get('priority', 'medium')
         
         return {
@@ -60,21 +66,8 @@ class Worker:
         }
     
     def _find_government_aid(self, plan: dict) -> dict:
-        # Extract disaster type from context if available
-        user_input = plan.get('user_input', '').lower()
-        disaster_type = 'general'
-        
-        disaster_keywords = {
-            "hurricane": ["hurricane", "storm", "flood"],
-            "earthquake": ["earthquake", "tremor"],
-            "wildfire": ["fire", "wildfire"],
-            "tornado": ["tornado", "twister"]
-        }
-        
-        for dtype, keywords in disaster_keywords.items():
-            if any(kw in user_input for kw in keywords):
-                disaster_type = dtype
-                break
+        # Disaster type comes from the planner's intent classification
+        disaster_type = plan.get('disaster_type', 'general')
         
         return {
             "resource_type": "government",
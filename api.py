@@ -0,0 +1,165 @@
+"""
+HTTP routes served next to the Gradio UI.
+
+app.py mounts the Gradio Blocks on a FastAPI app that includes this router, so
+the browser map and other clients can fetch plain HTTP resources from the same
+origin and port:
+
+    GET /api/geo/tiles/{z}/{x}/{y}.json   aggregated SOS/request tile (ETag, 304); operator key from MARKER_ZOOM
+    GET /api/tiles/{z}/{x}/{y}.png        base-map tile from the local tile cache
+    GET /api/assets/{name}                cached Leaflet script or stylesheet
+    GET /api/operator/changes?since=&epoch=   operator feed changes since a sequence number
+    POST /api/operator/close/{key}?operator=  resolve an SOS alert or fulfil a request
+    POST /api/batch/{sos,safe,requests}       SMS gateway batches (core/batch_ingest.py)
+    GET /api/lite?q=&lat=&lon=                plain-text lite answer (core/lite.py)
+    GET /lite?q=&lat=&lon=                    lite page for slow connections
+
+``install()`` adds both routers to the server along with gzip compression and
+the client-hint redirect from / to /lite.
+
+Geo tiles below MARKER_ZOOM only carry counts per bin and are public. From
+MARKER_ZOOM they list individual alerts and requests with exact positions, so
+they are operator routes. The operator routes need DRC_OPERATOR_KEY in X-Operator-Key, and the batch
+routes need DRC_GATEWAY_KEY in X-Gateway-Key. Without the key configured they
+answer 503, so an unconfigured deployment never exposes SOS details.
+"""
+import hmac
+import os
+from typing import Optional
+
+from fastapi import APIRouter, Body, HTTPException, Request, Response
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, RedirectResponse
+from starlette.middleware.gzip import GZipMiddleware
+
+from core.batch_ingest import BatchTooLarge, ingest
+from core import lite
+from core.geo_aggregation import MARKER_ZOOM, get_aggregator
+from core.operator_feed import OPERATOR_KEY, close_item, get_feed
+from core.tile_cache import content_type, etag, get_tile_cache
+
+router = APIRouter(prefix="/api")
+pages = APIRouter(include_in_schema=False)
+
+# Tile revisions restart with the process; the epoch keeps old ETags from matching
+_EPOCH = os.urandom(4).hex()
+GEO_TILE_MAX_AGE = 5
+BASE_TILE_MAX_AGE = 7 * 24 * 3600  # same as the OSM tile servers
+ASSET_MAX_AGE = 24 * 3600
+GATEWAY_KEY = os.environ.get("DRC_GATEWAY_KEY", "")
+
+
+@router.get("/geo/tiles/{z}/{x}/{y}.json")
+def geo_tile(z: int, x: int, y: int, request: Request):
+    detailed = z >= MARKER_ZOOM
+    if detailed:
+        _check_operator(request)
+    aggregator = get_aggregator()
+    try:
+        revision, payload = aggregator.tile(z, x, y)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    tag = f'"{_EPOCH}-{revision}"'
+    scope = "private" if detailed else "public"
+    headers = {"ETag": tag, "Cache-Control": f"{scope}, max-age={GEO_TILE_MAX_AGE}"}
+    if request.headers.get("if-none-match") == tag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=payload, media_type="application/json", headers=headers)
+
+
+def _cached_response(data: bytes, media_type: str, max_age: int, request: Request) -> Response:
+    tag = etag(data)
+    headers = {"ETag": tag, "Cache-Control": f"public, max-age={max_age}"}
+    if request.headers.get("if-none-match") == tag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=data, media_type=media_type, headers=headers)
+
+
+@router.get("/tiles/{z}/{x}/{y}.png")
+def base_tile(z: int, x: int, y: int, request: Request):
+    try:
+        data, source = get_tile_cache().tile(z, x, y)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    if data is None:
+        # Not seeded and upstream unreachable: let the browser retry later
+        return Response(status_code=404, headers={"Cache-Control": "no-store"})
+    response = _cached_response(data, content_type(data), BASE_TILE_MAX_AGE, request)
+    response.headers["X-Tile-Source"] = source
+    return response
+
+
+@router.get("/assets/{name}")
+def asset(name: str, request: Request):
+    try:
+        data = get_tile_cache().asset(name)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    if data is None:
+        raise HTTPException(status_code=503, detail="asset not cached and upstream unreachable")
+    media_type = "text/css" if name.endswith(".css") else "application/javascript"
+    return _cached_response(data, media_type, ASSET_MAX_AGE, request)
+
+
+def _check_key(request: Request, header: str, key: str):
+    if not key:
+        raise HTTPException(status_code=503, detail=f"{header} not configured on this server")
+    if not hmac.compare_digest(request.headers.get(header, ""), key):
+        raise HTTPException(status_code=403, detail=f"{header} required")
+
+
+def _check_operator(request: Request):
+    _check_key(request, "x-operator-key", OPERATOR_KEY)
+
+
+@router.get("/operator/changes")
+def operator_changes(request: Request, since: int = 0, epoch: str = ""):
+    _check_operator(request)
+    return JSONResponse(get_feed().changes(since, epoch or None), headers={"Cache-Control": "no-store"})
+
+
+@router.post("/operator/close/{key}")
+def operator_close(key: str, request: Request, operator: str = ""):
+    _check_operator(request)
+    return {"ok": close_item(key, operator)}
+
+
+@router.post("/batch/{kind}")
+def batch(kind: str, request: Request, records: list = Body(..., embed=True)):
+    _check_key(request, "x-gateway-key", GATEWAY_KEY)
+    if kind not in ("sos", "safe", "requests"):
+        raise HTTPException(status_code=404, detail="unknown batch kind")
+    try:
+        return ingest(kind, records)
+    except BatchTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+
+@router.get("/lite")
+def lite_answer(q: str, lat: Optional[str] = None, lon: Optional[str] = None):
+    lat, lon = lite.parse_coordinate(lat, 90), lite.parse_coordinate(lon, 180)
+    return PlainTextResponse(lite.answer(q, lat, lon), headers={"Cache-Control": "no-store"})
+
+
+@pages.get("/lite")
+def lite_page(q: str = "", lat: Optional[str] = None, lon: Optional[str] = None):
+    lat, lon = lite.parse_coordinate(lat, 90), lite.parse_coordinate(lon, 180)
+    text = lite.answer(q, lat, lon) if q.strip() else ""
+    return HTMLResponse(lite.render_page(q, lat, lon, text), headers={"Cache-Control": "no-store"})
+
+
+def install(server):
+    """Add the routers, gzip and the lite redirect to a FastAPI app, before anything is mounted at /."""
+    server.include_router(router)
+    server.include_router(pages)
+    server.add_middleware(GZipMiddleware, minimum_size=lite.GZIP_MIN_BYTES)
+
+    @server.middleware("http")
+    async def client_hints(request: Request, call_next):
+        front_page = request.method == "GET" and request.url.path == "/"
+        if front_page and "full" not in request.query_params and lite.prefers_lite(request.headers):
+            return RedirectResponse("/lite", status_code=307, headers={"Vary": lite.ACCEPT_CH})
+        response = await call_next(request)
+        if front_page:
+            response.headers["Accept-CH"] = lite.ACCEPT_CH
+            response.headers["Vary"] = lite.ACCEPT_CH
+        return response
@@ -1,14 +1,30 @@
 import gradio as gr
-from main_agent import run_agent_with_location
-from tools.tools import ResourceTools
 import data_store
+import functools
+import hmac
 import logging
-import folium
-from folium.plugins import MarkerCluster
+import os
 from datetime import datetime
-
-logging.basicConfig(level=logging.INFO)
-tools = ResourceTools()
+from core.lanes import in_lane
+from core.lite import prefers_lite
+from core.logging_config import configure_logging
+from core.map_view import MAP_CSS, MAP_HEAD, MAP_JS, MAP_TEMPLATE, MapView, map_patch
+from core.metrics import timed, wallboard_markdown
+from core.operator_feed import BOARD_CSS, BOARD_JS, BOARD_TEMPLATE, OPERATOR_KEY
+from core.profiling import profiled
+from core.rate_limit import rate_limited, required
+from core.startup import precomputed, serve
+from core.tracing import start_span, start_trace
+
+configure_logging()
+
+# Replies when a handler's lane is full (core/lanes.py); must match the handler's outputs
+BUSY = "⏳ The service is busy right now. Please try again in a few seconds."
+BUSY_PAIR = (BUSY, gr.update())
+BUSY_SOS = "⚠️ The system is overloaded and your report could not be saved yet. **If you are in danger, call 112 now**, then try again."
+# Replies when a phone number or client IP is over its budget (core/rate_limit.py)
+LIMITED = "⏳ Too many submissions in a short time. Please try again in {seconds} seconds."
+LIMITED_SOS = "⚠️ Too many SOS alerts in a short time. Your earlier alert is still active and visible to responders. **If you are in danger, call 112 now.** You can send another in {seconds} seconds."
 
 # Multi-language support
 LANGUAGES = {
@@ -53,53 +69,89 @@ LANGUAGES = {
 def get_text(key: str, lang: str = "en") -> str:
     return LANGUAGES.get(lang, LANGUAGES["en"]).get(key, key)
 
-def create_map(user_lat, user_lon, resources=None, zoom=12):
-    if not user_lat or not user_lon:
-        user_lat, user_lon = 20.5937, 78.9629
-        zoom = 5
-    
-    m = folium.Map(location=[user_lat, user_lon], zoom_start=zoom, tiles='OpenStreetMap')
-    
-    if zoom >= 10:
-        folium.Marker([user_lat, user_lon], popup="📍 Your Location", tooltip="You are here",
-                      icon=folium.Icon(color='red', icon='home', prefix='glyphicon')).add_to(m)
-        folium.Circle([user_lat, user_lon], radius=3000, color='red', fill=True, fill_opacity=0.1).add_to(m)
-    
-    if resources:
-        colors = {'shelter': 'blue', 'food': 'green', 'medical': 'purple', 'blood': 'darkred', 'hospital': 'purple'}
-        icons = {'shelter': 'home', 'food': 'apple', 'medical': 'plus-sign', 'blood': 'tint', 'hospital': 'plus-sign'}
-        cluster = MarkerCluster().add_to(m)
-        
-        for r in resources:
-            if r.get("lat") and r.get("lon"):
-                rtype = r.get("type", "shelter")
-                popup = f"<b>{r.get('name', 'Unknown')}</b><br>{r.get('phone', '')}<br><a href='https://www.google.com/maps/dir/?api=1&destination={r['lat']},{r['lon']}' target='_blank'>🗺️ Directions</a>"
-                folium.Marker([r["lat"], r["lon"]], popup=popup, tooltip=r.get("name", "Resource"),
-                              icon=folium.Icon(color=colors.get(rtype, 'gray'), icon=icons.get(rtype, 'info-sign'), prefix='glyphicon')).add_to(cluster)
-    
-    legend = '''<div style="position:fixed;bottom:30px;left:30px;z-index:1000;background:white;padding:10px;border-radius:8px;box-shadow:0 2px 10px rgba(0,0,0,0.2);font-size:12px;"><b>🗺️ Legend</b><br>🔴 You<br>🔵 Shelter<br>🟢 Food<br>🟣 Medical<br>🔴 Blood Bank</div>'''
-    m.get_root().html.add_child(folium.Element(legend))
-    return m._repr_html_()
-
-def process_request(message, lat, lon):
+@functools.lru_cache(maxsize=None)
+def get_tools():
+    # Imported on first use; core/startup warms the agent stack in the background
+    from tools.tools import ResourceTools
+    return ResourceTools()
+
+def create_map(user_lat, user_lon, resources=None):
+    """Patch that recenters the client map and replaces its markers."""
+    with timed("create_map"):
+        return map_patch(user_lat, user_lon, resources)
+
+def default_map():
+    return precomputed("default_map", lambda: create_map(None, None))
+
+def map_component(**kwargs):
+    # The Leaflet map is built once in the browser; handlers only send GeoJSON patches
+    return gr.HTML(html_template=MAP_TEMPLATE, css_template=MAP_CSS, js_on_load=MAP_JS, head=MAP_HEAD,
+                   apply_default_css=False, **kwargs)
+
+def _traced_map(trace, update, resources):
+    with timed("create_map"), start_span("create_map", trace, resources=len(resources or [])):
+        return update(resources)
+
+@in_lane("upstream", BUSY_PAIR)
+@profiled("process_request")
+def process_request(message, lat, lon, lite=False):
+    """Stream the response: header first, then one section per worker as it finishes.
+
+    In lite mode only the final plain-text summary is sent and the map is left alone.
+    """
+    if not message or not message.strip():
+        yield "⚠️ Please describe what you need", gr.update() if lite else create_map(lat, lon)
+        return
+    trace = start_trace("process_request", has_location=bool(lat and lon), lite=bool(lite))
     try:
-        if not message or not message.strip():
-            return "⚠️ Please describe what you need", create_map(lat, lon)
-        response, resources = run_agent_with_location(message, lat, lon)
-        return response, create_map(lat, lon, resources)
+        from main_agent import stream_agent_with_location
+        parts, view = [], MapView()
+        for event in stream_agent_with_location(message, lat, lon, trace, lite=bool(lite)):
+            if lite:
+                if event["event"] == "final":
+                    yield event["result"]["final_response"], gr.update()
+            elif event["event"] == "header":
+                # Center the map on a place named in the request if the device sent no position
+                coords = event["plan"].get("user_coordinates", {})
+                if (not lat or not lon) and coords.get("lat") and coords.get("lon"):
+                    lat, lon = coords["lat"], coords["lon"]
+                parts.append(event["markdown"])
+                yield "\n".join(parts + ["⏳ *Searching...*"]), view.reset(lat, lon)
+            elif event["event"] == "section":
+                if event["markdown"]:
+                    parts.append(event["markdown"])
+                map_update = _traced_map(trace, view.add, event["map_resources"]) if event["map_resources"] else gr.update()
+                yield "\n".join(parts + ["⏳ *Searching...*"]), map_update
+            elif event["event"] == "final":
+                result = event["result"]
+                yield result["final_response"], _traced_map(trace, view.sync, result.get("map_resources", []))
     except Exception as e:
-        return f"❌ Error: {str(e)}", create_map(lat, lon)
-
+        trace.record_error(e)
+        yield f"❌ Error: {str(e)}", gr.update() if lite else create_map(lat, lon)
+    finally:
+        trace.end()
+
+def quick_action(prompt):
+    def handler(lat, lon, lite):
+        yield from process_request(prompt, lat, lon, lite)
+    return handler
+
+def detect_lite(request: gr.Request = None):
+    """Start in lite mode when the browser's client hints report a slow link."""
+    return bool(request is not None and prefers_lite(request.headers))
+
+@in_lane("upstream", BUSY)
+@profiled("get_weather_display")
 def get_weather_display(lat, lon):
     if not lat or not lon:
         return "📍 Please detect your location first"
-    weather = tools.get_weather_alerts(lat, lon)
+    weather = get_tools().get_weather_alerts(lat, lon)
     current = weather.get("current", {})
     alerts = weather.get("alerts", [])
     forecast = weather.get("forecast", [])
     
     # Get recent verified disasters
-    recent_disasters = tools.get_recent_disasters()
+    recent_disasters = get_tools().get_recent_disasters()
     active_alerts = [d for d in recent_disasters if "ACTIVE" in d.get("status", "") or "SEVERE" in d.get("status", "")]
     
     result = f"""## 🌤️ Current Weather (Live from Open-Meteo)
@@ -137,10 +189,12 @@ def get_weather_display(lat, lon):
     
     return result
 
+@in_lane("upstream", BUSY_PAIR)
+@profiled("get_blood_banks_display")
 def get_blood_banks_display(lat, lon):
     if not lat or not lon:
         return "📍 Please detect your location first", create_map(lat, lon)
-    banks = tools.find_blood_banks(lat, lon)
+    banks = get_tools().find_blood_banks(lat, lon)
     result = "## 🩸 Blood Banks Near You\n\n"
     for i, b in enumerate(banks[:5], 1):
         result += f"""### {i}. {b['name']}
@@ -154,7 +208,10 @@ def get_blood_banks_display(lat, lon):
         b["type"] = "blood"
     return result, create_map(lat, lon, banks)
 
-def get_preparedness_display(disaster_type):
+DISASTER_TYPES = ("general", "flood", "earthquake", "cyclone")
+
+def render_preparedness(disaster_type):
+    tools = get_tools()
     checklist = tools.get_preparedness_checklist(disaster_type)
     first_aid = tools.get_first_aid_guide()
     evac = tools.get_evacuation_info(None, None)
@@ -177,9 +234,21 @@ def get_preparedness_display(disaster_type):
     
     return result
 
-def report_missing(name, age, gender, description, last_location, last_time, contact_name, contact_phone, lat, lon):
-    if not name or not contact_phone:
-        return "❌ Name and contact phone are required"
+def preparedness_guides():
+    # Static content, built into the image by `python -m core.startup precompute`
+    return precomputed("preparedness", lambda: {kind: render_preparedness(kind) for kind in DISASTER_TYPES})
+
+@in_lane("reads", BUSY)
+@profiled("get_preparedness_display")
+def get_preparedness_display(disaster_type):
+    return preparedness_guides().get(disaster_type) or render_preparedness(disaster_type)
+
+@rate_limited("report_missing", LIMITED, phone_arg="contact_phone",
+              validate=required("❌ Name and contact phone are required", "name", "contact_phone"))
+@in_lane("reads", BUSY)
+@profiled("report_missing")
+def report_missing(name, age, gender, description, last_location, last_time, contact_name, contact_phone, lat, lon,
+                   request: gr.Request = None):
     person = data_store.report_missing_person(name, age, gender, description, last_location, last_time, contact_name, contact_phone, "", lat, lon)
     return f"""✅ **Missing Person Reported Successfully**
 
@@ -190,6 +259,8 @@ def report_missing(name, age, gender, description, last_location, last_time, con
 Please share this ID with authorities and search teams. Call **100** (Police) to file an official report.
 """
 
+@in_lane("reads", BUSY)
+@profiled("search_missing")
 def search_missing(query):
     persons = data_store.search_missing_persons(query)
     if not persons:
@@ -206,6 +277,8 @@ def search_missing(query):
 """
     return result
 
+@in_lane("reads", BUSY)
+@profiled("register_vol")
 def register_vol(name, phone, email, skills, areas, availability, has_vehicle, lat, lon):
     if not name or not phone:
         return "❌ Name and phone are required"
@@ -220,9 +293,11 @@ def register_vol(name, phone, email, skills, areas, availability, has_vehicle, l
 Thank you for volunteering! You may be contacted during emergencies.
 """
 
-def create_request(name, phone, resource_type, description, urgency, quantity, location, lat, lon):
-    if not name or not phone:
-        return "❌ Name and phone are required"
+@rate_limited("create_request", LIMITED, validate=required("❌ Name and phone are required", "name", "phone"))
+@in_lane("reads", BUSY)
+@profiled("create_request")
+def create_request(name, phone, resource_type, description, urgency, quantity, location, lat, lon,
+                   request: gr.Request = None):
     req = data_store.create_resource_request(name, phone, resource_type, description, urgency, quantity, location, lat, lon)
     return f"""✅ **Resource Request Created**
 
@@ -234,6 +309,8 @@ def create_request(name, phone, resource_type, description, urgency, quantity, l
 Volunteers and relief workers will be notified.
 """
 
+@in_lane("reads", BUSY)
+@profiled("view_requests")
 def view_requests():
     requests = data_store.get_resource_requests(status="pending")
     if not requests:
@@ -249,9 +326,11 @@ def view_requests():
 """
     return result
 
-def send_sos(name, phone, emergency_type, message, lat, lon):
-    if not lat or not lon:
-        return "❌ Location required for SOS! Please detect your location first."
+@rate_limited("send_sos", LIMITED_SOS,
+              validate=required("❌ Location required for SOS! Please detect your location first.", "lat", "lon"))
+@in_lane("life_safety", BUSY_SOS)
+@profiled("send_sos")
+def send_sos(name, phone, emergency_type, message, lat, lon, request: gr.Request = None):
     alert = data_store.create_sos_alert(name, phone, emergency_type, message, lat, lon)
     return f"""# 🆘 SOS ALERT SENT!
 
@@ -270,7 +349,10 @@ Your location has been recorded. Share this with responders!
 **Google Maps:** https://www.google.com/maps?q={lat},{lon}
 """
 
-def report_safe_status(name, phone, location, message, lat, lon):
+@rate_limited("report_safe_status", LIMITED)
+@in_lane("life_safety", BUSY_SOS)
+@profiled("report_safe_status")
+def report_safe_status(name, phone, location, message, lat, lon, request: gr.Request = None):
     report = data_store.report_safe(name, phone, location, message, lat, lon)
     return f"""# ✅ SAFETY STATUS REPORTED
 
@@ -281,6 +363,8 @@ def report_safe_status(name, phone, location, message, lat, lon):
 Your family and friends can now find you in the "Search Safe Reports" section.
 """
 
+@in_lane("reads", BUSY)
+@profiled("search_safe")
 def search_safe(name, phone):
     reports = data_store.search_safe_reports(name, phone)
     if not reports:
@@ -296,9 +380,10 @@ def search_safe(name, phone):
 """
     return result
 
-def register_donation(name, phone, donation_type, items, quantity, location, lat, lon):
-    if not name or not phone:
-        return "❌ Name and phone are required"
+@rate_limited("register_donation", LIMITED, validate=required("❌ Name and phone are required", "name", "phone"))
+@in_lane("reads", BUSY)
+@profiled("register_donation")
+def register_donation(name, phone, donation_type, items, quantity, location, lat, lon, request: gr.Request = None):
     donation = data_store.register_donation(name, phone, donation_type, items, quantity, location, lat, lon)
     return f"""✅ **Donation Registered!**
 
@@ -309,6 +394,13 @@ def register_donation(name, phone, donation_type, items, quantity, location, lat
 Relief workers will contact you for pickup. Thank you for your generosity! 🙏
 """
 
+@in_lane("reads", BUSY)
+def metrics_wallboard(key):
+    """The latency wallboard, for whoever holds the operator key."""
+    if not hmac.compare_digest(key or "", OPERATOR_KEY):
+        return "🔒 Enter the operator key"
+    return wallboard_markdown()
+
 def create_app():
     with gr.Blocks(title="🆘 Disaster Resource Connector") as app:
         # Header
@@ -331,6 +423,7 @@ def create_app():
                 location_status = gr.HTML("<span style='color:#666;'>👆 Click to detect location</span>")
                 get_loc_btn = gr.Button("📍 Detect My Location", variant="secondary")
             with gr.Column(scale=1):
+                lite_toggle = gr.Checkbox(label="📶 Lite mode (2G): short text answers, no map")
                 lang_dropdown = gr.Dropdown(choices=[("English", "en"), ("हिंदी", "hi"), ("मराठी", "mr"), ("தமிழ்", "ta")], value="en", label="🌐 Language")
         
         # Main Tabs
@@ -349,7 +442,7 @@ def create_app():
                             medical_btn = gr.Button("🏥 Medical")
                             govt_btn = gr.Button("📋 Govt Aid")
                     with gr.Column(scale=2):
-                        map_output = gr.HTML(create_map(None, None))
+                        map_output = map_component(value=default_map())
                 response_output = gr.Markdown("👋 Detect your location and search for resources!")
             
             # TAB 2: SOS & Safety
@@ -388,7 +481,7 @@ def create_app():
             with gr.Tab("🩸 Blood Banks"):
                 blood_btn = gr.Button("🩸 Find Blood Banks", variant="primary")
                 blood_output = gr.Markdown()
-                blood_map = gr.HTML()
+                blood_map = map_component()
             
             # TAB 5: Missing Persons
             with gr.Tab("👤 Missing Persons"):
@@ -463,7 +556,26 @@ def create_app():
             with gr.Tab("📚 Preparedness"):
                 disaster_type = gr.Dropdown(choices=[("General Emergency", "general"), ("Flood", "flood"), ("Earthquake", "earthquake"), ("Cyclone", "cyclone")], value="general", label="Select Disaster Type")
                 prep_btn = gr.Button("📋 Get Preparedness Guide", variant="primary")
-                prep_output = gr.Markdown()
+                prep_output = gr.Markdown(preparedness_guides()["general"])
+            
+            # Responder view: open SOS alerts and critical requests, by triage priority.
+            # Only with an operator key configured; the board loads nothing until it is entered
+            if OPERATOR_KEY:
+                with gr.Tab("🚨 Operator"):
+                    with gr.Row():
+                        with gr.Column(scale=3):
+                            gr.HTML(html_template=BOARD_TEMPLATE, css_template=BOARD_CSS, js_on_load=BOARD_JS,
+                                    apply_default_css=False, feed_url="/api/operator")
+                        with gr.Column(scale=2):
+                            map_component(value=default_map(), overlay_url="/api/geo/tiles",
+                                          overlay_on=True, operator_focus=True)
+                
+                # Latency wallboard (Prometheus scrapes the same data from /metrics), behind the same key
+                with gr.Tab("📊 Metrics"):
+                    with gr.Row():
+                        metrics_key = gr.Textbox(label="Operator key", type="password", scale=3)
+                        metrics_refresh_btn = gr.Button("🔄 Refresh", variant="secondary", scale=1)
+                    metrics_output = gr.Markdown("🔒 Enter the operator key")
         
         # Footer
         gr.HTML("""<div style="text-align:center;padding:20px;margin-top:20px;color:#888;border-top:1px solid #eee;">
@@ -475,13 +587,13 @@ def create_app():
         
         # Event Handlers
         get_loc_btn.click(None, [], [latitude, longitude, location_status], js=geo_js).then(lambda lat, lon: create_map(lat, lon), [latitude, longitude], [map_output])
-        submit_btn.click(process_request, [message_input, latitude, longitude], [response_output, map_output])
-        message_input.submit(process_request, [message_input, latitude, longitude], [response_output, map_output])
+        submit_btn.click(process_request, [message_input, latitude, longitude, lite_toggle], [response_output, map_output])
+        message_input.submit(process_request, [message_input, latitude, longitude, lite_toggle], [response_output, map_output])
         
-        shelter_btn.click(lambda lat, lon: process_request("I need emergency shelter", lat, lon), [latitude, longitude], [response_output, map_output])
-        food_btn.click(lambda lat, lon: process_request("I need food and water", lat, lon), [latitude, longitude], [response_output, map_output])
-        medical_btn.click(lambda lat, lon: process_request("I need medical help and hospitals", lat, lon), [latitude, longitude], [response_output, map_output])
-        govt_btn.click(lambda lat, lon: process_request("Government disaster assistance", lat, lon), [latitude, longitude], [response_output, map_output])
+        shelter_btn.click(quick_action("I need emergency shelter"), [latitude, longitude, lite_toggle], [response_output, map_output])
+        food_btn.click(quick_action("I need food and water"), [latitude, longitude, lite_toggle], [response_output, map_output])
+        medical_btn.click(quick_action("I need medical help and hospitals"), [latitude, longitude, lite_toggle], [response_output, map_output])
+        govt_btn.click(quick_action("Government disaster assistance"), [latitude, longitude, lite_toggle], [response_output, map_output])
         
         weather_btn.click(get_weather_display, [latitude, longitude], [weather_output])
         blood_btn.click(get_blood_banks_display, [latitude, longitude], [blood_output, blood_map])
@@ -499,9 +611,16 @@ def create_app():
         
         req_submit.click(create_request, [req_name, req_phone, req_type, req_description, req_urgency, req_quantity, req_location, latitude, longitude], [req_result])
         don_submit.click(register_donation, [don_name, don_phone, don_type, don_items, don_quantity, don_location, latitude, longitude], [don_result])
+        
+        if OPERATOR_KEY:
+            metrics_refresh_btn.click(metrics_wallboard, [metrics_key], [metrics_output])
+            metrics_key.submit(metrics_wallboard, [metrics_key], [metrics_output])
+        app.load(detect_lite, None, [lite_toggle])
     
+    # Concurrency is limited per priority lane inside the handlers, not by Gradio's queue
+    app.queue(default_concurrency_limit=None)
     return app
 
 if __name__ == "__main__":
-    app = create_app()
-    app.launch(server_name="0.0.0.0", server_port=7860, share=False)
+    # Binds the port and serves api.py's routes while the UI is built (core/startup.py)
+    serve(create_app)
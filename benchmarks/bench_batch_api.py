@@ -0,0 +1,160 @@
+"""
+Throughput of the batch API against a local stand-in SMS gateway.
+
+The API (api.py's routes only, no Gradio) runs under uvicorn in its own
+process, with its registries in a temporary directory. The gateway is a set of
+sender threads. Each posts batches of synthetic records, a mix of SOS alerts,
+safe reports and resource requests, over HTTP. Some records are made
+duplicates (a retried gateway ``ref``) or invalid, so those paths are
+exercised too.
+
+    python benchmarks/bench_batch_api.py --records 20000 --batch 500 --senders 4
+    python benchmarks/bench_batch_api.py --batch 1 --records 500   # one record per call
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+KINDS = [("sos", 0.5), ("safe", 0.3), ("requests", 0.2)]
+GATEWAY_KEY = "bench-gateway"
+
+
+def _serve(port: int, data_dir: str, backend: str):
+    # Backends and paths are chosen at import time, so configure them first
+    os.environ.update(DRC_DATA_DIR=data_dir, DRC_STORAGE_BACKEND=backend, DRC_STATE_PATH=os.path.join(data_dir, "state.db"),
+                      DRC_GATEWAY_KEY=GATEWAY_KEY)
+    sys.path.insert(0, ROOT)
+    import logging
+    logging.disable(logging.CRITICAL)
+    import uvicorn
+    from fastapi import FastAPI
+    from api import router
+
+    app = FastAPI()
+    app.include_router(router)
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def make_record(kind: str, n: int, rng: random.Random) -> dict:
+    phone = f"9{n:09d}"
+    lat, lon = 18.9 + rng.random() * 0.4, 72.8 + rng.random() * 0.3
+    if kind == "sos":
+        return {"ref": f"gw-{n}", "phone": phone, "name": f"Sender {n}", "message": "trapped, water rising",
+                "emergency_type": rng.choice(["Trapped", "Medical Emergency", "Flood", "Other"]), "lat": lat, "lon": lon}
+    if kind == "safe":
+        return {"ref": f"gw-{n}", "phone": phone, "name": f"Sender {n}", "location": "Andheri", "message": "safe"}
+    return {"ref": f"gw-{n}", "phone": phone, "requester_name": f"Sender {n}", "resource_type": "Water",
+            "urgency": rng.choice(["critical", "high", "medium"]), "quantity": rng.randint(1, 20), "location": "Dharavi"}
+
+
+def gateway(base_url: str, records: int, batch: int, senders: int, duplicates: float, invalid: float) -> dict:
+    """Post records in batches from several threads; returns latencies and status counts."""
+    rng = random.Random(7)
+    batches = []
+    for start in range(0, records, batch):
+        kind = rng.choices([k for k, _ in KINDS], [w for _, w in KINDS])[0]
+        items = []
+        for n in range(start, min(start + batch, records)):
+            if items and rng.random() < duplicates:
+                items.append(dict(items[-1]))  # gateway retry: same ref
+            elif rng.random() < invalid:
+                items.append({"phone": "12"})
+            else:
+                items.append(make_record(kind, n, rng))
+        batches.append((kind, items))
+    latencies, statuses, lock = [], Counter(), threading.Lock()
+    queue = list(reversed(batches))
+
+    def sender():
+        session = requests.Session()
+        session.headers["X-Gateway-Key"] = GATEWAY_KEY
+        while True:
+            with lock:
+                if not queue:
+                    return
+                kind, items = queue.pop()
+            start = time.perf_counter()
+            response = session.post(f"{base_url}/api/batch/{kind}", json={"records": items}, timeout=60)
+            elapsed = time.perf_counter() - start
+            response.raise_for_status()
+            body = response.json()
+            with lock:
+                latencies.append(elapsed)
+                statuses.update({s: body[s] for s in ("created", "duplicate", "invalid", "rate_limited")})
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=sender) for _ in range(senders)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "records": records, "batch": batch, "senders": senders, "seconds": wall,
+        "records_per_sec": records / wall,
+        "batch_p50_ms": latencies[len(latencies) // 2] * 1000,
+        "batch_p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        "statuses": dict(statuses)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--senders", type=int, default=4)
+    parser.add_argument("--duplicates", type=float, default=0.05, help="share of records that are gateway retries")
+    parser.add_argument("--invalid", type=float, default=0.02, help="share of records that fail validation")
+    parser.add_argument("--backend", choices=["json", "sqlite"], default="json")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    port = _free_port()
+    with tempfile.TemporaryDirectory() as data_dir:
+        server = multiprocessing.get_context("spawn").Process(target=_serve, args=(port, data_dir, args.backend), daemon=True)
+        server.start()
+        base_url = f"http://127.0.0.1:{port}"
+        deadline = time.time() + 30
+        while True:
+            try:
+                requests.get(f"{base_url}/api/operator/changes", timeout=1)
+                break
+            except requests.RequestException:
+                if time.time() > deadline:
+                    raise SystemExit("API server did not start")
+                time.sleep(0.1)
+        try:
+            report = gateway(base_url, args.records, args.batch, args.senders, args.duplicates, args.invalid)
+        finally:
+            server.terminate()
+            server.join(10)
+    report["backend"] = args.backend
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{report['records']} records in batches of {report['batch']} from {report['senders']} senders ({args.backend})")
+    print(f"  {report['records_per_sec']:.0f} records/s  batch p50 {report['batch_p50_ms']:.1f} ms  "
+          f"p99 {report['batch_p99_ms']:.1f} ms")
+    print("  " + "  ".join(f"{status} {n}" for status, n in sorted(report["statuses"].items())))
+
+
+if __name__ == "__main__":
+    main()
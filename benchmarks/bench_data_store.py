@@ -0,0 +1,346 @@
+"""
+data_store at scale: insert, search, status update and stats costs, and memory.
+
+Each (backend, scale) pair runs in a fresh process with its registries in a
+temporary directory. The process seeds synthetic registries of ``scale``
+records in total, split across the six registries like a large flood response
+(SHARES). Then it measures each operation through the public data_store
+functions:
+- insert: single-record writes (report_missing_person, create_sos_alert, ...),
+  plus SOS batches through create_sos_alert_batch, in records/s
+- search: every search and list function, latency p50/p99
+- update: mark_person_found, fulfill_resource_request, resolve_sos_alert
+- stats: get_missing_stats, get_volunteer_stats, get_request_stats
+- memory: peak RSS of the process, and the heap size of each loaded registry
+
+Every write rewrites its whole registry, so an operation is repeated until it
+has ``--samples`` samples or has used ``--budget`` seconds, with at least 3.
+
+Results are written as JSON to ``--output``. With a baseline (``--baseline``,
+by default benchmarks/baselines/data_store.json), every metric that moved
+more than ``--tolerance`` in the bad direction is listed; ``--check`` then
+exits with status 1. ``--save-baseline`` stores this run as the baseline.
+
+    python benchmarks/bench_data_store.py                              # 10k and 100k, both backends
+    python benchmarks/bench_data_store.py --scales 1000000 --backends sqlite
+    python benchmarks/bench_data_store.py --check --tolerance 0.5
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from queue import Empty
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_OUTPUT = os.path.join(ROOT, "benchmarks", "results", "data_store.json")
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baselines", "data_store.json")
+
+# Share of all records per registry
+SHARES = {"sos_alerts": 0.30, "safe_reports": 0.30, "resource_requests": 0.15,
+          "missing_persons": 0.10, "volunteers": 0.10, "donations": 0.05}
+FIRST_NAMES = ["Aarav", "Priya", "Rahul", "Ananya", "Vikram", "Sneha", "Arjun", "Kavya", "Rohan", "Meera",
+               "Suresh", "Lakshmi", "Imran", "Fatima", "Joseph", "Mary", "Gurpreet", "Harpreet", "Tenzin", "Ritu"]
+LAST_NAMES = ["Sharma", "Patel", "Iyer", "Khan", "Singh", "Reddy", "Das", "Nair", "Joshi", "Fernandes"]
+PLACES = [("Andheri", 19.1136, 72.8697), ("Dharavi", 19.0380, 72.8538), ("Kurla", 19.0726, 72.8845),
+          ("Chembur", 19.0522, 72.9005), ("Thane", 19.2183, 72.9781), ("Velachery", 12.9815, 80.2180),
+          ("T Nagar", 13.0418, 80.2341), ("Patna", 25.5941, 85.1376), ("Guwahati", 26.1445, 91.7362),
+          ("Kochi", 9.9312, 76.2673)]
+EMERGENCY_TYPES = ["Medical Emergency", "Trapped", "Fire", "Flood", "Other"]
+RESOURCE_TYPES = ["Food", "Water", "Medicine", "Shelter", "Clothing", "Transport"]
+SKILLS = ["First Aid", "Medical", "Rescue", "Cooking", "Driving", "Counseling", "Construction", "Translation"]
+URGENCIES = ["critical", "high", "medium", "low"]
+
+
+# ==================== SYNTHETIC DATA ====================
+class Generator:
+    """Deterministic records with the same fields data_store writes."""
+
+    def __init__(self, seed: int = 7):
+        self.rng = random.Random(seed)
+        self.start = datetime(2026, 7, 1)
+        self.n = 0
+
+    def _common(self):
+        self.n += 1
+        place, lat, lon = self.rng.choice(PLACES)
+        when = (self.start + timedelta(seconds=self.n * 7)).isoformat()
+        name = f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}"
+        return {"id": f"{self.n:08X}", "name": name, "phone": f"9{self.rng.randrange(10**9):09d}"}, place, \
+            lat + self.rng.uniform(-0.05, 0.05), lon + self.rng.uniform(-0.05, 0.05), when
+
+    def sos_alerts(self):
+        base, _, lat, lon, when = self._common()
+        active = self.rng.random() < 0.4
+        return {**base, "emergency_type": self.rng.choice(EMERGENCY_TYPES), "message": "water rising, need rescue",
+                "lat": lat, "lon": lon, "status": "active" if active else "resolved", "created_at": when,
+                "resolved_at": None if active else when}
+
+    def safe_reports(self):
+        base, place, lat, lon, when = self._common()
+        del base["id"]
+        return {**base, "location": place, "location_geo": {"lat": lat, "lon": lon, "name": place},
+                "message": "Safe at relief camp", "lat": lat, "lon": lon, "reported_at": when}
+
+    def resource_requests(self):
+        base, place, lat, lon, when = self._common()
+        pending = self.rng.random() < 0.6
+        return {"id": base["id"], "requester_name": base["name"], "phone": base["phone"],
+                "resource_type": self.rng.choice(RESOURCE_TYPES), "description": "for a family of five",
+                "urgency": self.rng.choice(URGENCIES), "quantity": self.rng.randint(1, 50), "location": place,
+                "location_geo": {"lat": lat, "lon": lon, "name": place}, "lat": lat, "lon": lon,
+                "status": "pending" if pending else "fulfilled", "created_at": when,
+                "fulfilled_at": None if pending else when, "fulfilled_by": None if pending else "NDRF"}
+
+    def missing_persons(self):
+        base, place, lat, lon, when = self._common()
+        missing = self.rng.random() < 0.7
+        return {**base, "age": self.rng.randint(2, 90), "gender": self.rng.choice(["Male", "Female", "Other"]),
+                "description": "blue shirt, last seen near the station", "last_seen_location": place,
+                "last_seen_time": when, "last_seen_geo": {"lat": lat, "lon": lon, "name": place},
+                "contact_name": "Family", "contact_phone": base["phone"], "photo_url": "", "lat": lat, "lon": lon,
+                "status": "missing" if missing else "found", "reported_at": when, "found_at": None if missing else when}
+
+    def volunteers(self):
+        base, place, lat, lon, when = self._common()
+        return {**base, "email": f"v{self.n}@example.org", "skills": self.rng.sample(SKILLS, 2),
+                "available_areas": place, "availability": "Weekends", "has_vehicle": self.rng.random() < 0.3,
+                "lat": lat, "lon": lon, "status": "active", "registered_at": when, "tasks_completed": 0}
+
+    def donations(self):
+        base, place, lat, lon, when = self._common()
+        return {"id": base["id"], "donor_name": base["name"], "phone": base["phone"],
+                "donation_type": self.rng.choice(RESOURCE_TYPES), "items": "rice, dal, blankets", "quantity": "20 kg",
+                "pickup_location": place, "pickup_geo": {"lat": lat, "lon": lon, "name": place}, "lat": lat, "lon": lon,
+                "status": "available", "created_at": when}
+
+
+# ==================== MEASUREMENT ====================
+def _percentile(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def sample(fn, samples: int, budget: float) -> list:
+    """Seconds per call of fn(i), until samples calls or budget seconds (at least 3 calls)."""
+    times, deadline = [], time.perf_counter() + budget
+    for i in range(samples):
+        start = time.perf_counter()
+        fn(i)
+        times.append(time.perf_counter() - start)
+        if i >= 2 and time.perf_counter() > deadline:
+            break
+    return times
+
+
+def latency(times: list) -> dict:
+    return {"p50_ms": _percentile(times, 0.5) * 1000, "p99_ms": _percentile(times, 0.99) * 1000, "calls": len(times)}
+
+
+def _rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 / 1024 if sys.platform == "darwin" else rss / 1024
+
+
+def run_scale(scale: int, backend: str, samples: int, budget: float, batch: int, data_dir: str) -> dict:
+    """Seed the registries in data_dir and measure; runs in its own process (see _worker)."""
+    import data_store
+
+    files = {"sos_alerts": data_store.SOS_ALERTS_FILE, "safe_reports": data_store.SAFE_REPORTS_FILE,
+             "resource_requests": data_store.RESOURCE_REQUESTS_FILE, "missing_persons": data_store.MISSING_PERSONS_FILE,
+             "volunteers": data_store.VOLUNTEERS_FILE, "donations": data_store.DONATIONS_FILE}
+    gen = Generator()
+    report = {"seed": {}, "insert": {}, "search": {}, "update": {}, "stats": {}, "memory": {}}
+    open_ids = {}
+    for name, share in SHARES.items():
+        records = [getattr(gen, name)() for _ in range(int(scale * share))]
+        open_ids[name] = [r["id"] for r in records if r.get("status") in ("active", "pending", "missing")]
+        start = time.perf_counter()
+        data_store._save_json(files[name], records)
+        report["seed"][name] = {"records": len(records), "seconds": time.perf_counter() - start}
+        del records
+    report["memory"]["rss_after_seed_mb"] = _rss_mb()
+
+    rng = random.Random(11)
+    place = lambda: rng.choice(PLACES)  # noqa: E731
+    inserts = {
+        "sos_alerts": lambda i: data_store.create_sos_alert("Bench", f"8{i:09d}", "Trapped", "on the roof", *place()[1:]),
+        "safe_reports": lambda i: data_store.report_safe("Bench", f"8{i:09d}", place()[0], "safe"),
+        "resource_requests": lambda i: data_store.create_resource_request("Bench", f"8{i:09d}", "Water", "",
+                                                                         "high", 2, place()[0]),
+        "missing_persons": lambda i: data_store.report_missing_person("Bench", 30, "Male", "", place()[0], "today",
+                                                                      "Family", f"8{i:09d}"),
+        "volunteers": lambda i: data_store.register_volunteer("Bench", f"8{i:09d}", "", ["Rescue"], place()[0], "Anytime"),
+        "donations": lambda i: data_store.register_donation("Bench", f"8{i:09d}", "Food", "rice", "5 kg", place()[0]),
+    }
+    for name, fn in inserts.items():
+        times = sample(fn, samples, budget)
+        report["insert"][name] = {**latency(times), "records_per_sec": len(times) / sum(times)}
+
+    searches = {
+        "missing_persons": lambda i: data_store.search_missing_persons(rng.choice(FIRST_NAMES)),
+        "volunteers": lambda i: data_store.search_volunteers(rng.choice(SKILLS), rng.choice(PLACES)[0]),
+        "resource_requests": lambda i: data_store.get_resource_requests("pending", rng.choice(RESOURCE_TYPES)),
+        "sos_alerts": lambda i: data_store.get_active_sos_alerts(),
+        "safe_reports": lambda i: data_store.search_safe_reports(rng.choice(LAST_NAMES)),
+        "donations": lambda i: data_store.get_available_donations(rng.choice(RESOURCE_TYPES)),
+    }
+    for name, fn in searches.items():
+        report["search"][name] = latency(sample(fn, samples, budget))
+
+    updates = {
+        "missing_persons": lambda i: data_store.mark_person_found(open_ids["missing_persons"].pop(), "camp"),
+        "resource_requests": lambda i: data_store.fulfill_resource_request(open_ids["resource_requests"].pop(), "NGO"),
+        "sos_alerts": lambda i: data_store.resolve_sos_alert(open_ids["sos_alerts"].pop()),
+    }
+    for name, fn in updates.items():
+        report["update"][name] = latency(sample(fn, samples, budget))
+
+    stats = {"missing_persons": data_store.get_missing_stats, "volunteers": data_store.get_volunteer_stats,
+             "resource_requests": data_store.get_request_stats}
+    for name, fn in stats.items():
+        report["stats"][name] = latency(sample(lambda i: fn(), samples, budget))
+
+    for name, path in files.items():
+        tracemalloc.start()
+        loaded = data_store._load_json(path)
+        report["memory"][f"{name}_loaded_mb"] = tracemalloc.get_traced_memory()[0] / 1024 / 1024
+        tracemalloc.stop()
+        del loaded
+
+    # Last, so the records it adds do not skew the other measurements
+    def sos_batch(i):
+        alerts = [{"ref": f"bench-{i}-{j}", "phone": f"7{i:04d}{j:05d}", "name": "Bench", "emergency_type": "Flood",
+                   "message": "stranded", "lat": 19.07, "lon": 72.87} for j in range(batch)]
+        data_store.create_sos_alert_batch(alerts)
+    times = sample(sos_batch, samples, budget)
+    report["insert"]["sos_alerts_batch"] = {**latency(times), "batch": batch,
+                                            "records_per_sec": len(times) * batch / sum(times)}
+
+    report["memory"]["peak_rss_mb"] = _rss_mb()
+    return report
+
+
+def _worker(scale, backend, samples, budget, batch, queue):
+    import logging
+    logging.disable(logging.CRITICAL)
+    with tempfile.TemporaryDirectory() as data_dir:
+        # data_store and the shared store pick their paths and backend at import time
+        os.environ.update(DRC_DATA_DIR=data_dir, DRC_STORAGE_BACKEND=backend,
+                          DRC_STATE_PATH=os.path.join(data_dir, "state.db"))
+        sys.path.insert(0, ROOT)
+        queue.put(run_scale(scale, backend, samples, budget, batch, data_dir))
+
+
+def measure(scale: int, backend: str, samples: int, budget: float, batch: int) -> dict:
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=_worker, args=(scale, backend, samples, budget, batch, queue))
+    start = time.perf_counter()
+    process.start()
+    while True:
+        try:
+            report = queue.get(timeout=1)
+            break
+        except Empty:
+            if not process.is_alive():
+                # Killed, most likely for running out of memory at this scale
+                return {"error": f"benchmark process exited with code {process.exitcode}",
+                        "wall_seconds": time.perf_counter() - start}
+    process.join()
+    report["wall_seconds"] = time.perf_counter() - start
+    return report
+
+
+# ==================== BASELINE COMPARISON ====================
+def flatten(results: dict, prefix: str = "") -> dict:
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}/{key}" if prefix else str(key)
+        if isinstance(value, dict):
+            flat.update(flatten(value, path))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = value
+    return flat
+
+
+def _higher_is_better(metric: str) -> bool:
+    return metric.endswith("_per_sec")
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list:
+    """(metric, baseline, current, change) for metrics worse than baseline by more than tolerance."""
+    now, before = flatten(current["results"]), flatten(baseline["results"])
+    regressions = []
+    for metric, value in now.items():
+        if not metric.endswith(("_ms", "_mb", "_per_sec")) or not before.get(metric):
+            continue
+        change = value / before[metric] - 1
+        worse = -change if _higher_is_better(metric) else change
+        if worse > tolerance:
+            regressions.append((metric, before[metric], value, change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", default="10000,100000", help="comma-separated total record counts")
+    parser.add_argument("--backends", default="json,sqlite")
+    parser.add_argument("--samples", type=int, default=30, help="calls per operation")
+    parser.add_argument("--budget", type=float, default=5.0, help="seconds per operation before stopping early")
+    parser.add_argument("--batch", type=int, default=500, help="records per SOS batch")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before a metric is flagged")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--check", action="store_true", help="exit 1 if any metric regressed")
+    args = parser.parse_args()
+
+    results = {}
+    for backend in args.backends.split(","):
+        for scale in (int(s) for s in args.scales.split(",")):
+            report = measure(scale, backend, args.samples, args.budget, args.batch)
+            results.setdefault(backend, {})[str(scale)] = report
+            if "error" in report:
+                print(f"{backend:<6} {scale:>8} records  {report['error']}")
+                continue
+            search = report["search"]
+            print(f"{backend:<6} {scale:>8} records  seeded+measured in {report['wall_seconds']:.1f} s  "
+                  f"peak RSS {report['memory']['peak_rss_mb']:.0f} MB")
+            print("  insert/s  " + "  ".join(f"{name} {r['records_per_sec']:.3g}" for name, r in report["insert"].items()))
+            print("  search p50/p99 ms  " + "  ".join(f"{name} {r['p50_ms']:.1f}/{r['p99_ms']:.1f}"
+                                                    for name, r in search.items()))
+            print("  update p50 ms  " + "  ".join(f"{name} {r['p50_ms']:.1f}" for name, r in report["update"].items()))
+            print("  stats p50 ms  " + "  ".join(f"{name} {r['p50_ms']:.1f}" for name, r in report["stats"].items()))
+
+    run = {"created_at": datetime.now().isoformat(timespec="seconds"), "python": platform.python_version(),
+           "machine": platform.machine(), "cpus": os.cpu_count(),
+           "settings": {"samples": args.samples, "budget": args.budget, "batch": args.batch}, "results": results}
+    for path in [args.output] + ([args.baseline] if args.save_baseline else []):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(run, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.save_baseline or not os.path.exists(args.baseline):
+        return
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(run, baseline, args.tolerance)
+    print(f"Against baseline from {baseline.get('created_at', '?')}: "
+          f"{len(regressions) or 'no'} metric(s) worse by more than {args.tolerance:.0%}")
+    for metric, before, now, change in sorted(regressions, key=lambda r: -abs(r[3])):
+        print(f"  {metric:<60} {before:10.2f} -> {now:10.2f}  {change:+.0%}")
+    if regressions and args.check:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Throughput of the agent pipeline as app worker processes are added.
+
+Each process runs the request path that launcher.py workers run: a MainAgent
+request (response cache disabled so every request does the full work) followed
+by a data_store write. All processes share one SQLite state file, as they do
+behind the launcher. No network access is needed; requests carry no
+coordinates, so no Overpass lookups are made.
+
+    python benchmarks/bench_multiprocess.py --processes 1 2 4 --seconds 10
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+QUERIES = [
+    "I need shelter and food after the flood",
+    "urgent medical help, my father is injured",
+    "where can I get government relief fund",
+    "मुझे खाना और पानी चाहिए",
+    "need a place to stay with my dog",
+    "तुरंत डॉक्टर चाहिए"
+]
+
+
+def _worker(state_path: str, seconds: float, start_at: float, results):
+    # Backends are chosen at import time, so configure them before importing the app
+    os.environ["DRC_STATE_BACKEND"] = "sqlite"
+    os.environ["DRC_STORAGE_BACKEND"] = "sqlite"
+    os.environ["DRC_STATE_PATH"] = state_path
+    sys.path.insert(0, ROOT)
+    import logging
+    logging.disable(logging.CRITICAL)
+    import data_store
+    from main_agent import MainAgent
+    from memory.response_cache import ResponseCache
+
+    agent = MainAgent(response_cache=ResponseCache(max_entries=0))
+    time.sleep(max(0.0, start_at - time.time()))
+    deadline = time.time() + seconds
+    requests = writes = 0
+    while time.time() < deadline:
+        agent.handle_message(QUERIES[requests % len(QUERIES)])
+        requests += 1
+        data_store.report_safe(f"bench-{os.getpid()}", "0000000000", "bench", "ok")
+        writes += 1
+    results.put({"requests": requests, "writes": writes})
+
+
+def run(processes: int, seconds: float) -> dict:
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    with tempfile.TemporaryDirectory() as tmp:
+        state_path = os.path.join(tmp, "shared_state.db")
+        # Leave time for every process to import the app before the clock starts
+        start_at = time.time() + 5
+        procs = [ctx.Process(target=_worker, args=(state_path, seconds, start_at, results)) for _ in range(processes)]
+        for p in procs:
+            p.start()
+        counts = [results.get() for _ in procs]
+        for p in procs:
+            p.join()
+    requests = sum(c["requests"] for c in counts)
+    writes = sum(c["writes"] for c in counts)
+    return {
+        "processes": processes,
+        "seconds": seconds,
+        "requests": requests,
+        "writes": writes,
+        "requests_per_sec": requests / seconds
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    rows = [run(n, args.seconds) for n in args.processes]
+    baseline = rows[0]["requests_per_sec"] or 1.0
+    for row in rows:
+        row["speedup"] = row["requests_per_sec"] / baseline
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    print(f"{'procs':>5} {'req/s':>10} {'writes':>8} {'speedup':>8}")
+    for row in rows:
+        print(f"{row['processes']:>5} {row['requests_per_sec']:>10.1f} {row['writes']:>8} {row['speedup']:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
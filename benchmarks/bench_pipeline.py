@@ -0,0 +1,381 @@
+"""
+End-to-end benchmark of the agent pipeline against local upstream stubs.
+
+A local HTTP server stands in for Overpass and Open-Meteo. It replays the
+responses recorded in benchmarks/fixtures/upstream.json, with Overpass elements
+shifted to each query's center, and can inject:
+- latency: ``--latency-ms`` plus up to ``--jitter-ms``
+- failures: ``--fail-rate``, answered with 429 or 504 the way an overloaded
+  Overpass answers
+- slow replies: ``--slow-rate`` of ``--slow-ms``, past the medical worker's
+  deadline by default
+
+DRC_OVERPASS_URL and DRC_OPEN_METEO_URL point tools/tools.py at the stub.
+Requests then go through ``MainAgent.handle_message``, as the app does (a new
+MainAgent per request; ``--shared-agent`` reuses one), with queries drawn from
+a multilingual corpus (CORPUS) at jittered device positions. The phases are:
+- cold: every corpus query once, one at a time, caches empty
+- one run per ``--concurrency`` level: ``--requests`` requests from that many
+  threads, caches emptied first
+
+Each phase reports request latency and throughput. It also reports per-stage
+timing from core.metrics (planner, worker, overpass, evaluator, ...), the
+response and OSM cache hit rates, and the upstream calls per request. The
+Open-Meteo stub is exercised by ``--weather`` calls to get_weather_alerts, which
+the Weather tab makes; the agent pipeline itself only calls Overpass.
+
+    python benchmarks/bench_pipeline.py --requests 200 --concurrency 1,4,16
+    python benchmarks/bench_pipeline.py --latency-ms 2000 --fail-rate 0.2 --slow-rate 0.05 --json
+    python benchmarks/bench_pipeline.py --record      # refresh the fixtures from the live APIs
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(ROOT, "benchmarks", "fixtures", "upstream.json")
+
+# (language, query); place names in some of them are geocoded by the planner
+CORPUS = [
+    ("en", "I need emergency shelter for my family"),
+    ("en", "Where can I get food and drinking water?"),
+    ("en", "My father is injured, we need a hospital urgently"),
+    ("en", "How do I apply for flood relief money?"),
+    ("en", "Flooding in Velachery, need shelter and food"),
+    ("en", "Trapped on the roof, water rising, need rescue and medical help"),
+    ("en", "Cyclone warning, where is the nearest relief camp with my dog"),
+    ("hi", "मुझे खाना और पानी चाहिए"),
+    ("hi", "पास में अस्पताल कहाँ है? डॉक्टर चाहिए"),
+    ("hi", "बाढ़ में घर डूब गया, रहने की जगह चाहिए"),
+    ("hi", "सरकारी सहायता कैसे मिलेगी"),
+    ("mr", "मला जेवण आणि पाणी हवे आहे"),
+    ("mr", "जवळचे रुग्णालय कुठे आहे, जखमी आहे"),
+    ("mr", "पुरामुळे घर गेले, निवारा हवा"),
+    ("ta", "எனக்கு உணவு மற்றும் தண்ணீர் வேண்டும்"),
+    ("ta", "அருகில் மருத்துவமனை எங்கே"),
+    ("ta", "வெள்ளம், தங்குமிடம் தேவை"),
+    ("hi-latn", "mujhe khana aur pani chahiye"),
+    ("hi-latn", "hospital kahan hai, doctor chahiye jaldi"),
+    ("hi-latn", "Andheri mein baadh, shelter chahiye"),
+]
+CITIES = [("Mumbai", 19.0760, 72.8777), ("Chennai", 13.0827, 80.2707), ("Patna", 25.5941, 85.1376),
+          ("Guwahati", 26.1445, 91.7362), ("Kochi", 9.9312, 76.2673)]
+DEVICE_LOCATION_SHARE = 0.7
+JITTER_DEGREES = 0.03  # about 3 km
+
+
+# ==================== UPSTREAM STUB ====================
+class Upstream:
+    """Replayed responses plus the injected latency and failures; counts what it served."""
+
+    def __init__(self, fixtures: dict, latency_ms: float, jitter_ms: float, fail_rate: float,
+                 slow_rate: float, slow_ms: float, seed: int = 3):
+        self.fixtures = fixtures
+        self.latency_ms, self.jitter_ms = latency_ms, jitter_ms
+        self.fail_rate, self.slow_rate, self.slow_ms = fail_rate, slow_rate, slow_ms
+        self.rng = random.Random(seed)
+        self.calls = {}
+        self._lock = threading.Lock()
+
+    def _draw(self, api: str):
+        """(delay seconds, status) for the next call to api."""
+        with self._lock:
+            roll = self.rng.random()
+            if roll < self.fail_rate:
+                status, delay = self.rng.choice([429, 504]), self.latency_ms
+            elif roll < self.fail_rate + self.slow_rate:
+                status, delay = 200, self.slow_ms
+            else:
+                status, delay = 200, self.latency_ms + self.rng.random() * self.jitter_ms
+            key = f"{api}/{'slow' if delay == self.slow_ms and status == 200 else status}"
+            self.calls[key] = self.calls.get(key, 0) + 1
+        return delay / 1000, status
+
+    def overpass(self, query: str) -> tuple:
+        delay, status = self._draw("overpass")
+        time.sleep(delay)
+        if status != 200:
+            return status, {"remark": "runtime error: stub injected failure"}
+        amenity = re.search(r'"amenity"="(\w+)"', query)
+        around = re.search(r"around:\d+,([-\d.]+),([-\d.]+)", query)
+        recorded = self.fixtures["overpass"].get(amenity.group(1) if amenity else "", self.fixtures["overpass"]["hospital"])
+        response = json.loads(json.dumps(recorded["response"]))
+        if around:
+            d_lat = float(around.group(1)) - recorded["center"][0]
+            d_lon = float(around.group(2)) - recorded["center"][1]
+            for element in response["elements"]:
+                point = element.get("center", element)
+                point["lat"] += d_lat
+                point["lon"] += d_lon
+        return 200, response
+
+    def open_meteo(self, params: dict) -> tuple:
+        delay, status = self._draw("open_meteo")
+        time.sleep(delay)
+        if status != 200:
+            return status, {"error": True, "reason": "stub injected failure"}
+        response = dict(self.fixtures["open_meteo"]["response"])
+        response["latitude"] = float(params.get("latitude", [response["latitude"]])[0])
+        response["longitude"] = float(params.get("longitude", [response["longitude"]])[0])
+        return 200, response
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self.calls)
+
+
+def start_stub(upstream: Upstream) -> tuple:
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode()
+            self._reply(*upstream.overpass(parse_qs(body).get("data", [""])[0]))
+
+        def do_GET(self):
+            self._reply(*upstream.open_meteo(parse_qs(urlsplit(self.path).query)))
+
+        def _reply(self, status: int, payload: dict):
+            body = json.dumps(payload).encode()
+            try:
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # the client gave up (slow reply past its timeout)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="upstream-stub", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def record(path: str):
+    """Fetch the fixtures from the live Overpass and Open-Meteo APIs."""
+    import requests
+
+    with open(path, encoding="utf-8") as f:
+        fixtures = json.load(f)
+    lat, lon = fixtures["overpass"]["hospital"]["center"]
+    query = (f'[out:json][timeout:10];(node["amenity"="hospital"](around:5000,{lat},{lon});'
+             f'way["amenity"="hospital"](around:5000,{lat},{lon}););out center 10;')
+    overpass = requests.post("https://overpass-api.de/api/interpreter", data={"data": query},
+                             headers={"User-Agent": "DisasterApp/1.0"}, timeout=30)
+    overpass.raise_for_status()
+    meteo = requests.get("https://api.open-meteo.com/v1/forecast", timeout=30, params={
+        "latitude": lat, "longitude": lon, "timezone": "auto",
+        "current": "temperature_2m,relative_humidity_2m,wind_speed_10m,weather_code",
+        "daily": "weather_code,temperature_2m_max,temperature_2m_min,precipitation_probability_max"})
+    meteo.raise_for_status()
+    fixtures["overpass"]["hospital"]["response"] = overpass.json()
+    fixtures["open_meteo"]["response"] = meteo.json()
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(fixtures, f, indent=1, ensure_ascii=False)
+    print(f"Recorded {len(overpass.json().get('elements', []))} Overpass elements and a forecast to {path}")
+
+
+# ==================== WORKLOAD ====================
+def workload(n: int, seed: int) -> list:
+    """n (language, query, lat, lon) requests; most with a device position near a city."""
+    rng = random.Random(seed)
+    requests = []
+    for _ in range(n):
+        language, query = rng.choice(CORPUS)
+        lat = lon = None
+        if rng.random() < DEVICE_LOCATION_SHARE:
+            _, lat, lon = rng.choice(CITIES)
+            lat += rng.uniform(-JITTER_DEGREES, JITTER_DEGREES)
+            lon += rng.uniform(-JITTER_DEGREES, JITTER_DEGREES)
+        requests.append((language, query, lat, lon))
+    return requests
+
+
+def _percentile(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] if values else 0.0
+
+
+class Phase:
+    """Measures one batch of requests: latency, stage timings, cache events and upstream calls."""
+
+    def __init__(self, upstream: Upstream):
+        from core.metrics import EVENTS, STAGE_DURATION
+
+        self.upstream = upstream
+        self.stages, self.events = STAGE_DURATION, EVENTS
+        self.latencies, self.by_language, self.degraded, self.errors = [], {}, 0, 0
+        self._lock = threading.Lock()
+
+    def run(self, requests: list, concurrency: int, call) -> dict:
+        stages_before, events_before = self.stages.snapshot(), self.events.snapshot()
+        upstream_before = self.upstream.snapshot()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(lambda r: self._one(call, *r), requests))
+        wall = time.perf_counter() - start
+        return {
+            "requests": len(requests), "concurrency": concurrency, "seconds": wall,
+            "requests_per_sec": len(requests) / wall,
+            "p50_ms": _percentile(self.latencies, 0.5) * 1000, "p99_ms": _percentile(self.latencies, 0.99) * 1000,
+            "degraded": self.degraded, "errors": self.errors,
+            "p50_ms_by_language": {lang: _percentile(v, 0.5) * 1000 for lang, v in sorted(self.by_language.items())},
+            "stages": self._stage_rows(stages_before),
+            "caches": self._cache_rates(events_before),
+            "upstream_calls": {k: v - upstream_before.get(k, 0) for k, v in self.upstream.snapshot().items()
+                               if v - upstream_before.get(k, 0)},
+        }
+
+    def _one(self, call, language, query, lat, lon):
+        start = time.perf_counter()
+        try:
+            result = call(query, lat, lon)
+        except Exception:
+            logging.getLogger(__name__).exception("Request failed")
+            result = None
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.latencies.append(elapsed)
+            self.by_language.setdefault(language, []).append(elapsed)
+            if result is None:
+                self.errors += 1
+            elif result.get("degraded"):
+                self.degraded += 1
+
+    def _stage_rows(self, before: dict) -> list:
+        rows = []
+        for labels, (counts, total_sum, total) in sorted(self.stages.snapshot().items()):
+            old_counts, old_sum, old_total = before.get(labels, ([0] * len(counts), 0.0, 0))
+            n = total - old_total
+            if not n or labels[0].startswith("data_store"):
+                continue
+            delta = [c - o for c, o in zip(counts, old_counts)]
+            rows.append({"stage": labels[0], "resource": labels[1], "outcome": labels[2], "count": n,
+                         "mean_ms": (total_sum - old_sum) / n * 1000,
+                         "p50_ms": self.stages.quantile(0.5, delta, n) * 1000,
+                         "p99_ms": self.stages.quantile(0.99, delta, n) * 1000})
+        return rows
+
+    def _cache_rates(self, before: dict) -> dict:
+        now, rates = self.events.snapshot(), {}
+        for cache in ("response_cache", "osm_cache"):
+            hits = now.get((cache, "hit"), 0) - before.get((cache, "hit"), 0)
+            misses = now.get((cache, "miss"), 0) - before.get((cache, "miss"), 0)
+            rates[cache] = {"hits": hits, "misses": misses, "hit_rate": hits / (hits + misses) if hits + misses else 0.0}
+        return rates
+
+
+def print_phase(name: str, phase: dict):
+    caches = "  ".join(f"{cache} {c['hit_rate']:.0%} ({c['hits']}/{c['hits'] + c['misses']})"
+                       for cache, c in phase["caches"].items())
+    upstream = sum(phase["upstream_calls"].values())
+    print(f"{name}: {phase['requests']} requests x{phase['concurrency']}  {phase['requests_per_sec']:.1f} req/s  "
+          f"p50 {phase['p50_ms']:.0f} ms  p99 {phase['p99_ms']:.0f} ms  degraded {phase['degraded']}  "
+          f"errors {phase['errors']}")
+    print(f"  caches: {caches}  upstream calls/request {upstream / phase['requests']:.2f} "
+          f"{phase['upstream_calls']}")
+    print("  by language p50 ms: " + "  ".join(f"{lang} {ms:.0f}" for lang, ms in phase["p50_ms_by_language"].items()))
+    print("  stages (estimated from histogram buckets):")
+    for row in phase["stages"]:
+        print(f"    {row['stage']:<16} {row['resource'] or '-':<12} {row['outcome']:<9} {row['count']:>6}  "
+              f"p50 {row['p50_ms']:8.1f} ms  p99 {row['p99_ms']:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200, help="requests per concurrency level")
+    parser.add_argument("--concurrency", default="1,4,16")
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--jitter-ms", type=float, default=200)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--slow-rate", type=float, default=0.0)
+    parser.add_argument("--slow-ms", type=float, default=13000, help="past the medical worker's 12 s deadline")
+    parser.add_argument("--weather", type=int, default=20, help="get_weather_alerts calls per phase")
+    parser.add_argument("--shared-agent", action="store_true", help="reuse one MainAgent for every request")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--fixtures", default=FIXTURES)
+    parser.add_argument("--record", action="store_true", help="refresh the fixtures from the live APIs and exit")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.fixtures)
+        return
+    with open(args.fixtures, encoding="utf-8") as f:
+        upstream = Upstream(json.load(f), args.latency_ms, args.jitter_ms, args.fail_rate,
+                            args.slow_rate, args.slow_ms, args.seed)
+    server, base_url = start_stub(upstream)
+    scratch = tempfile.TemporaryDirectory()
+    # tools.tools and data_store read these at import time
+    os.environ.update(DRC_OVERPASS_URL=f"{base_url}/api/interpreter", DRC_OPEN_METEO_URL=f"{base_url}/v1/forecast",
+                      DRC_DATA_DIR=scratch.name, DRC_STATE_PATH=os.path.join(scratch.name, "state.db"),
+                      DRC_TRACE_FILE=os.path.join(scratch.name, "traces.jsonl"))
+    os.chdir(scratch.name)  # keeps the agent's log file out of the tree
+    sys.path.insert(0, ROOT)
+    logging.disable(logging.CRITICAL)
+    import main_agent
+    from tools.tools import ResourceTools
+
+    shared = main_agent.MainAgent() if args.shared_agent else None
+
+    def call(query, lat, lon):
+        agent = shared or main_agent.MainAgent(message_bus=main_agent.get_message_bus())
+        return agent.handle_message(query, lat, lon)
+
+    def weather(phase_name):
+        tools, rng = ResourceTools(), random.Random(phase_name)
+        for _ in range(args.weather):
+            _, lat, lon = rng.choice(CITIES)
+            tools.get_weather_alerts(lat, lon)
+
+    report = {"settings": {k: v for k, v in vars(args).items() if k not in ("json", "record", "fixtures")}, "phases": {}}
+    try:
+        main_agent._response_cache.invalidate()
+        # Spread over the cities, so few queries share a response cache entry
+        cold = [(language, query, CITIES[i % len(CITIES)][1], CITIES[i % len(CITIES)][2])
+                for i, (language, query) in enumerate(CORPUS)]
+        report["phases"]["cold"] = Phase(upstream).run(cold, 1, call)
+        for level in (int(c) for c in args.concurrency.split(",")):
+            main_agent._response_cache.invalidate()
+            phase = Phase(upstream)
+            name = f"concurrency_{level}"
+            report["phases"][name] = phase.run(workload(args.requests, args.seed + level), level, call)
+            if args.weather:
+                before = upstream.snapshot()
+                start = time.perf_counter()
+                weather(name)
+                report["phases"][name]["weather"] = {
+                    "calls": args.weather, "mean_ms": (time.perf_counter() - start) / args.weather * 1000,
+                    "upstream_calls": {k: v - before.get(k, 0) for k, v in upstream.snapshot().items()
+                                       if v - before.get(k, 0)}}
+    finally:
+        server.shutdown()
+        os.chdir(ROOT)
+        scratch.cleanup()
+
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+        return
+    print(f"Upstream stub: {args.latency_ms:.0f}+{args.jitter_ms:.0f} ms, fail {args.fail_rate:.0%}, "
+          f"slow {args.slow_rate:.0%} ({args.slow_ms:.0f} ms)")
+    for name, phase in report["phases"].items():
+        print_phase(name, phase)
+        if "weather" in phase:
+            w = phase["weather"]
+            print(f"  weather: {w['calls']} calls, mean {w['mean_ms']:.0f} ms {w['upstream_calls']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Micro-benchmark: render 100 resources through the Evaluator.
+
+The 100 resources are 25 per resource type. They are the static catalog
+entries each worker returns, topped up with OSM-style places. Cold runs clear
+the fragment cache before every render. Warm runs reuse it, as repeated
+requests do in the app.
+
+    python benchmarks/bench_render.py --repeat 200
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.evaluator import Evaluator
+from agents.templates import _render_fragment, fragment_cache_stats
+from agents.worker import Worker
+
+RESOURCE_TYPES = ["shelter", "food", "medical", "government"]
+PER_TYPE = 25
+
+
+def build_results(plan: dict) -> list:
+    results = []
+    for resource_type in RESOURCE_TYPES:
+        result = Worker(resource_type).execute_task(plan)
+        items = list(result.get("results", []))
+        for i in range(PER_TYPE - len(items)):
+            items.append({
+                "name": f"Nearby {resource_type.title()} {i}", "lat": 19.0 + i / 1000, "lon": 72.8,
+                "phone": "", "website": "", "address": "", "hours": "", "verified": True,
+                "source": "OpenStreetMap", "distance": f"{i / 10:.1f} km"
+            })
+        result["results"] = items[:PER_TYPE]
+        results.append(result)
+    return results
+
+
+def render_all(evaluator: Evaluator, results: list, plan: dict) -> int:
+    # render_section shows the top 5 per type, so render in windows to cover all 100
+    size = 0
+    for result in results:
+        items = result["results"]
+        for start in range(0, len(items), 5):
+            size += len(evaluator.render_section({**result, "results": items[start:start + 5]}, plan))
+    return size
+
+
+def timed(fn, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return {
+        "mean_ms": sum(samples) / len(samples) * 1000,
+        "p50_ms": samples[len(samples) // 2] * 1000,
+        "p99_ms": samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    plan = {
+        "user_input": "need shelter, food and a doctor", "priority": "medium", "disaster_type": "hurricane",
+        "user_coordinates": {"lat": None, "lon": None},
+        "location_constraints": {"user_lat": None, "user_lon": None, "needs_pets": False}
+    }
+    evaluator = Evaluator()
+    results = build_results(plan)
+
+    def cold():
+        _render_fragment.cache_clear()
+        render_all(evaluator, results, plan)
+
+    report = {
+        "resources": sum(len(r["results"]) for r in results),
+        "cold": timed(cold, args.repeat),
+        "warm": timed(lambda: render_all(evaluator, results, plan), args.repeat),
+        "fragment_cache": fragment_cache_stats()
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"Rendering {report['resources']} resources ({args.repeat} runs)")
+    for name in ("cold", "warm"):
+        r = report[name]
+        print(f"  {name:<5} mean {r['mean_ms']:.3f} ms  p50 {r['p50_ms']:.3f} ms  p99 {r['p99_ms']:.3f} ms")
+    print(f"  fragment cache hit rate {report['fragment_cache']['hit_rate']:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Startup benchmark: import-time breakdown and time to serve, cold.
+
+Every measurement runs in a fresh interpreter, like a container scaled up
+during a surge.
+- imports: ``python -X importtime -c "import app"``, summed per top-level
+  package (self time), plus the cumulative time of the app's heavy modules.
+- serve: starts ``python -m core.startup`` with DRC_FAST_START=1 and =0, and
+  polls /healthz. "port" is the time to the first answer. "ui" is the time
+  until the Gradio UI is served.
+
+    python benchmarks/bench_startup.py --runs 3
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ["gradio", "fastapi", "uvicorn", "requests", "main_agent", "tools.tools", "data_store", "api",
+         "core.map_view", "core.operator_feed"]
+TIMEOUT = 60
+
+
+def _env(**extra) -> dict:
+    env = dict(os.environ, DRC_METRICS_PORT="0", DRC_LOG_LEVEL="WARNING", **extra)
+    env["PYTHONPATH"] = ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    return env
+
+
+def import_breakdown() -> dict:
+    with tempfile.TemporaryDirectory() as scratch:
+        # Run from a scratch directory so the app's log file doesn't land in the tree
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app"], cwd=scratch,
+                              env=_env(), capture_output=True, text=True, timeout=TIMEOUT)
+    by_package, cumulative = defaultdict(float), {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        module = name.strip()
+        by_package[module.split(".")[0]] += int(self_us) / 1000
+        cumulative[module] = int(cumulative_us) / 1000
+    total = cumulative.get("app", sum(by_package.values()))
+    top = sorted(by_package.items(), key=lambda kv: kv[1], reverse=True)[:12]
+    return {
+        "total_ms": total,
+        "top_packages_ms": dict(top),
+        "modules_ms": {m: cumulative[m] for m in HEAVY if m in cumulative}
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def serve_once(fast: bool) -> dict:
+    port = _free_port()
+    env = _env(DRC_FAST_START="1" if fast else "0", GRADIO_SERVER_NAME="127.0.0.1", GRADIO_SERVER_PORT=str(port))
+    with tempfile.TemporaryDirectory() as scratch:
+        start = time.perf_counter()
+        proc = subprocess.Popen([sys.executable, "-m", "core.startup"], cwd=scratch, env=env,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        result = {"port": None, "ui": None}
+        try:
+            while time.perf_counter() - start < TIMEOUT and proc.poll() is None:
+                try:
+                    health = requests.get(f"http://127.0.0.1:{port}/healthz", timeout=1).json()
+                except requests.RequestException:
+                    time.sleep(0.02)
+                    continue
+                result["port"] = result["port"] or time.perf_counter() - start
+                if health["status"] == "ready":
+                    requests.get(f"http://127.0.0.1:{port}/", timeout=10).raise_for_status()
+                    result["ui"] = time.perf_counter() - start
+                    break
+                time.sleep(0.02)
+        finally:
+            proc.terminate()
+            proc.wait(10)
+    return result
+
+
+def median(values: list):
+    values = sorted(v for v in values if v is not None)
+    return values[len(values) // 2] if values else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    report = {"imports": import_breakdown(), "serve": {}}
+    for name, fast in (("fast", True), ("eager", False)):
+        runs = [serve_once(fast) for _ in range(args.runs)]
+        report["serve"][name] = {key: median([r[key] for r in runs]) for key in ("port", "ui")}
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    imports = report["imports"]
+    print(f"import app: {imports['total_ms']:.0f} ms")
+    print("  by package (self time):")
+    for package, ms in imports["top_packages_ms"].items():
+        print(f"    {package:<24} {ms:8.1f} ms  {ms / imports['total_ms']:6.1%}")
+    print("  heavy modules (cumulative, in import order):")
+    for module, ms in imports["modules_ms"].items():
+        print(f"    {module:<24} {ms:8.1f} ms")
+    print(f"Cold start, median of {args.runs}:")
+    for name, r in report["serve"].items():
+        port = f"{r['port']:.2f} s" if r["port"] is not None else "n/a"
+        ui = f"{r['ui']:.2f} s" if r["ui"] is not None else "n/a"
+        print(f"  {name:<5} port answering {port}  UI served {ui}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,17 @@
 from dataclasses import dataclass
 from typing import Dict, Any, Optional
+import heapq
+import itertools
+import logging
+import threading
 import uuid
 import time
 
+logger = logging.getLogger(__name__)
+
+# Lower rank is delivered first; unknown priorities are treated as "medium"
+PRIORITY_LEVELS = {"critical": 0, "high": 1, "medium": 2, "low": 3}
+
 @dataclass
 class Message:
     message_id: str
@@ -13,7 +22,9 @@ class Message:
     payload: Dict[str, Any]
     timestamp: float
     priority: str = "medium"
-    
+    # Parent span for tracing across threads and processes (see core.tracing)
+    trace_context: Optional[Dict[str, Any]] = None
+
     def __post_init__(self):
         if not self.message_id:
             self.message_id = str(uuid.uuid4())
@@ -21,32 +32,95 @@ class Message:
             self.timestamp = time.time()
 
 class A2AProtocol:
+    """Agent-to-agent message queues.
+
+    Each recipient has its own heap of (priority rank, sequence, message), so
+    sending and receiving are O(log n) and messages of equal priority come out
+    in the order they were sent.
+    """
+
     def __init__(self):
-        self.message_queue = []
+        self.queues = {}
         self.handlers = {}
-    
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self.sent = 0
+        self.delivered = 0
+        self.failed = 0
+        self.max_depth = {}
+
+    @property
+    def message_queue(self) -> list:
+        """Snapshot of every pending message in delivery order."""
+        with self._lock:
+            entries = [entry for queue in self.queues.values() for entry in queue]
+        return [message for _, _, message in sorted(entries, key=lambda e: e[:2])]
+
     def send_message(self, message: Message):
-        self.message_queue.append(message)
-        self.message_queue.sort(key=lambda x: (x.priority != "high", x.timestamp))
-    
+        rank = PRIORITY_LEVELS.get(message.priority, PRIORITY_LEVELS["medium"])
+        with self._lock:
+            queue = self.queues.setdefault(message.to_agent, [])
+            heapq.heappush(queue, (rank, next(self._sequence), message))
+            self.sent += 1
+            if len(queue) > self.max_depth.get(message.to_agent, 0):
+                self.max_depth[message.to_agent] = len(queue)
+
     def receive_message(self, agent_name: str) -> Optional[Message]:
-        for i, message in enumerate(self.message_queue):
-            if message.to_agent == agent_name:
-                return self.message_queue.pop(i)
-        return None
-    
+        with self._lock:
+            queue = self.queues.get(agent_name)
+            if not queue:
+                return None
+            self.delivered += 1
+            return heapq.heappop(queue)[2]
+
+    def pending(self, agent_name: str) -> int:
+        with self._lock:
+            return len(self.queues.get(agent_name, ()))
+
     def register_handler(self, agent_name: str, handler_function):
         self.handlers[agent_name] = handler_function
-    
+
     def process_messages(self):
-        processed_messages = []
-        for message in self.message_queue[:]:
-            if message.to_agent in self.handlers:
-                handler = self.handlers[message.to_agent]
+        for agent_name, handler in list(self.handlers.items()):
+            # Only messages already queued are handled in this pass; failures stay
+            # queued, in their original order
+            failed = []
+            for _ in range(self.pending(agent_name)):
+                with self._lock:
+                    queue = self.queues.get(agent_name)
+                    if not queue:
+                        break
+                    entry = heapq.heappop(queue)
+                message = entry[2]
                 try:
-                    result = handler(message)
-                    processed_messages.append(message.message_id)
+                    handler(message)
+                    with self._lock:
+                        self.delivered += 1
                 except Exception as e:
-                    print(f"Error processing message {message.message_id}: {e}")
-        
-        self.message_queue = [msg for msg in self.message_queue if msg.message_id not in processed_messages]
+                    logger.error("Error processing message %s: %s", message.message_id, e)
+                    failed.append(entry)
+            if failed:
+                with self._lock:
+                    self.failed += len(failed)
+                    queue = self.queues.setdefault(agent_name, [])
+                    for entry in failed:
+                        heapq.heappush(queue, entry)
+
+    def stats(self) -> dict:
+        """Queue depths per recipient and priority, plus delivery counters."""
+        with self._lock:
+            depths = {agent: len(queue) for agent, queue in self.queues.items()}
+            by_priority = {name: 0 for name in PRIORITY_LEVELS}
+            names = {rank: name for name, rank in PRIORITY_LEVELS.items()}
+            for queue in self.queues.values():
+                for rank, _, _ in queue:
+                    by_priority[names[rank]] += 1
+            return {
+                "depth": sum(depths.values()),
+                "depth_by_agent": depths,
+                "depth_by_priority": by_priority,
+                "max_depth_by_agent": dict(self.max_depth),
+                "sent": self.sent,
+                "delivered": self.delivered,
+                "failed": self.failed
+            }
@@ -0,0 +1,124 @@
+"""
+Batch ingestion of SOS alerts, safe reports and resource requests.
+
+The SMS gateway posts hundreds of records per call to api.py
+(/api/batch/sos, /api/batch/safe, /api/batch/requests):
+
+    {"records": [{"ref": "gw-81723", "phone": "+919876543210", "message": "trapped on roof", ...}, ...]}
+
+Each record is handled on its own:
+- validated (RECORD_MODELS)
+- deduplicated by the gateway's ``ref``, or else by its content (see
+  data_store.dedupe_key)
+- checked against the sender's phone budget (core/rate_limit.py); only new
+  records are charged, so a gateway retry comes back as ``duplicate``
+
+The records that pass are committed with one write per call. The response
+lists a result per record, in request order:
+
+    {"created": 2, "duplicate": 1, "invalid": 1, "rate_limited": 0,
+     "results": [{"index": 0, "status": "created", "id": "3F2A9C10"},
+                 {"index": 1, "status": "invalid", "error": "phone: at least 6 digits"}, ...]}
+"""
+import re
+from typing import Literal, Optional
+
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, field_validator
+
+import data_store
+from core.metrics import count, timed
+from core.rate_limit import ENABLED as RATE_LIMIT_ENABLED
+from core.rate_limit import get_limiter, normalize_phone
+
+MAX_BATCH = 1000
+STATUSES = ("created", "duplicate", "invalid", "rate_limited")
+
+
+class BatchTooLarge(ValueError):
+    pass
+
+
+class _Record(BaseModel):
+    model_config = ConfigDict(extra="ignore", str_strip_whitespace=True)
+
+    ref: Optional[str] = Field(None, max_length=100)
+    phone: str = Field(max_length=32)
+    lat: Optional[float] = Field(None, ge=-90, le=90)
+    lon: Optional[float] = Field(None, ge=-180, le=180)
+
+    @field_validator("phone")
+    @classmethod
+    def _phone(cls, value: str) -> str:
+        if len(re.sub(r"\D", "", value)) < 6:
+            raise ValueError("at least 6 digits")
+        return value
+
+
+class SOSRecord(_Record):
+    name: str = Field("", max_length=200)
+    emergency_type: Literal["Medical Emergency", "Trapped", "Fire", "Flood", "Other"] = "Other"
+    message: str = Field("", max_length=1000)
+    location: str = Field("", max_length=200)
+
+
+class SafeRecord(_Record):
+    name: str = Field(min_length=1, max_length=200)
+    location: str = Field("", max_length=200)
+    message: str = Field("", max_length=1000)
+
+
+class RequestRecord(_Record):
+    requester_name: str = Field(min_length=1, max_length=200)
+    resource_type: str = Field(min_length=1, max_length=50)
+    description: str = Field("", max_length=1000)
+    urgency: Literal["critical", "high", "medium", "low"] = "medium"
+    quantity: int = Field(1, ge=1, le=100000)
+    location: str = Field("", max_length=200)
+
+
+# kind -> (record model, batch writer, rate limit endpoint)
+RECORD_MODELS = {
+    "sos": (SOSRecord, data_store.create_sos_alert_batch, "send_sos"),
+    "safe": (SafeRecord, data_store.report_safe_batch, "report_safe_status"),
+    "requests": (RequestRecord, data_store.create_resource_request_batch, "create_request"),
+}
+
+
+def _error(e: ValidationError) -> str:
+    first = e.errors()[0]
+    field = ".".join(str(p) for p in first["loc"]) or "record"
+    return f"{field}: {first['msg'].removeprefix('Value error, ')}"
+
+
+def ingest(kind: str, records: list) -> dict:
+    """Validate, deduplicate, rate-limit and store a batch; returns the per-record results."""
+    model, writer, endpoint = RECORD_MODELS[kind]
+    if len(records) > MAX_BATCH:
+        raise BatchTooLarge(f"at most {MAX_BATCH} records per call")
+    results = [None] * len(records)
+    valid, positions = [], []
+    admit = None
+    if RATE_LIMIT_ENABLED:
+        limiter = get_limiter()
+        admit = lambda record: not limiter.check(endpoint, normalize_phone(record["phone"]))
+    with timed("batch_ingest", kind):
+        for i, raw in enumerate(records):
+            try:
+                record = model.model_validate(raw)
+            except ValidationError as e:
+                results[i] = {"index": i, "status": "invalid", "error": _error(e)}
+                continue
+            valid.append(record.model_dump())
+            positions.append(i)
+        if valid:
+            for i, (status, stored) in zip(positions, writer(valid, admit)):
+                results[i] = {"index": i, "status": status}
+                if status != "rate_limited":
+                    results[i]["id"] = stored.get("id")
+    summary = {status: 0 for status in STATUSES}
+    for result in results:
+        summary[result["status"]] += 1
+    for status, n in summary.items():
+        if n:
+            count("batch_ingest", f"{kind}/{status}", n)
+    return {**summary, "results": results}
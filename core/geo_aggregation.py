@@ -0,0 +1,225 @@
+"""
+Server-side aggregation of active SOS alerts and pending resource requests.
+
+The responder map is served tile by tile (Web Mercator z/x/y, as Leaflet uses).
+- below MARKER_ZOOM: each tile is split into a BIN_SPLIT x BIN_SPLIT grid. The
+  tile payload lists the non-empty bins with their counts per kind and the
+  centroid of their points, enough for the client to draw count bubbles or a
+  heatmap.
+- from MARKER_ZOOM: the payload lists individual points.
+
+Bins for every zoom level are updated incrementally as records change, at
+O(levels) per record. data_store.subscribe delivers this process's writes
+immediately. Writes made by other processes are picked up by a diff against
+the registries. That diff runs at most every RECONCILE_SECONDS, and only when
+the store version (or, for JSON files, their mtime) moved. Each tile carries a revision that changes only
+when a point inside it changes, so clients can revalidate cheaply with ETags.
+"""
+import json
+import math
+import os
+import threading
+import time
+
+import data_store
+from core.metrics import count, timed
+
+MARKER_ZOOM = 14
+MAX_ZOOM = 19
+BIN_SPLIT = 8  # bins per tile side; a bin at zoom z is a tile at zoom z + 3
+BIN_SHIFT = 3
+RECONCILE_SECONDS = 2.0
+KINDS = ("sos", "request")
+TILE_CACHE_SIZE = 4096
+
+
+def tile_xy(lat: float, lon: float, zoom: int) -> tuple:
+    """Web Mercator tile containing a point at a zoom level."""
+    lat = max(min(lat, 85.05112878), -85.05112878)
+    n = 1 << zoom
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def source_version():
+    if data_store.STORAGE_BACKEND == "sqlite":
+        return data_store.get_store_version()
+    # The in-process counter misses other processes writing the JSON files
+    versions = []
+    for filepath in (data_store.SOS_ALERTS_FILE, data_store.RESOURCE_REQUESTS_FILE):
+        try:
+            versions.append(os.stat(filepath).st_mtime_ns)
+        except OSError:
+            versions.append(0)
+    return tuple(versions)
+
+
+def _point(collection: str, record: dict):
+    """(kind, lat, lon) for a record the map should show, else None."""
+    if not record.get("lat") or not record.get("lon"):
+        return None
+    if collection == "sos_alerts" and record.get("status") == "active":
+        return "sos", float(record["lat"]), float(record["lon"])
+    if collection == "resource_requests" and record.get("status") == "pending":
+        return "request", float(record["lat"]), float(record["lon"])
+    return None
+
+
+class GeoAggregator:
+    def __init__(self):
+        self._points = {}     # record id -> (kind, lat, lon, pixel x, pixel y at the deepest zoom)
+        self._bins = [dict() for _ in range(MARKER_ZOOM)]   # zoom -> {(bin x, bin y): [sos, request, sum lat, sum lon]}
+        self._markers = {}    # MARKER_ZOOM tile -> {record id: (kind, lat, lon)}
+        self._revisions = {}  # (z, x, y) -> revision
+        self._payloads = {}   # (z, x, y) -> (revision, payload)
+        self._lock = threading.Lock()
+        self._version = None
+        self._reconciled_at = 0.0
+
+    # ==================== UPDATES ====================
+    def on_record(self, collection: str, record: dict):
+        if collection not in ("sos_alerts", "resource_requests"):
+            return
+        key = f"{collection}:{record.get('id')}"
+        with self._lock:
+            self._apply(key, _point(collection, record))
+
+    def _apply(self, key: str, point):
+        old = self._points.get(key)
+        if old is not None and point is not None and old[:3] == point:
+            return
+        if old is not None:
+            self._update(key, old, -1)
+            del self._points[key]
+        if point is not None:
+            kind, lat, lon = point
+            px, py = tile_xy(lat, lon, MAX_ZOOM)
+            entry = (kind, lat, lon, px, py)
+            self._points[key] = entry
+            self._update(key, entry, 1)
+
+    def _update(self, key: str, entry: tuple, sign: int):
+        kind, lat, lon, px, py = entry
+        kind_index = KINDS.index(kind)
+        for z in range(MARKER_ZOOM):
+            shift = MAX_ZOOM - z - BIN_SHIFT
+            cell = (px >> shift, py >> shift)
+            bins = self._bins[z]
+            b = bins.get(cell)
+            if b is None:
+                b = bins[cell] = [0, 0, 0.0, 0.0]
+            b[kind_index] += sign
+            b[2] += sign * lat
+            b[3] += sign * lon
+            if b[0] <= 0 and b[1] <= 0:
+                del bins[cell]
+            self._touch(z, cell[0] >> BIN_SHIFT, cell[1] >> BIN_SHIFT)
+        shift = MAX_ZOOM - MARKER_ZOOM
+        tile = (px >> shift, py >> shift)
+        markers = self._markers.setdefault(tile, {})
+        if sign > 0:
+            markers[key] = (kind, lat, lon)
+        else:
+            markers.pop(key, None)
+            if not markers:
+                del self._markers[tile]
+        # Deeper marker tiles are filtered from this one, so their revision follows it
+        self._touch(MARKER_ZOOM, *tile)
+
+    def _touch(self, z: int, x: int, y: int):
+        self._revisions[(z, x, y)] = self._revisions.get((z, x, y), 0) + 1
+
+    def reconcile(self, force: bool = False):
+        """Catch up with writes made by other processes (diff against the registries)."""
+        now = time.monotonic()
+        if not force and now - self._reconciled_at < RECONCILE_SECONDS:
+            return
+        self._reconciled_at = now
+        version = source_version()
+        if not force and version == self._version:
+            return
+        with timed("geo_reconcile"):
+            seen = {}
+            for collection, filepath in (("sos_alerts", data_store.SOS_ALERTS_FILE),
+                                         ("resource_requests", data_store.RESOURCE_REQUESTS_FILE)):
+                for record in data_store._load_json(filepath):
+                    point = _point(collection, record)
+                    if point is not None:
+                        seen[f"{collection}:{record.get('id')}"] = point
+            with self._lock:
+                for key in [k for k in self._points if k not in seen]:
+                    self._apply(key, None)
+                for key, point in seen.items():
+                    self._apply(key, point)
+                self._version = version
+
+    # ==================== TILES ====================
+    def revision(self, z: int, x: int, y: int) -> int:
+        if z > MARKER_ZOOM:
+            shift = z - MARKER_ZOOM
+            z, x, y = MARKER_ZOOM, x >> shift, y >> shift
+        return self._revisions.get((z, x, y), 0)
+
+    def tile(self, z: int, x: int, y: int) -> tuple:
+        """(revision, compact JSON payload) for one tile."""
+        if not 0 <= z <= MAX_ZOOM or not (0 <= x < 1 << z and 0 <= y < 1 << z):
+            raise ValueError("tile out of range")
+        self.reconcile()
+        with self._lock:
+            revision = self.revision(z, x, y)
+            cached = self._payloads.get((z, x, y))
+            if cached is not None and cached[0] == revision:
+                count("geo_tile", "cache_hit")
+                return cached
+            payload = json.dumps(self._build(z, x, y), separators=(",", ":"))
+            if len(self._payloads) >= TILE_CACHE_SIZE:
+                self._payloads.clear()
+            self._payloads[(z, x, y)] = (revision, payload)
+        count("geo_tile", "built")
+        return revision, payload
+
+    def _build(self, z: int, x: int, y: int) -> dict:
+        if z < MARKER_ZOOM:
+            bins = self._bins[z]
+            rows = []
+            for bx in range(x << BIN_SHIFT, (x + 1) << BIN_SHIFT):
+                for by in range(y << BIN_SHIFT, (y + 1) << BIN_SHIFT):
+                    b = bins.get((bx, by))
+                    if b is not None:
+                        total = b[0] + b[1]
+                        rows.append([round(b[2] / total, 5), round(b[3] / total, 5), b[0], b[1]])
+            return {"z": z, "x": x, "y": y, "bins": rows}
+        shift = z - MARKER_ZOOM
+        markers = self._markers.get((x >> shift, y >> shift), {})
+        points = []
+        for key, (kind, lat, lon) in markers.items():
+            if shift == 0 or tile_xy(lat, lon, z) == (x, y):
+                points.append([key.split(":", 1)[1], kind, round(lat, 5), round(lon, 5)])
+        return {"z": z, "x": x, "y": y, "points": points}
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "points": len(self._points),
+                "bins": sum(len(b) for b in self._bins),
+                "marker_tiles": len(self._markers),
+                "cached_tiles": len(self._payloads)
+            }
+
+
+_aggregator = None
+_aggregator_lock = threading.Lock()
+
+
+def get_aggregator() -> GeoAggregator:
+    """Process-wide aggregator, loaded from the registries and then kept up to date."""
+    global _aggregator
+    if _aggregator is None:
+        with _aggregator_lock:
+            if _aggregator is None:
+                aggregator = GeoAggregator()
+                data_store.subscribe(aggregator.on_record)
+                aggregator.reconcile(force=True)
+                _aggregator = aggregator
+    return _aggregator
@@ -0,0 +1,208 @@
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+# Every keyword set used to understand a request lives here so the Planner,
+# ContextEngine and Worker agree with each other. English keywords match whole
+# words (with an optional plural "s"/"es"). Hindi, Marathi and Tamil keywords
+# must start a word but may carry suffixes; vowel signs break regex \b, so the
+# boundary is spelled out with the script ranges instead.
+
+RESOURCE_KEYWORDS = {
+    # Bare "home" is not a shelter need ("I'm home safe", "home address"); losing one is
+    "shelter": ["shelter", "place to stay", "housing", "homeless", "no home", "lost home", "lost my home",
+                "lost our home", "evacuation center", "relief camp",
+                "आश्रय", "शरण", "रहने की जगह", "निवारा", "छावणी", "தங்குமிடம்", "முகாம்",
+                "ashray", "aashray"],
+    "food": ["food", "water", "hungry", "thirsty", "eat", "meal", "ration",
+             "भोजन", "खाना", "पानी", "राशन", "अन्न", "जेवण", "पाणी", "உணவு", "தண்ணீர்", "சாப்பாடு",
+             "khana", "pani", "paani"],
+    "medical": ["medical", "doctor", "hospital", "medicine", "ambulance", "hurt", "injured", "injury",
+                "चिकित्सा", "डॉक्टर", "अस्पताल", "दवा", "दवाई", "घायल", "वैद्यकीय", "रुग्णालय", "दवाखाना", "जखमी",
+                "மருத்துவம்", "மருத்துவர்", "மருத்துவமனை", "மருந்து", "காயம்",
+                "dawai", "aspatal"],
+    "government": ["fema", "aid", "assistance", "government", "relief fund", "compensation", "ex-gratia",
+                   "सरकार", "सरकारी", "सहायता", "मुआवजा", "शासन", "सरकारी मदत", "நிவாரணம்", "அரசு"]
+}
+
+# Generic cries for help count as an "assistance" need without naming a resource
+HELP_KEYWORDS = ["help", "मदद", "मदत", "बचाओ", "वाचवा", "உதவி", "காப்பாற்று", "madad", "bachao"]
+
+# Whole words only, so "now" does not fire on "know" or "snow"
+URGENCY_KEYWORDS = ["emergency", "urgent", "urgently", "immediately", "now", "right now", "critical", "asap",
+                    "आपातकाल", "तुरंत", "जल्दी", "आणीबाणी", "ताबडतोब", "लगेच", "அவசரம்", "உடனடியாக",
+                    "turant", "jaldi"]
+
+# Checked in this order; the first disaster type with a match wins
+DISASTER_KEYWORDS = {
+    "hurricane": ["hurricane", "storm", "flood", "cyclone",
+                  "बाढ़", "तूफान", "चक्रवात", "पूर", "वादळ", "வெள்ளம்", "புயல்", "baadh"],
+    "earthquake": ["earthquake", "tremor", "shake", "भूकंप", "भूकम्प", "நிலநடுக்கம்"],
+    "wildfire": ["fire", "wildfire", "smoke", "आग", "आगीत", "தீவிபத்து", "காட்டுத்தீ"],
+    "tornado": ["tornado", "twister", "बवंडर", "சூறாவளி"]
+}
+
+_NATIVE_CHAR = "[\u0900-\u097F\u0B80-\u0BFF]"
+# Native keywords this short must also end a word ("पूर" is not "पूरा")
+_SHORT_NATIVE = 3
+
+PET_KEYWORDS = ["pet", "dog", "cat", "animal", "पालतू", "कुत्ता", "बिल्ली", "पाळीव", "कुत्रा", "मांजर",
+                "செல்லப்பிராணி", "நாய்", "பூனை"]
+
+# Checked in this order; maps a mentioned area to the catalog's area names
+AREA_MAPPING = {
+    "north": "northside", "south": "downtown",
+    "east": "eastside", "west": "westside",
+    "downtown": "downtown", "central": "central",
+    "city": "central", "suburb": "northside",
+    "northside": "northside", "eastside": "eastside", "westside": "westside"
+}
+
+LOCATION_PATTERNS = [
+    re.compile(r'(?:in|at|near|around|by)\s+(?:the\s+)?([a-zA-Z\s]+?)(?:\s+area|\s+neighborhood|\s+district|,|\.|$)'),
+    re.compile(r'(?:located|location|from)\s+(?:in\s+)?([a-zA-Z\s]+?)(?:,|\.|$)'),
+    re.compile(r'([a-zA-Z]+side)\b')
+]
+
+ALL_RESOURCE_TYPES = ["shelter", "food", "medical", "government"]
+DEFAULT_NEEDS = ["shelter", "food", "medical"]
+NEED_FOR_RESOURCE = {"shelter": "shelter", "food": "food", "medical": "medical", "government": "assistance"}
+
+
+@dataclass
+class Intent:
+    resource_types: List[str]
+    needs: List[str]
+    urgency: str
+    disaster_type: str
+    needs_pets: bool
+    area: str = "central"
+    location_raw: str = ""
+    keywords: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict:
+        return {
+            "resource_types": list(self.resource_types),
+            "needs": list(self.needs),
+            "urgency": self.urgency,
+            "disaster_type": self.disaster_type,
+            "needs_pets": self.needs_pets,
+            "area": self.area,
+            "location_raw": self.location_raw,
+            "keywords": list(self.keywords)
+        }
+
+
+class IntentClassifier:
+    """Classifies a request: one pass for keywords, then the location patterns.
+
+    All keyword sets are compiled once into one alternation regex, longest
+    keywords first, and each match is looked up in a keyword -> labels table.
+    The raw location phrase takes one more search per LOCATION_PATTERNS entry.
+    Folding them into the keyword regex as lookaheads was tried and measured
+    slower, since every position then pays for the lookaheads.
+    """
+
+    def __init__(self):
+        self._labels = {}
+        for resource_type, keywords in RESOURCE_KEYWORDS.items():
+            self._add(keywords, ("resource", resource_type))
+        self._add(HELP_KEYWORDS, ("help", "assistance"))
+        self._add(URGENCY_KEYWORDS, ("urgency", "high"))
+        for disaster_type, keywords in DISASTER_KEYWORDS.items():
+            self._add(keywords, ("disaster", disaster_type))
+        self._add(PET_KEYWORDS, ("pets", True))
+        for area_key, area_value in AREA_MAPPING.items():
+            self._add([area_key], ("area", area_key))
+
+        latin = sorted((k for k in self._labels if k.isascii()), key=len, reverse=True)
+        native = sorted((k for k in self._labels if not k.isascii()), key=len, reverse=True)
+        native_alternatives = [
+            self._escape(k) + (f"(?!{_NATIVE_CHAR})" if len(k) <= _SHORT_NATIVE else "")
+            for k in native
+        ]
+        self._pattern = re.compile(
+            r"\b(?P<latin>" + "|".join(self._escape(k) for k in latin) + r")(?:e?s)?\b"
+            rf"|(?<!{_NATIVE_CHAR})(?P<native>" + "|".join(native_alternatives) + ")"
+        )
+
+    def _add(self, keywords: list, label: tuple):
+        for keyword in keywords:
+            self._labels.setdefault(keyword.lower(), []).append(label)
+
+    @staticmethod
+    def _escape(keyword: str) -> str:
+        return r"\s+".join(re.escape(part) for part in keyword.split())
+
+    def classify(self, user_input: str) -> Intent:
+        text = (user_input or "").lower()
+
+        resources, disasters, areas = set(), set(), []
+        help_needed = urgent = pets = False
+        keywords = []
+        for match in self._pattern.finditer(text):
+            keyword = " ".join((match.group("latin") or match.group("native")).split())
+            keywords.append(keyword)
+            for kind, value in self._labels[keyword]:
+                if kind == "resource":
+                    resources.add(value)
+                elif kind == "help":
+                    help_needed = True
+                elif kind == "urgency":
+                    urgent = True
+                elif kind == "disaster":
+                    disasters.add(value)
+                elif kind == "pets":
+                    pets = True
+                elif kind == "area":
+                    areas.append((match.start(), match.end(), value))
+
+        resource_types = [rt for rt in ALL_RESOURCE_TYPES if rt in resources]
+        needs = [NEED_FOR_RESOURCE[rt] for rt in resource_types]
+        if help_needed and "assistance" not in needs:
+            needs.append("assistance")
+        disaster_type = next((d for d in DISASTER_KEYWORDS if d in disasters), "general")
+        area, location_raw = self._extract_location(text, areas)
+
+        return Intent(
+            resource_types=resource_types or list(ALL_RESOURCE_TYPES),
+            needs=needs or list(DEFAULT_NEEDS),
+            urgency="high" if urgent else "medium",
+            disaster_type=disaster_type,
+            needs_pets=pets,
+            area=area,
+            location_raw=location_raw,
+            keywords=keywords
+        )
+
+    def _extract_location(self, text: str, areas: list) -> tuple:
+        """Pick the area and raw location phrase, reusing area hits from the keyword pass."""
+        area, raw = "central", ""
+        mentioned = {key for _, _, key in areas}
+        for area_key in AREA_MAPPING:
+            if area_key in mentioned:
+                area, raw = AREA_MAPPING[area_key], area_key
+                break
+
+        for pattern in LOCATION_PATTERNS:
+            match = pattern.search(text)
+            if not match:
+                continue
+            location_text = match.group(1).strip()
+            if len(location_text) > 2 and location_text not in ['the', 'a', 'an', 'my']:
+                raw = location_text
+                start, end = match.span(1)
+                inside = {key for s, e, key in areas if s >= start and e <= end}
+                for area_key in AREA_MAPPING:
+                    if area_key in inside:
+                        area = AREA_MAPPING[area_key]
+                        break
+        return area, raw
+
+
+_classifier = IntentClassifier()
+
+
+def classify_intent(user_input: str) -> Intent:
+    """Classify a request with the shared, precompiled classifier."""
+    return _classifier.classify(user_input)
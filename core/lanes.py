@@ -0,0 +1,172 @@
+"""
+Priority lanes for UI event handlers.
+
+Every Gradio handler runs in one of three lanes:
+- life_safety: SOS alerts and "I'm safe" reports
+- reads: cheap local reads and registrations (data_store only)
+- upstream: anything waiting on Overpass, Open-Meteo or the agent pipeline
+
+All lanes share TOTAL_SLOTS running handlers, and each lane has its own cap.
+Free slots go to waiting handlers in strict lane priority order. The last
+LIFE_SAFETY_RESERVE slots are kept for life_safety, so an SOS never queues
+behind a wall of slow lookups. A lane whose queue is full, or whose handler
+waited longer than the lane's max_wait, gets an immediate "busy" reply. The
+handler is not left to hang. Queue wait time per lane goes into the
+``lane_wait`` stage histogram, and busy replies into ``drc_events_total``.
+
+Handlers are registered with Gradio without a concurrency limit, so the lanes
+do the limiting. Waiting handlers hold a thread from Gradio's pool (40 by
+default). The non-life-safety lanes can hold at most TOTAL_SLOTS -
+LIFE_SAFETY_RESERVE running plus their max_waiting queued, which keeps some of
+those threads free for SOS.
+"""
+import functools
+import heapq
+import inspect
+import itertools
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+from core.metrics import count, observe
+
+TOTAL_SLOTS = int(os.environ.get("DRC_LANE_SLOTS", "16"))
+LIFE_SAFETY_RESERVE = 4
+
+
+@dataclass
+class Lane:
+    name: str
+    priority: int       # lower runs first
+    concurrency: int    # handlers of this lane running at once
+    max_waiting: int    # handlers of this lane queued before new ones get "busy"
+    max_wait: float     # seconds a queued handler waits before it gets "busy"
+    active: int = 0
+    waiting: int = 0
+
+
+LANES = {
+    "life_safety": Lane("life_safety", 0, concurrency=TOTAL_SLOTS, max_waiting=200, max_wait=60.0),
+    "reads": Lane("reads", 1, concurrency=8, max_waiting=8, max_wait=10.0),
+    "upstream": Lane("upstream", 2, concurrency=6, max_waiting=8, max_wait=20.0),
+}
+
+
+class LaneBusy(Exception):
+    pass
+
+
+class LaneScheduler:
+    def __init__(self, lanes: dict = None, total_slots: int = TOTAL_SLOTS, reserve: int = LIFE_SAFETY_RESERVE):
+        self.lanes = lanes or LANES
+        self.total_slots = total_slots
+        self.reserve = reserve
+        self.active = 0
+        self._waiters = []  # heap of (priority, seq, lane name, grant Event)
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def _eligible(self, lane: Lane) -> bool:
+        if lane.active >= lane.concurrency:
+            return False
+        limit = self.total_slots if lane.name == "life_safety" else self.total_slots - self.reserve
+        return self.active < limit
+
+    def _grant(self):
+        """Hand free slots to waiters, highest priority first (caller holds the lock)."""
+        skipped = []
+        while self._waiters and self.active < self.total_slots:
+            entry = heapq.heappop(self._waiters)
+            lane = self.lanes[entry[2]]
+            if entry[3].is_set():
+                continue  # gave up waiting
+            if self._eligible(lane):
+                lane.active += 1
+                lane.waiting -= 1
+                self.active += 1
+                entry[3].set()
+            else:
+                skipped.append(entry)
+        for entry in skipped:
+            heapq.heappush(self._waiters, entry)
+
+    def acquire(self, name: str):
+        lane = self.lanes[name]
+        start = time.perf_counter()
+        with self._lock:
+            if not self._waiters and self._eligible(lane):
+                lane.active += 1
+                self.active += 1
+                observe("lane_wait", 0.0, name)
+                return
+            if lane.waiting >= lane.max_waiting:
+                count("lane_busy", name)
+                observe("lane_wait", 0.0, name, "busy")
+                raise LaneBusy(name)
+            granted = threading.Event()
+            lane.waiting += 1
+            heapq.heappush(self._waiters, (lane.priority, next(self._seq), name, granted))
+            self._grant()
+        if not granted.wait(lane.max_wait):
+            with self._lock:
+                if not granted.is_set():
+                    # Mark it so _grant skips the stale heap entry
+                    granted.set()
+                    lane.waiting -= 1
+                    count("lane_busy", name)
+                    observe("lane_wait", time.perf_counter() - start, name, "timeout")
+                    raise LaneBusy(name)
+        observe("lane_wait", time.perf_counter() - start, name)
+
+    def release(self, name: str):
+        with self._lock:
+            self.lanes[name].active -= 1
+            self.active -= 1
+            self._grant()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {name: {"active": lane.active, "waiting": lane.waiting} for name, lane in self.lanes.items()}
+
+
+_scheduler = LaneScheduler()
+
+
+def get_scheduler() -> LaneScheduler:
+    return _scheduler
+
+
+def in_lane(name: str, busy_reply):
+    """Run a handler (plain or generator) in a lane; busy_reply is returned when the lane is full."""
+    if name not in LANES:
+        raise ValueError(f"unknown lane {name}")
+
+    def decorator(fn):
+        if inspect.isgeneratorfunction(fn):
+            @functools.wraps(fn)
+            def stream(*args, **kwargs):
+                try:
+                    _scheduler.acquire(name)
+                except LaneBusy:
+                    yield busy_reply
+                    return
+                try:
+                    yield from fn(*args, **kwargs)
+                finally:
+                    _scheduler.release(name)
+            return stream
+
+        @functools.wraps(fn)
+        def call(*args, **kwargs):
+            try:
+                _scheduler.acquire(name)
+            except LaneBusy:
+                return busy_reply
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _scheduler.release(name)
+        call.lane_busy_reply = busy_reply
+        return call
+    return decorator
@@ -0,0 +1,94 @@
+"""
+Lite mode for slow connections.
+
+On 2G a Find Resources answer used to be several KB of Markdown, with US
+helpline tables, plus the map's GeoJSON and the Leaflet assets. In lite mode:
+- the agent returns a plain-text summary: the LITE_TOP_N nearest resources
+  with their phone numbers and the Indian helplines (Evaluator.render_lite)
+- the server builds no map
+- responses are gzip-compressed (``install()``)
+
+Lite mode is on when the browser's client hints say the link is slow
+(``prefers_lite``): ``Save-Data: on``, an ECT of 2g or slow-2g, or a Downlink
+under SLOW_DOWNLINK_MBPS. The server asks for those hints with Accept-CH.
+Browsers without hints get the full UI, and the UI has a toggle. The /lite
+page is a small HTML form (no scripts) with the plain-text answer, and /api/lite
+returns the text alone. When hints mark the link as slow, a request for / is
+redirected to /lite unless it has ``?full=1``.
+
+    GET /lite?q=need+shelter&lat=19.07&lon=72.87
+    GET /api/lite?q=need+shelter&lat=19.07&lon=72.87    text/plain
+"""
+import html
+import logging
+import math
+from typing import Optional
+
+from core.lanes import in_lane
+from core.metrics import count, timed
+
+logger = logging.getLogger(__name__)
+
+ACCEPT_CH = "Save-Data, ECT, Downlink"
+SLOW_ECT = {"slow-2g", "2g"}
+SLOW_DOWNLINK_MBPS = 0.5
+GZIP_MIN_BYTES = 500
+BUSY_TEXT = "The service is busy right now. Please try again in a few seconds. In an emergency call 112."
+ERROR_TEXT = "Sorry, the search failed. Please try again. In an emergency call 112."
+
+LITE_PAGE = """<!doctype html><html><head><meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1"><title>Disaster Resource Connector (lite)</title></head>
+<body style="font-family:sans-serif;margin:8px">
+<b>Disaster Resource Connector</b> - lite. <b>Emergency 112</b>
+<form action="/lite"><input name="q" value="{q}" placeholder="I need shelter and food" size="28">
+<input name="lat" value="{lat}" size="6" placeholder="lat"><input name="lon" value="{lon}" size="6" placeholder="lon">
+<button>Find</button></form>
+<pre style="white-space:pre-wrap">{answer}</pre>
+<a href="/?full=1">Full site</a>
+</body></html>"""
+
+
+def parse_coordinate(value, limit: float) -> Optional[float]:
+    """A coordinate from the form, or None when it is empty, not a number or out of range.
+
+    The lite form always submits lat= and lon=, usually empty.
+    """
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) and abs(number) <= limit else None
+
+
+def prefers_lite(headers) -> bool:
+    """True when the client hints in headers (any mapping, case as sent by Starlette) mark a slow link."""
+    if headers.get("save-data", "").strip().lower() == "on":
+        return True
+    if headers.get("ect", "").strip().lower() in SLOW_ECT:
+        return True
+    try:
+        return float(headers.get("downlink", "")) < SLOW_DOWNLINK_MBPS
+    except ValueError:
+        return False
+
+
+@in_lane("upstream", BUSY_TEXT)
+def answer(query: str, lat: float = None, lon: float = None) -> str:
+    """The lite plain-text answer to a Find Resources query."""
+    from main_agent import stream_agent_with_location
+
+    count("lite_request")
+    try:
+        with timed("lite_answer"):
+            for event in stream_agent_with_location(query, lat, lon, lite=True):
+                if event["event"] == "final":
+                    return event["result"]["final_response"]
+    except Exception:
+        logger.exception("Lite answer failed")
+    return ERROR_TEXT
+
+
+def render_page(query: str = "", lat: float = None, lon: float = None, text: str = "") -> str:
+    def field(value):
+        return "" if value is None else html.escape(str(value))
+    return LITE_PAGE.format(q=field(query), lat=field(lat), lon=field(lon), answer=html.escape(text))
@@ -0,0 +1,181 @@
+"""
+Non-blocking structured logging.
+
+Request threads only put the LogRecord on a bounded queue. Messages stay
+unformatted until then. A background QueueListener formats each record as one
+JSON object per line and writes it to stderr and to a size-rotated
+agent_system.log.
+
+A rotating file must have a single writer. launcher.py gives each worker its
+own file (DRC_LOG_FILE=agent_system.worker<i>.log). Message bus processes
+(started by multiprocessing) only log to stderr, which they share with their
+parent.
+
+Chatty loggers are thinned before anything is queued:
+- sampling: DRC_LOG_SAMPLE="agents.planner=0.1,main_agent=0.5" keeps that
+  share of INFO/DEBUG lines per logger
+- rate limiting: each logger may emit DRC_LOG_RATE INFO/DEBUG lines per second
+  (burst DRC_LOG_BURST); the rest are dropped and counted
+- warnings and errors are never dropped
+
+configure_logging() is idempotent; call it from every entry point.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import multiprocessing
+import os
+import queue
+import random
+import threading
+import time
+from datetime import datetime, timezone
+
+from core.metrics import count
+
+LOG_FILE = os.environ.get("DRC_LOG_FILE", "agent_system.log")
+LOG_LEVEL = os.environ.get("DRC_LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.environ.get("DRC_LOG_FORMAT", "json")
+LOG_MAX_BYTES = int(os.environ.get("DRC_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_BACKUPS = int(os.environ.get("DRC_LOG_BACKUPS", "5"))
+LOG_RATE = float(os.environ.get("DRC_LOG_RATE", "50"))
+LOG_BURST = float(os.environ.get("DRC_LOG_BURST", "100"))
+LOG_QUEUE_SIZE = 10000
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Standard LogRecord attributes; anything else was passed through ``extra``
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+def _parse_sampling(spec: str) -> dict:
+    rates = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, _, rate = part.partition("=")
+        try:
+            rates[name.strip()] = float(rate)
+        except ValueError:
+            pass
+    return rates
+
+
+LOG_SAMPLING = _parse_sampling(os.environ.get("DRC_LOG_SAMPLE", ""))
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "thread": record.threadName
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_FIELDS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """Per-logger sampling and token-bucket rate limit for INFO and below."""
+
+    def __init__(self, rate: float = LOG_RATE, burst: float = LOG_BURST, sampling: dict = None):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.sampling = LOG_SAMPLING if sampling is None else sampling
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO:
+            return True
+        sample = self.sampling.get(record.name)
+        if sample is not None and random.random() >= sample:
+            count("log_dropped", "sampled")
+            return False
+        if self.rate <= 0:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(record.name, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            if tokens < 1:
+                self._buckets[record.name] = (tokens, now)
+                count("log_dropped", "rate_limited")
+                return False
+            self._buckets[record.name] = (tokens - 1, now)
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Queues records unformatted and drops them, counted, when the queue is full."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Formatting happens on the listener thread; only freeze what can't wait
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            count("log_dropped", "queue_full")
+
+
+_listener = None
+_configure_lock = threading.Lock()
+
+
+def _handlers(formatter: logging.Formatter) -> list:
+    handlers = [logging.StreamHandler()]
+    # Only add a file handler if we have write permissions (not on Hugging Face),
+    # and leave the file to the parent in multiprocessing children
+    try:
+        if os.access(os.path.dirname(os.path.abspath(LOG_FILE)), os.W_OK) and multiprocessing.parent_process() is None:
+            handlers.append(logging.handlers.RotatingFileHandler(
+                LOG_FILE, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS, encoding="utf-8"
+            ))
+    except OSError:
+        pass
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    return handlers
+
+
+def configure_logging():
+    """Install the queue handler on the root logger (once per process)."""
+    global _listener
+    with _configure_lock:
+        if _listener is not None:
+            return
+        formatter = JsonFormatter() if LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT)
+        log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        queue_handler = NonBlockingQueueHandler(log_queue)
+        queue_handler.addFilter(RateLimitFilter())
+
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(queue_handler)
+        root.setLevel(LOG_LEVEL)
+
+        _listener = logging.handlers.QueueListener(log_queue, *_handlers(formatter), respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """Flush queued records and stop the background writer."""
+    global _listener
+    with _configure_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
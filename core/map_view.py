@@ -0,0 +1,283 @@
+"""
+Persistent client-side map fed by GeoJSON patches.
+
+The browser builds the Leaflet map once, when the component mounts. After that
+each handler returns a small JSON patch, not a full folium HTML document:
+
+    {"seq": 7,
+     "view": [lat, lon, zoom],                  # optional: recenter
+     "user": [lat, lon] | null,                 # optional: move/remove "You are here"
+     "layers": {"resources": {"clear": true,    # optional per layer
+                              "add": [<GeoJSON Point Feature>, ...],
+                              "remove": ["<feature id>", ...]}}}
+
+A ``MapView`` remembers which features it has sent. Within one streamed request
+it only adds the markers each new section brings, and ``sync()`` sends the
+difference to the final set. ``seq`` makes every patch a new value, so the
+component's watcher fires even when two patches are otherwise equal.
+
+With an ``overlay_url`` prop, the map also gets a layer of aggregated SOS
+alerts and requests. That layer is fetched tile by tile from api.py.
+``overlay_on`` shows it from the start, and ``operator_focus`` makes the map
+follow the rows clicked on the operator board and send the operator key
+entered there, which the tiles with individual points require. Only the
+operator tab uses the overlay.
+"""
+import hashlib
+import itertools
+import json
+import os
+
+from core.geo_aggregation import MARKER_ZOOM
+from core.tile_cache import ASSETS
+
+DEFAULT_CENTER = (20.5937, 78.9629)
+DEFAULT_ZOOM = 5
+USER_ZOOM = 12
+# Tiles and the Leaflet files come through the app's own cache (core/tile_cache)
+# unless DRC_TILE_PROXY=0, which loads them straight from OSM and unpkg
+TILE_PROXY = os.environ.get("DRC_TILE_PROXY", "1") != "0"
+TILE_URL = "/api/tiles/{z}/{x}/{y}.png" if TILE_PROXY else "https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png"
+ASSET_URL = "/api/assets/" if TILE_PROXY else None
+TILE_ATTRIBUTION = "&copy; OpenStreetMap contributors"
+COORD_PRECISION = 5  # ~1 m
+
+_seq = itertools.count(1)
+
+
+def _asset(name: str) -> str:
+    return ASSET_URL + name if ASSET_URL else ASSETS[name]
+
+
+MAP_HEAD = "\n".join(
+    [f'<link rel="stylesheet" href="{_asset(n)}">' for n in ("leaflet.css", "MarkerCluster.css", "MarkerCluster.Default.css")]
+    + [f'<script src="{_asset(n)}"></script>' for n in ("leaflet.js", "leaflet.markercluster.js")]
+)
+
+MAP_TEMPLATE = """<div class="drc-map-wrap"><div class="drc-map"></div>
+<div class="drc-legend"><b>🗺️ Legend</b><br>🔴 You<br>🔵 Shelter<br>🟢 Food<br>🟣 Medical<br>🔴 Blood Bank</div></div>"""
+
+MAP_CSS = """
+.drc-map-wrap { position: relative; }
+.drc-map { height: 450px; border-radius: 8px; }
+.drc-legend { position: absolute; bottom: 20px; left: 10px; z-index: 1000; background: white; color: #222;
+              padding: 8px 10px; border-radius: 8px; box-shadow: 0 2px 10px rgba(0,0,0,0.2); font-size: 12px; }
+"""
+
+# Runs once per component; `element`, `props` and `watch` come from gr.HTML
+MAP_JS = """
+const box = element.querySelector('.drc-map');
+const map = L.map(box, {preferCanvas: true}).setView(%(center)s, %(zoom)d);
+L.tileLayer('%(tiles)s', {maxZoom: 19, attribution: '%(attribution)s'}).addTo(map);
+const colors = {shelter: '#2a81cb', food: '#2aad27', medical: '#9c2bcb', hospital: '#9c2bcb',
+                blood: '#8b0000', government: '#cb8427', sos: '#e60000', request: '#ff8c00'};
+const layers = {}, markers = {};
+let user = null;
+
+function layer(name) {
+  if (!layers[name]) {
+    layers[name] = (L.markerClusterGroup ? L.markerClusterGroup() : L.layerGroup()).addTo(map);
+    markers[name] = {};
+  }
+  return layers[name];
+}
+
+// Leaflet renders tooltip strings as HTML, and names come from OSM tags anyone can edit
+function plain(text) {
+  const span = document.createElement('span');
+  span.textContent = text;
+  return span;
+}
+
+function popup(p, lat, lon) {
+  const div = document.createElement('div');
+  const title = document.createElement('b');
+  title.textContent = p.name || 'Resource';
+  div.appendChild(title);
+  for (const line of [p.phone, p.address]) {
+    if (line) { div.appendChild(document.createElement('br')); div.appendChild(document.createTextNode(line)); }
+  }
+  div.appendChild(document.createElement('br'));
+  const link = document.createElement('a');
+  link.href = `https://www.google.com/maps/dir/?api=1&destination=${lat},${lon}`;
+  link.target = '_blank';
+  link.textContent = '🗺️ Directions';
+  div.appendChild(link);
+  return div;
+}
+
+function apply(raw) {
+  if (!raw) return;
+  const patch = typeof raw === 'string' ? JSON.parse(raw) : raw;
+  if (patch.view) map.setView([patch.view[0], patch.view[1]], patch.view[2]);
+  if ('user' in patch) {
+    if (user) { user.remove(); user = null; }
+    if (patch.user) {
+      user = L.layerGroup([
+        L.circle(patch.user, {radius: 3000, color: 'red', fillOpacity: 0.1}),
+        L.circleMarker(patch.user, {radius: 9, color: 'white', weight: 2, fillColor: 'red', fillOpacity: 1})
+          .bindTooltip('You are here')
+      ]).addTo(map);
+    }
+  }
+  for (const [name, ops] of Object.entries(patch.layers || {})) {
+    const group = layer(name);
+    if (ops.clear) { group.clearLayers(); markers[name] = {}; }
+    for (const id of ops.remove || []) {
+      if (markers[name][id]) { group.removeLayer(markers[name][id]); delete markers[name][id]; }
+    }
+    const added = [];
+    for (const f of ops.add || []) {
+      const [lon, lat] = f.geometry.coordinates, p = f.properties;
+      if (markers[name][f.id]) group.removeLayer(markers[name][f.id]);
+      const m = L.circleMarker([lat, lon], {radius: 8, color: 'white', weight: 1.5,
+                                            fillColor: colors[p.type] || 'gray', fillOpacity: 0.9})
+        .bindTooltip(plain(p.name || 'Resource')).bindPopup(() => popup(p, lat, lon));
+      markers[name][f.id] = m;
+      added.push(m);
+    }
+    if (group.addLayers) group.addLayers(added); else added.forEach(m => group.addLayer(m));
+  }
+}
+
+apply(props.value);
+watch('value', () => apply(props.value));
+
+// Aggregated SOS alerts and requests (core/geo_aggregation): count bubbles per
+// bin at low zoom, individual points from MARKER_ZOOM, fetched per visible tile
+if (props.overlay_url) {
+  const overlay = L.layerGroup();
+  let tiles = {}, operatorKey = '';
+  L.control.layers(null, {'🆘 SOS & requests': overlay}, {collapsed: false}).addTo(map);
+  if (props.overlay_on) overlay.addTo(map);
+
+  function draw(data) {
+    const group = L.layerGroup();
+    for (const [lat, lon, sos, req] of data.bins || []) {
+      const total = sos + req;
+      L.circleMarker([lat, lon], {radius: 6 + 4 * Math.log2(total), weight: 1, color: 'white',
+                                  fillColor: sos ? '#e60000' : '#ff8c00', fillOpacity: Math.min(0.35 + total / 50, 0.85)})
+        .bindTooltip(`${sos} SOS · ${req} requests`)
+        .on('click', () => map.setView([lat, lon], Math.min(data.z + 3, %(marker_zoom)d)))
+        .addTo(group);
+    }
+    for (const [id, kind, lat, lon] of data.points || []) {
+      L.circleMarker([lat, lon], {radius: 7, weight: 1.5, color: 'white',
+                                  fillColor: colors[kind] || 'gray', fillOpacity: 0.95})
+        .bindTooltip(plain(`${kind === 'sos' ? '🆘 SOS' : '📦 Request'} ${id}`))
+        .addTo(group);
+    }
+    return group;
+  }
+
+  async function load(key) {
+    try {
+      const headers = operatorKey ? {'X-Operator-Key': operatorKey} : {};
+      const response = await fetch(`${props.overlay_url}/${key}.json`, {headers});
+      const etag = response.headers.get('ETag');
+      if (!response.ok || !tiles[key] || tiles[key].etag === etag) return;
+      const data = await response.json();
+      if (!tiles[key]) return;  // scrolled away meanwhile
+      if (tiles[key].layer) overlay.removeLayer(tiles[key].layer);
+      tiles[key] = {etag, layer: draw(data).addTo(overlay)};
+    } catch (e) { /* overlay is best effort, e.g. when the API routes are not mounted */ }
+  }
+
+  function refresh() {
+    if (!map.hasLayer(overlay)) return;
+    const z = map.getZoom(), n = 1 << z, bounds = map.getPixelBounds();
+    const min = bounds.min.divideBy(256).floor(), max = bounds.max.divideBy(256).floor();
+    const wanted = new Set();
+    for (let x = Math.max(min.x, 0); x <= Math.min(max.x, n - 1); x++)
+      for (let y = Math.max(min.y, 0); y <= Math.min(max.y, n - 1); y++) wanted.add(`${z}/${x}/${y}`);
+    for (const key of Object.keys(tiles)) {
+      if (!wanted.has(key)) { if (tiles[key].layer) overlay.removeLayer(tiles[key].layer); delete tiles[key]; }
+    }
+    for (const key of wanted) { if (!tiles[key]) tiles[key] = {}; load(key); }
+  }
+
+  // Points (from MARKER_ZOOM) need the key typed into the operator board
+  if (props.operator_focus) {
+    window.addEventListener('drc-operator-key', (e) => {
+      operatorKey = e.detail;
+      overlay.clearLayers(); tiles = {};
+      refresh();
+    });
+  }
+  map.on('moveend overlayadd', refresh);
+  setInterval(refresh, 15000);
+  refresh();
+}
+// The operator board (core/operator_feed) pans this map to the row clicked
+if (props.operator_focus) {
+  window.addEventListener('drc-operator-focus', (e) => map.setView(e.detail, Math.max(map.getZoom(), %(marker_zoom)d)));
+}
+// Tabs mount hidden maps at zero size; re-measure once they are shown
+new ResizeObserver(() => map.invalidateSize()).observe(box);
+""" % {"center": list(DEFAULT_CENTER), "zoom": DEFAULT_ZOOM, "tiles": TILE_URL, "attribution": TILE_ATTRIBUTION,
+       "marker_zoom": MARKER_ZOOM}
+
+
+def feature_id(resource: dict) -> str:
+    key = f"{resource.get('type', '')}|{resource.get('name', '')}|{resource['lat']:.{COORD_PRECISION}f}|{resource['lon']:.{COORD_PRECISION}f}"
+    return hashlib.blake2b(key.encode(), digest_size=6).hexdigest()
+
+
+def to_feature(resource: dict) -> dict:
+    properties = {"name": resource.get("name") or "Resource", "type": resource.get("type", "shelter")}
+    for field in ("phone", "address"):
+        if resource.get(field):
+            properties[field] = resource[field]
+    return {
+        "type": "Feature",
+        "id": feature_id(resource),
+        "geometry": {"type": "Point", "coordinates": [round(resource["lon"], COORD_PRECISION),
+                                                      round(resource["lat"], COORD_PRECISION)]},
+        "properties": properties
+    }
+
+
+def _located(resources) -> list:
+    return [r for r in resources or [] if r.get("lat") and r.get("lon")]
+
+
+def _encode(patch: dict) -> str:
+    patch["seq"] = next(_seq)
+    return json.dumps(patch, ensure_ascii=False, separators=(",", ":"))
+
+
+class MapView:
+    """What one client map shows, and the patches that bring it up to date."""
+
+    def __init__(self, layer: str = "resources"):
+        self.layer = layer
+        self.sent = set()
+
+    def reset(self, user_lat=None, user_lon=None, resources=None) -> str:
+        """Recenter on the user (or India) and replace the layer's markers."""
+        features = [to_feature(r) for r in _located(resources)]
+        self.sent = {f["id"] for f in features}
+        if user_lat and user_lon:
+            patch = {"view": [user_lat, user_lon, USER_ZOOM], "user": [user_lat, user_lon]}
+        else:
+            patch = {"view": [*DEFAULT_CENTER, DEFAULT_ZOOM], "user": None}
+        patch["layers"] = {self.layer: {"clear": True, "add": features}}
+        return _encode(patch)
+
+    def add(self, resources) -> str:
+        features = [f for f in map(to_feature, _located(resources)) if f["id"] not in self.sent]
+        self.sent.update(f["id"] for f in features)
+        return _encode({"layers": {self.layer: {"add": features}}})
+
+    def sync(self, resources) -> str:
+        """Add what is missing and remove what is no longer in ``resources``."""
+        features = {f["id"]: f for f in map(to_feature, _located(resources))}
+        add = [f for fid, f in features.items() if fid not in self.sent]
+        remove = sorted(self.sent - features.keys())
+        self.sent = set(features)
+        return _encode({"layers": {self.layer: {"add": add, "remove": remove}}})
+
+
+def map_patch(user_lat=None, user_lon=None, resources=None) -> str:
+    """One-shot patch for handlers that show a fresh set of markers."""
+    return MapView().reset(user_lat, user_lon, resources)
@@ -0,0 +1,338 @@
+"""
+Out-of-process A2A message bus.
+
+Each agent role (planner, worker, evaluator) runs as a pool of local processes,
+so CPU-bound stages are not limited to one interpreter. The parent keeps one
+A2AProtocol priority queue per role and hands a message to the least busy
+process of that role over a pipe, pickled with the highest protocol. A process
+works on up to ``concurrency[role]`` messages at once on its own threads, so
+workers waiting on Overpass or Open-Meteo do not hold a whole process each. A
+process answers with a reply Message carrying the same session_id. That reply
+is the ack: if the process dies before replying, it is restarted and every
+message it held is retried.
+
+    bus = MessageBus(build_role_handler, {"worker": 4}, concurrency={"worker": 8})
+    future = bus.submit(Message("", session_id, "main", "worker", "execute_task", payload, 0, "high"))
+    result = future.result(timeout=5)
+
+``handler_factory(role)`` runs inside each child process and returns a callable
+that takes a Message and returns a picklable result. With the default "spawn"
+start method it must be importable at module level.
+"""
+import logging
+import multiprocessing
+import pickle
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from multiprocessing.connection import wait as wait_connections
+from typing import Callable, Dict
+
+from core.a2a_protocol import A2AProtocol, Message
+from core.tracing import NOOP_SPAN, get_tracer, start_span
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_SIZES = {"planner": 1, "worker": 2, "evaluator": 1}
+DEFAULT_CONCURRENCY = {"planner": 1, "worker": 8, "evaluator": 1}
+MAX_QUEUE = 256
+MAX_RETRIES = 2
+_PICKLE_PROTOCOL = pickle.HIGHEST_PROTOCOL
+
+
+class BusFull(Exception):
+    """A role's queue stayed full for longer than the caller was willing to wait."""
+
+
+class RemoteError(Exception):
+    """The role handler raised; carries the remote error text."""
+
+
+class WorkerCrashed(Exception):
+    """The message crashed every process it was sent to."""
+
+
+def _role_main(role: str, conn, handler_factory: Callable, concurrency: int = 1):
+    handler = handler_factory(role)
+    send_lock = threading.Lock()
+    pool = ThreadPoolExecutor(concurrency, thread_name_prefix=f"bus-{role}") if concurrency > 1 else None
+    while True:
+        try:
+            message = pickle.loads(conn.recv_bytes())
+        except (EOFError, OSError):
+            break
+        if message is None:
+            break
+        if pool is None:
+            _handle(role, conn, send_lock, handler, message)
+        else:
+            pool.submit(_handle, role, conn, send_lock, handler, message)
+    if pool is not None:
+        pool.shutdown(wait=True)
+
+
+def _handle(role: str, conn, send_lock, handler: Callable, message: Message):
+    trace = message.trace_context
+    span = start_span(f"{role}.{message.message_type}", trace, session_id=message.session_id) if trace else NOOP_SPAN
+    try:
+        with span:
+            payload = {"ok": True, "result": handler(message)}
+    except Exception as e:
+        payload = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+    payload["reply_to"] = message.message_id
+    if span is not NOOP_SPAN:
+        # This message's spans travel back with the reply and join the caller's trace
+        payload["spans"] = get_tracer().take(span)
+    reply = Message("", message.session_id, role, message.from_agent, "reply", payload, 0, message.priority)
+    data = pickle.dumps(reply, protocol=_PICKLE_PROTOCOL)
+    with send_lock:
+        try:
+            conn.send_bytes(data)
+        except (OSError, ValueError):
+            pass  # the parent is gone or restarting this process
+
+
+class _Slot:
+    """One child process of a role and the messages it is working on, by message id."""
+
+    def __init__(self, role: str, index: int):
+        self.role = role
+        self.index = index
+        self.process = None
+        self.conn = None
+        self.current = {}
+
+
+class MessageBus:
+    def __init__(self, handler_factory: Callable, pool_sizes: Dict[str, int] = None,
+                 max_queue: int = MAX_QUEUE, max_retries: int = MAX_RETRIES, start_method: str = "spawn",
+                 concurrency: Dict[str, int] = None):
+        self.handler_factory = handler_factory
+        self.pool_sizes = {**DEFAULT_POOL_SIZES, **(pool_sizes or {})}
+        self.concurrency = {**DEFAULT_CONCURRENCY, **(concurrency or {})}
+        self.max_queue = max_queue
+        self.max_retries = max_retries
+        self.queues = A2AProtocol()
+        self._ctx = multiprocessing.get_context(start_method)
+        self._cond = threading.Condition()
+        self._futures = {}
+        self._attempts = {}
+        self._sessions = defaultdict(set)
+        self._closed = False
+        self.completed = 0
+        self.errors = 0
+        self.crashes = 0
+        self.retries = 0
+        self.rejected = 0
+
+        self._slots = {role: [_Slot(role, i) for i in range(size)] for role, size in self.pool_sizes.items() if size > 0}
+        for slots in self._slots.values():
+            for slot in slots:
+                self._spawn(slot)
+        self._collector = threading.Thread(target=self._collect, name="message-bus", daemon=True)
+        self._collector.start()
+
+    # ==================== SENDING ====================
+    def submit(self, message: Message, timeout: float = None) -> Future:
+        """Queue a message for its role and return a Future for the handler's result.
+
+        Blocks while the role's queue is full (backpressure); raises BusFull if
+        it is still full after ``timeout`` seconds.
+        """
+        role = message.to_agent
+        if role not in self._slots:
+            raise ValueError(f"No process pool for role {role!r}")
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._closed or self.queues.pending(role) < self.max_queue, timeout):
+                self.rejected += 1
+                raise BusFull(f"{role} queue is full ({self.max_queue} messages)")
+            if self._closed:
+                raise RuntimeError("MessageBus is closed")
+            future = Future()
+            self._futures[message.message_id] = future
+            self._attempts[message.message_id] = 0
+            self._sessions[message.session_id].add(message.message_id)
+            self.queues.send_message(message)
+            self._dispatch(role)
+        return future
+
+    def request(self, message: Message, timeout: float = None):
+        """Send a message and wait for its result."""
+        return self.submit(message, timeout).result(timeout)
+
+    def cancel_session(self, session_id: str) -> int:
+        """Cancel every message of a session that has not reached a process yet."""
+        with self._cond:
+            futures = [self._futures.get(mid) for mid in self._sessions.get(session_id, ())]
+        return sum(1 for future in futures if future is not None and future.cancel())
+
+    def in_flight(self, session_id: str) -> int:
+        with self._cond:
+            return len(self._sessions.get(session_id, ()))
+
+    # ==================== SCHEDULING ====================
+    def _dispatch(self, role: str):
+        """Hand queued messages to the least busy processes, highest priority first (holds _cond)."""
+        slots, capacity = self._slots[role], self.concurrency.get(role, 1)
+        while self.queues.pending(role):
+            slot = min(slots, key=lambda s: self._load(s, capacity))
+            if self._load(slot, capacity) >= capacity:
+                break
+            message = self.queues.receive_message(role)
+            future = self._futures.get(message.message_id)
+            if future is None or not (future.running() or future.set_running_or_notify_cancel()):
+                self._forget(message)
+                continue
+            if self._attempts.get(message.message_id) and slot.current:
+                # A retried message may be the one that killed the process; run it alone
+                slot = next((s for s in slots if not s.current), None)
+                if slot is None:
+                    self._redeliver(message)
+                    break
+            slot.current[message.message_id] = message
+            try:
+                slot.conn.send_bytes(pickle.dumps(message, protocol=_PICKLE_PROTOCOL))
+            except (OSError, ValueError):
+                self._on_crash(slot)
+                return
+        self._cond.notify_all()
+
+    def _load(self, slot: _Slot, capacity: int) -> int:
+        # A process running a retried message takes nothing else until it is done
+        if any(self._attempts.get(message_id) for message_id in slot.current):
+            return capacity
+        return len(slot.current)
+
+    def _collect(self):
+        while True:
+            with self._cond:
+                if self._closed:
+                    return
+                conns = {slot.conn: slot for slots in self._slots.values() for slot in slots}
+                # Sentinel fds are reused by restarted processes, so remember which process each belongs to
+                sentinels = {slot.process.sentinel: (slot, slot.process) for slots in self._slots.values() for slot in slots}
+            try:
+                ready_list = wait_connections(list(conns) + list(sentinels), timeout=0.5)
+            except (OSError, ValueError):
+                continue  # a connection was closed by a restart; rebuild the wait set
+            for ready in ready_list:
+                with self._cond:
+                    if self._closed:
+                        return
+                    if ready in conns:
+                        slot = conns[ready]
+                        if slot.conn is not ready:
+                            continue  # restarted since we started waiting
+                        try:
+                            reply = pickle.loads(ready.recv_bytes())
+                        except (EOFError, OSError):
+                            self._on_crash(slot)
+                            continue
+                        self._complete(slot, reply)
+                    else:
+                        slot, process = sentinels[ready]
+                        if slot.process is process:
+                            self._on_crash(slot)
+
+    def _complete(self, slot: _Slot, reply: Message):
+        message = slot.current.pop(reply.payload.get("reply_to"), None)
+        get_tracer().adopt(reply.payload.pop("spans", None))
+        future = self._futures.get(reply.payload.get("reply_to"))
+        if message is not None and future is not None:
+            if reply.payload.get("ok"):
+                self.completed += 1
+                future.set_result(reply.payload.get("result"))
+            else:
+                self.errors += 1
+                future.set_exception(RemoteError(reply.payload.get("error")))
+            self._forget(message)
+        self._dispatch(slot.role)
+
+    def _on_crash(self, slot: _Slot):
+        """Restart a dead process and retry (or fail) the messages it held."""
+        self.crashes += 1
+        messages, slot.current = list(slot.current.values()), {}
+        logger.warning("%s process %s died while handling %s", slot.role, slot.index,
+                       ", ".join(m.message_id for m in messages) or "nothing")
+        self._spawn(slot)
+        for message in messages:
+            self._attempts[message.message_id] = self._attempts.get(message.message_id, 0) + 1
+            if self._attempts[message.message_id] <= self.max_retries:
+                self.retries += 1
+                self._redeliver(message)
+            else:
+                future = self._futures.get(message.message_id)
+                if future is not None:
+                    future.set_exception(WorkerCrashed(f"{slot.role} crashed on {message.message_id}"))
+                self._forget(message)
+        self._dispatch(slot.role)
+
+    def _redeliver(self, message: Message):
+        # Retries skip the backpressure check; the message was already admitted
+        self.queues.send_message(message)
+
+    def _forget(self, message: Message):
+        self._futures.pop(message.message_id, None)
+        self._attempts.pop(message.message_id, None)
+        ids = self._sessions.get(message.session_id)
+        if ids is not None:
+            ids.discard(message.message_id)
+            if not ids:
+                del self._sessions[message.session_id]
+
+    def _spawn(self, slot: _Slot):
+        if slot.conn is not None:
+            slot.conn.close()
+        if slot.process is not None and slot.process.is_alive():
+            slot.process.terminate()
+        parent_conn, child_conn = self._ctx.Pipe()
+        slot.process = self._ctx.Process(
+            target=_role_main, args=(slot.role, child_conn, self.handler_factory, self.concurrency.get(slot.role, 1)),
+            name=f"bus-{slot.role}-{slot.index}", daemon=True
+        )
+        slot.process.start()
+        child_conn.close()
+        slot.conn = parent_conn
+
+    # ==================== LIFECYCLE ====================
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "queues": self.queues.stats(),
+                "processes": {
+                    role: {"size": len(slots), "busy": sum(1 for s in slots if s.current),
+                           "in_flight": sum(len(s.current) for s in slots)}
+                    for role, slots in self._slots.items()
+                },
+                "outstanding": len(self._futures),
+                "sessions": len(self._sessions),
+                "completed": self.completed,
+                "errors": self.errors,
+                "crashes": self.crashes,
+                "retries": self.retries,
+                "rejected": self.rejected
+            }
+
+    def close(self, timeout: float = 5.0):
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+            slots = [slot for slots in self._slots.values() for slot in slots]
+            for future in self._futures.values():
+                if not future.cancel() and not future.done():
+                    future.set_exception(RuntimeError("MessageBus closed"))
+        self._collector.join(timeout)
+        for slot in slots:
+            try:
+                slot.conn.send_bytes(pickle.dumps(None))
+            except (OSError, ValueError):
+                pass
+        deadline = time.monotonic() + timeout
+        for slot in slots:
+            slot.process.join(max(0.0, deadline - time.monotonic()))
+            if slot.process.is_alive():
+                slot.process.terminate()
+            slot.conn.close()
@@ -0,0 +1,274 @@
+"""
+In-process metrics: counters and per-stage latency histograms.
+
+Stages (planner, worker, overpass, open_meteo, evaluator, create_map,
+data_store_load/save, ...) are timed into one histogram family labelled by
+stage, resource (resource type, OSM amenity or registry) and outcome. Recording a sample is a bisect plus a few
+additions under a lock. ``render_prometheus()`` produces the Prometheus text
+format, served by ``start_metrics_server()`` on its own port next to the Gradio
+app. ``wallboard()`` summarizes p50/p95/p99 per stage. Other modules can add
+plain-text operator endpoints to that port with ``register_endpoint()``.
+
+The port listens on 127.0.0.1 unless DRC_METRICS_HOST says otherwise (e.g.
+0.0.0.0 for a Prometheus in another container). Endpoints registered with
+``local_only`` answer loopback clients only, whatever the bind address.
+
+    with timed("overpass", resource="hospital") as t:
+        ...
+        t.outcome = "http_error"
+"""
+import bisect
+import ipaddress
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+logger = logging.getLogger(__name__)
+
+METRICS_PORT = int(os.environ.get("DRC_METRICS_PORT", "9464"))
+METRICS_HOST = os.environ.get("DRC_METRICS_HOST", "127.0.0.1")
+
+# Seconds; spans a cached lookup (sub-millisecond) to a slow Overpass call
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+STAGE_LABELS = ("stage", "resource", "outcome")
+EVENT_LABELS = ("event", "outcome")
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, label_names: tuple, buckets: tuple = BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {labels: ([*s[0]], s[1], s[2]) for labels, s in self._series.items()}
+
+    def quantile(self, q: float, counts: list, total: int) -> float:
+        """Estimate a quantile from bucket counts by linear interpolation."""
+        if not total:
+            return 0.0
+        rank = q * total
+        seen = 0
+        for i, count in enumerate(counts):
+            if seen + count >= rank and count:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, label_names: tuple):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self._values)
+
+
+STAGE_DURATION = Histogram("drc_stage_duration_seconds", "Latency of each pipeline stage", STAGE_LABELS)
+EVENTS = Counter("drc_events_total", "Counted events such as cache hits and rejections", EVENT_LABELS)
+
+
+def observe(stage: str, seconds: float, resource: str = "", outcome: str = "ok"):
+    STAGE_DURATION.observe(seconds, stage, resource or "", outcome)
+
+
+def count(event: str, outcome: str = "", amount: float = 1):
+    EVENTS.inc(event, outcome, amount=amount)
+
+
+class _Timer:
+    __slots__ = ("outcome",)
+
+    def __init__(self):
+        self.outcome = "ok"
+
+
+@contextmanager
+def timed(stage: str, resource: str = ""):
+    """Time a block; the outcome is "error" if it raises, else whatever the block set."""
+    timer = _Timer()
+    start = time.perf_counter()
+    try:
+        yield timer
+    except BaseException:
+        timer.outcome = "error"
+        raise
+    finally:
+        observe(stage, time.perf_counter() - start, resource, timer.outcome)
+
+
+# ==================== EXPOSITION ====================
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def render_prometheus() -> str:
+    lines = []
+    h = STAGE_DURATION
+    lines.append(f"# HELP {h.name} {h.help_text}")
+    lines.append(f"# TYPE {h.name} histogram")
+    for labels, (counts, total_sum, total) in sorted(h.snapshot().items()):
+        cumulative = 0
+        for bound, bucket_count in zip(h.buckets, counts):
+            cumulative += bucket_count
+            le = 'le="%s"' % bound
+            lines.append(f"{h.name}_bucket{_labels(h.label_names, labels, le)} {cumulative}")
+        le = 'le="+Inf"'
+        lines.append(f"{h.name}_bucket{_labels(h.label_names, labels, le)} {total}")
+        lines.append(f"{h.name}_sum{_labels(h.label_names, labels)} {total_sum}")
+        lines.append(f"{h.name}_count{_labels(h.label_names, labels)} {total}")
+    c = EVENTS
+    lines.append(f"# HELP {c.name} {c.help_text}")
+    lines.append(f"# TYPE {c.name} counter")
+    for labels, value in sorted(c.snapshot().items()):
+        lines.append(f"{c.name}{_labels(c.label_names, labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def wallboard() -> list:
+    """Per stage/resource/outcome: count and p50/p95/p99 latency in ms."""
+    rows = []
+    for (stage, resource, outcome), (counts, total_sum, total) in sorted(STAGE_DURATION.snapshot().items()):
+        rows.append({
+            "stage": stage,
+            "resource": resource,
+            "outcome": outcome,
+            "count": total,
+            "mean_ms": total_sum / total * 1000 if total else 0.0,
+            "p50_ms": STAGE_DURATION.quantile(0.50, counts, total) * 1000,
+            "p95_ms": STAGE_DURATION.quantile(0.95, counts, total) * 1000,
+            "p99_ms": STAGE_DURATION.quantile(0.99, counts, total) * 1000
+        })
+    return rows
+
+
+def wallboard_markdown() -> str:
+    rows = wallboard()
+    if not rows:
+        return "*No requests measured yet.*"
+    lines = [
+        "| Stage | Resource | Outcome | Count | p50 (ms) | p95 (ms) | p99 (ms) |",
+        "|-------|----------|---------|------:|---------:|---------:|---------:|"
+    ]
+    for r in rows:
+        lines.append(f"| {r['stage']} | {r['resource'] or '-'} | {r['outcome']} | {r['count']} | "
+                     f"{r['p50_ms']:.1f} | {r['p95_ms']:.1f} | {r['p99_ms']:.1f} |")
+    events = EVENTS.snapshot()
+    if events:
+        lines.append("\n| Event | Outcome | Count |")
+        lines.append("|-------|---------|------:|")
+        for (event, outcome), value in sorted(events.items()):
+            lines.append(f"| {event} | {outcome or '-'} | {value:g} |")
+    return "\n".join(lines)
+
+
+# Extra plain-text endpoints on the metrics port: path -> fn(query params) -> str
+_endpoints = {}
+
+
+def register_endpoint(path: str, handler, method: str = "GET", local_only: bool = False):
+    """Serve handler(params) -> text at path; POST params come from the query string and a form body."""
+    _endpoints[(method, path)] = (handler, local_only)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if urlsplit(self.path).path == "/metrics":
+            self._reply(200, render_prometheus(), "text/plain; version=0.0.4; charset=utf-8")
+            return
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def _dispatch(self, method: str):
+        url = urlsplit(self.path)
+        params = dict(parse_qsl(url.query))
+        if method == "POST":
+            length = int(self.headers.get("Content-Length") or 0)
+            params.update(parse_qsl(self.rfile.read(length).decode("utf-8", "replace")))
+        entry = _endpoints.get((method, url.path))
+        if entry is None:
+            if any(path == url.path for _, path in _endpoints):
+                self.send_error(405)
+            else:
+                self.send_error(404)
+            return
+        handler, local_only = entry
+        if local_only and not ipaddress.ip_address(self.client_address[0]).is_loopback:
+            self.send_error(403)
+            return
+        try:
+            body = handler(params)
+        except (RuntimeError, ValueError) as e:
+            self._reply(400, f"{e}\n")
+            return
+        self._reply(200, body)
+
+    def _reply(self, status: int, text: str, content_type: str = "text/plain; charset=utf-8"):
+        body = text.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+
+
+def start_metrics_server(port: int = None, host: str = None):
+    """Serve /metrics on its own port in a daemon thread (0 disables it)."""
+    global _server
+    port = METRICS_PORT if port is None else port
+    host = METRICS_HOST if host is None else host
+    if _server is not None or port <= 0:
+        return _server
+    try:
+        _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    except OSError as e:
+        logger.warning("Metrics endpoint not started on port %s: %s", port, e)
+        return None
+    threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+    logger.info("Prometheus metrics on http://%s:%s/metrics", host, port)
+    return _server
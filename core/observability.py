@@ -2,29 +2,21 @@ import logging
 import time
 from datetime import datetime
 import os
+from core.logging_config import configure_logging
+from core.metrics import observe
 
 class Observability:
     def __init__(self):
         self.setup_logging()
         
     def setup_logging(self):
-        handlers = [logging.StreamHandler()]
-        
-        # Only add file handler if we have write permissions (not on Hugging Face)
-        try:
-            if os.access('.', os.W_OK):
-                handlers.append(logging.FileHandler('agent_system.log'))
-        except:
-            pass
-        
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            handlers=handlers
-        )
+        # Idempotent: every MainAgent shares one queue handler and background writer
+        configure_logging()
     
     def log_agent_activity(self, agent_name: str, action: str, session_id: str, details: dict = None):
         logger = logging.getLogger(agent_name)
+        if not logger.isEnabledFor(logging.INFO):
+            return
         log_data = {
             "agent": agent_name,
             "action": action,
@@ -32,9 +24,12 @@ class Observability:
             "timestamp": datetime.now().isoformat(),
             "details": details or {}
         }
-        logger.info(f"Agent Activity: {log_data}")
+        logger.info("Agent Activity: %s %s", agent_name, action, extra=log_data)
     
-    def log_performance_metrics(self, operation: str, start_time: float, end_time: float, success: bool = True):
+    def log_performance_metrics(self, operation: str, start_time: float, end_time: float, success: bool = True,
+                                outcome: str = None):
         duration = end_time - start_time
+        observe(operation, duration, outcome=outcome or ("ok" if success else "error"))
         logger = logging.getLogger("performance")
-        logger.info(f"Performance - Operation: {operation}, Duration: {duration:.2f}s, Success: {success}")
+        logger.info("Performance - Operation: %s, Duration: %.2fs, Success: %s", operation, duration, success,
+                    extra={"operation": operation, "duration_s": round(duration, 4), "success": success})
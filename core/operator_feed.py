@@ -0,0 +1,277 @@
+"""
+Change feed of open SOS alerts and critical resource requests for operators.
+
+Every change to an open item (created, edited, resolved or fulfilled) gets the
+next sequence number. An operator view keeps the last sequence number it has
+seen and asks for ``changes(since)``. It gets back only the items that were
+added or changed since then, plus the keys of those that closed. With
+thousands of open alerts and many operators polling, an idle poll costs a
+bisect and returns almost nothing.
+
+The change log keeps the last LOG_SIZE changes. A client further behind, or
+one holding a sequence number from another process or an earlier start (see
+``epoch``), gets a full snapshot instead. As in core/geo_aggregation, this
+process's writes arrive through data_store.subscribe, and other processes'
+writes arrive through a throttled diff against the registries.
+"""
+import bisect
+import os
+import threading
+import time
+
+import data_store
+from core.geo_aggregation import source_version
+from core.metrics import count, timed
+
+LOG_SIZE = 20000
+RECONCILE_SECONDS = 2.0
+
+# Triage order: lower first. Within a rank, the longest-waiting item comes first
+SOS_PRIORITY = {"Trapped": 0, "Medical Emergency": 0, "Fire": 0, "Flood": 1, "Other": 2}
+REQUEST_PRIORITY = 3
+
+# The operator routes and the "🚨 Operator" tab exist only when this is set
+OPERATOR_KEY = os.environ.get("DRC_OPERATOR_KEY", "")
+
+
+def _item(collection: str, record: dict):
+    """Operator view of a record, or None if it is not open."""
+    if collection == "sos_alerts" and record.get("status") == "active":
+        return {
+            "key": f"sos:{record.get('id')}", "kind": "sos", "id": record.get("id"),
+            "priority": SOS_PRIORITY.get(record.get("emergency_type"), 2),
+            "type": record.get("emergency_type") or "SOS", "name": record.get("name") or "",
+            "phone": record.get("phone") or "", "text": record.get("message") or "",
+            "lat": record.get("lat"), "lon": record.get("lon"), "created_at": record.get("created_at") or ""
+        }
+    if (collection == "resource_requests" and record.get("status") == "pending"
+            and record.get("urgency") == "critical"):
+        return {
+            "key": f"request:{record.get('id')}", "kind": "request", "id": record.get("id"),
+            "priority": REQUEST_PRIORITY,
+            "type": record.get("resource_type") or "Request", "name": record.get("requester_name") or "",
+            "phone": record.get("phone") or "", "text": record.get("description") or "",
+            "lat": record.get("lat"), "lon": record.get("lon"), "created_at": record.get("created_at") or ""
+        }
+    return None
+
+
+def triage_key(item: dict) -> tuple:
+    return item["priority"], item["created_at"]
+
+
+class OperatorFeed:
+    def __init__(self, log_size: int = LOG_SIZE):
+        self.epoch = os.urandom(4).hex()
+        self.seq = 0
+        self.log_size = log_size
+        self._items = {}      # key -> item
+        self._log_seqs = []   # sequence numbers, ascending
+        self._log_keys = []   # key changed at the same position
+        self._floor = 0       # changes at or below this sequence number were trimmed
+        self._lock = threading.Lock()
+        self._version = None
+        self._reconciled_at = 0.0
+
+    # ==================== UPDATES ====================
+    def on_record(self, collection: str, record: dict):
+        if collection not in ("sos_alerts", "resource_requests"):
+            return
+        key = f"{'sos' if collection == 'sos_alerts' else 'request'}:{record.get('id')}"
+        with self._lock:
+            self._set(key, _item(collection, record))
+
+    def _set(self, key: str, item):
+        if self._items.get(key) == item:
+            return
+        if item is None:
+            if key not in self._items:
+                return
+            del self._items[key]
+        else:
+            self._items[key] = item
+        self.seq += 1
+        self._log_seqs.append(self.seq)
+        self._log_keys.append(key)
+        if len(self._log_seqs) > 2 * self.log_size:
+            cut = len(self._log_seqs) - self.log_size
+            self._floor = self._log_seqs[cut - 1]
+            del self._log_seqs[:cut]
+            del self._log_keys[:cut]
+
+    def reconcile(self, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self._reconciled_at < RECONCILE_SECONDS:
+            return
+        self._reconciled_at = now
+        version = source_version()
+        if not force and version == self._version:
+            return
+        with timed("operator_reconcile"):
+            seen = {}
+            for collection, filepath in (("sos_alerts", data_store.SOS_ALERTS_FILE),
+                                         ("resource_requests", data_store.RESOURCE_REQUESTS_FILE)):
+                for record in data_store._load_json(filepath):
+                    item = _item(collection, record)
+                    if item is not None:
+                        seen[item["key"]] = item
+            with self._lock:
+                for key in [k for k in self._items if k not in seen]:
+                    self._set(key, None)
+                for key, item in seen.items():
+                    self._set(key, item)
+                self._version = version
+
+    # ==================== READS ====================
+    def changes(self, since: int = 0, epoch: str = None) -> dict:
+        """Items changed and keys closed after ``since``; a full snapshot if the client is too far behind."""
+        self.reconcile()
+        with self._lock:
+            if epoch != self.epoch or since < self._floor or since > self.seq:
+                count("operator_feed", "snapshot")
+                return {"epoch": self.epoch, "seq": self.seq, "reset": True,
+                        "upsert": sorted(self._items.values(), key=triage_key), "remove": []}
+            start = bisect.bisect_right(self._log_seqs, since)
+            upsert, remove = [], []
+            for key in dict.fromkeys(self._log_keys[start:]):
+                item = self._items.get(key)
+                if item is None:
+                    remove.append(key)
+                else:
+                    upsert.append(item)
+            count("operator_feed", "diff" if upsert or remove else "idle")
+            return {"epoch": self.epoch, "seq": self.seq, "reset": False, "upsert": upsert, "remove": remove}
+
+    def open_items(self) -> list:
+        self.reconcile()
+        with self._lock:
+            return sorted(self._items.values(), key=triage_key)
+
+
+def close_item(key: str, operator: str = "") -> bool:
+    """Resolve an SOS alert or fulfil a request by its feed key."""
+    kind, _, record_id = key.partition(":")
+    if kind == "sos":
+        return data_store.resolve_sos_alert(record_id)
+    if kind == "request":
+        return data_store.fulfill_resource_request(record_id, operator or "operator")
+    return False
+
+
+_feed = None
+_feed_lock = threading.Lock()
+
+
+def get_feed() -> OperatorFeed:
+    global _feed
+    if _feed is None:
+        with _feed_lock:
+            if _feed is None:
+                feed = OperatorFeed()
+                data_store.subscribe(feed.on_record)
+                feed.reconcile(force=True)
+                _feed = feed
+    return _feed
+
+
+# ==================== BOARD ====================
+# Operator tab in app.py: a table polling api.py's /api/operator routes.
+# `element` and `props` come from gr.HTML; props.feed_url is the route prefix.
+BOARD_REFRESH_SECONDS = 5
+BOARD_MAX_ROWS = 500
+
+BOARD_TEMPLATE = """<div class="drc-ops">
+<div class="drc-ops-bar"><span class="drc-ops-summary">Loading…</span>
+<input class="drc-ops-operator" placeholder="Operator name">
+<input class="drc-ops-key" type="password" placeholder="Operator key"></div>
+<div class="drc-ops-scroll"><table><thead><tr><th></th><th>Type</th><th>Name</th><th>Phone</th><th>Details</th>
+<th>Waiting</th><th></th></tr></thead><tbody></tbody></table></div></div>"""
+
+BOARD_CSS = """
+.drc-ops-bar { display: flex; gap: 8px; align-items: center; margin-bottom: 8px; }
+.drc-ops-summary { flex: 1; font-weight: bold; }
+.drc-ops-scroll { max-height: 450px; overflow-y: auto; }
+.drc-ops table { width: 100%; border-collapse: collapse; font-size: 13px; }
+.drc-ops td, .drc-ops th { padding: 4px 6px; border-bottom: 1px solid #eee; text-align: left; }
+.drc-ops tr.p0 td:first-child { border-left: 4px solid #e60000; }
+.drc-ops tr.p1 td:first-child { border-left: 4px solid #ff8c00; }
+.drc-ops tr.p2 td:first-child, .drc-ops tr.p3 td:first-child { border-left: 4px solid #999; }
+.drc-ops tbody tr { cursor: pointer; }
+"""
+
+BOARD_JS = """
+const items = new Map();
+let epoch = null, seq = 0, busy = false;
+const body = element.querySelector('tbody'), summary = element.querySelector('.drc-ops-summary');
+const operator = element.querySelector('.drc-ops-operator'), key = element.querySelector('.drc-ops-key');
+
+function headers() { return key.value ? {'X-Operator-Key': key.value} : {}; }
+
+function waited(created) {
+  const minutes = Math.max(0, Math.round((Date.now() - Date.parse(created)) / 60000));
+  return minutes < 60 ? `${minutes} min` : `${Math.floor(minutes / 60)} h ${minutes %% 60} min`;
+}
+
+function cell(row, text) { const td = row.insertCell(); td.textContent = text; return td; }
+
+function render() {
+  const rows = [...items.values()].sort((a, b) => a.priority - b.priority || a.created_at.localeCompare(b.created_at));
+  const sos = rows.filter(it => it.kind === 'sos').length;
+  summary.textContent = `🆘 ${sos} active SOS · 📦 ${rows.length - sos} critical requests`;
+  body.replaceChildren();
+  for (const it of rows.slice(0, %(max_rows)d)) {
+    const row = body.insertRow();
+    row.className = `p${it.priority}`;
+    cell(row, it.kind === 'sos' ? '🆘' : '📦');
+    cell(row, it.type); cell(row, it.name);
+    const phone = row.insertCell(), link = document.createElement('a');
+    link.href = `tel:${it.phone}`; link.textContent = it.phone; phone.appendChild(link);
+    cell(row, it.text); cell(row, waited(it.created_at));
+    const button = document.createElement('button');
+    button.textContent = it.kind === 'sos' ? '✅ Resolve' : '✅ Fulfil';
+    button.onclick = (e) => { e.stopPropagation(); close(it, button); };
+    row.insertCell().appendChild(button);
+    if (it.lat && it.lon) {
+      row.onclick = () => window.dispatchEvent(new CustomEvent('drc-operator-focus', {detail: [it.lat, it.lon]}));
+    }
+  }
+}
+
+async function close(it, button) {
+  button.disabled = true;
+  try {
+    const url = `${props.feed_url}/close/${encodeURIComponent(it.key)}?operator=${encodeURIComponent(operator.value)}`;
+    const response = await fetch(url, {method: 'POST', headers: headers()});
+    const result = response.ok ? await response.json() : {ok: false};
+    if (result.ok) { items.delete(it.key); render(); return; }
+  } catch (e) { /* leave the row; the next poll shows the real state */ }
+  button.disabled = false;
+}
+
+async function poll() {
+  // Only while the tab is shown, and one request at a time
+  if (busy || document.hidden || !element.offsetParent) return;
+  busy = true;
+  try {
+    const response = await fetch(`${props.feed_url}/changes?since=${seq}&epoch=${epoch || ''}`, {headers: headers()});
+    if (!response.ok) { summary.textContent = response.status === 403 ? '🔒 Enter the operator key' : '⚠️ Feed unavailable'; return; }
+    const diff = await response.json();
+    if (diff.reset) items.clear();
+    for (const it of diff.upsert) items.set(it.key, it);
+    for (const k of diff.remove) items.delete(k);
+    epoch = diff.epoch; seq = diff.seq;
+    if (diff.reset || diff.upsert.length || diff.remove.length) render();
+  } catch (e) {
+    summary.textContent = '⚠️ Feed unavailable';
+  } finally {
+    busy = false;
+  }
+}
+
+key.addEventListener('change', () => {
+  epoch = null; poll();
+  window.dispatchEvent(new CustomEvent('drc-operator-key', {detail: key.value}));
+});
+setInterval(poll, %(refresh_ms)d);
+new IntersectionObserver(poll).observe(element);
+""" % {"max_rows": BOARD_MAX_ROWS, "refresh_ms": BOARD_REFRESH_SECONDS * 1000}
@@ -0,0 +1,330 @@
+"""
+On-demand profiling for the live app.
+
+Everything is off by default. While off, a decorated handler pays one
+attribute check per call, or per step for streaming handlers. An operator turns
+profiling on at runtime through the metrics port (see ``register_endpoints``):
+
+- sampling: a background thread snapshots every thread's stack every few
+  milliseconds for a time window. Stacks are rooted at the handler running on
+  that thread, or at the thread name.
+- slow requests: each decorated request runs under cProfile, one at a time.
+  Captures slower than the threshold are kept. DRC_PROFILE_SLOW_MS arms this at
+  startup.
+- allocations: tracemalloc is started, and each snapshot is diffed against the
+  previous one.
+
+Profiles are written to DRC_PROFILE_DIR (data/profiles) as collapsed stacks
+(``*.folded``, one ``frame;frame;frame count`` line per stack). flamegraph.pl,
+speedscope and inferno read them directly. Slow-request captures also keep the
+raw ``*.prof`` for pstats or snakeviz.
+"""
+import cProfile
+import functools
+import inspect
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter as Tally
+
+from core.metrics import count, register_endpoint
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = os.environ.get(
+    "DRC_PROFILE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "profiles")
+)
+SLOW_REQUEST_MS = float(os.environ.get("DRC_PROFILE_SLOW_MS", "0"))
+MAX_SAMPLE_SECONDS = 300
+MAX_STACK_DEPTH = 64
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _folded_stack(frame, root: str) -> str:
+    names = []
+    while frame is not None and len(names) < MAX_STACK_DEPTH:
+        names.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    names.append(root)
+    return ";".join(reversed(names))
+
+
+def _pstats_folded(stats: pstats.Stats) -> Tally:
+    """Rebuild approximate call paths from cProfile's caller graph, weighted in microseconds."""
+    callees = {}
+    for func, (_, _, _, _, callers) in stats.stats.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+    # Roots are functions entered from outside the capture (e.g. the handler resumed by next())
+    roots = {}
+    for func, (_, _, _, ct, callers) in stats.stats.items():
+        outside = ct - sum(edge[3] for caller, edge in callers.items() if caller != func)
+        if not callers or outside > 1e-4:
+            roots[func] = ct if not callers else outside
+    folded = Tally()
+
+    def walk(func, path, cumulative):
+        cc, nc, tt, ct, _ = stats.stats[func]
+        share = cumulative / ct if ct else 0.0
+        label = f"{func[2]} ({os.path.basename(func[0])}:{func[1]})"
+        path = path + [label]
+        folded[";".join(path)] += int(tt * share * 1e6)
+        if len(path) >= MAX_STACK_DEPTH:
+            return
+        for callee, edge_ct in callees.get(func, []):
+            if callee not in visiting:
+                visiting.add(callee)
+                walk(callee, path, edge_ct * share if ct else 0.0)
+                visiting.discard(callee)
+
+    for root, cumulative in roots.items():
+        visiting = {root}
+        walk(root, [], cumulative)
+    return Tally({stack: weight for stack, weight in folded.items() if weight > 0})
+
+
+class Profiler:
+    def __init__(self, output_dir: str = PROFILE_DIR, slow_ms: float = SLOW_REQUEST_MS):
+        self.output_dir = output_dir
+        self.slow_ms = slow_ms
+        self.sampling = False
+        self._handlers = {}  # thread ident -> handler currently running on it
+        self._capture_lock = threading.Lock()
+        self._sample_lock = threading.Lock()
+        self._last_snapshot = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.sampling or self.slow_ms > 0
+
+    def _write(self, kind: str, name: str, lines) -> str:
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, f"{kind}-{name}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.folded")
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, weight in lines:
+                f.write(f"{stack} {weight}\n")
+        return path
+
+    # ==================== HANDLER HOOK ====================
+    def profiled(self, name: str):
+        """Decorate a request handler (plain or generator) so it can be profiled."""
+        def decorator(fn):
+            if inspect.isgeneratorfunction(fn):
+                @functools.wraps(fn)
+                def stream(*args, **kwargs):
+                    if not self.enabled:
+                        yield from fn(*args, **kwargs)
+                        return
+                    capture = self._start_capture()
+                    start = time.perf_counter()
+                    steps = fn(*args, **kwargs)
+                    try:
+                        while True:
+                            with self._step(name, capture):
+                                try:
+                                    value = next(steps)
+                                except StopIteration:
+                                    return
+                            yield value
+                    finally:
+                        steps.close()
+                        self._finish_capture(name, capture, time.perf_counter() - start)
+                return stream
+
+            @functools.wraps(fn)
+            def call(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                capture = self._start_capture()
+                start = time.perf_counter()
+                try:
+                    with self._step(name, capture):
+                        return fn(*args, **kwargs)
+                finally:
+                    self._finish_capture(name, capture, time.perf_counter() - start)
+            return call
+        return decorator
+
+    def _start_capture(self):
+        # cProfile hooks the calling thread only, and one request at a time keeps overhead bounded
+        if self.slow_ms <= 0 or not self._capture_lock.acquire(blocking=False):
+            return None
+        return cProfile.Profile()
+
+    def _finish_capture(self, name: str, capture, seconds: float):
+        if capture is None:
+            return
+        try:
+            if seconds * 1000 < self.slow_ms:
+                return
+            count("profile_capture", name)
+            stats = pstats.Stats(capture)
+            path = self._write("slow", name, sorted(_pstats_folded(stats).items()))
+            stats.dump_stats(path[:-len(".folded")] + ".prof")
+            logger.warning("Slow %s took %.0f ms; profile written to %s", name, seconds * 1000, path)
+        except Exception as e:
+            logger.error("Could not write profile for %s: %s", name, e)
+        finally:
+            self._capture_lock.release()
+
+    def _step(self, name: str, capture):
+        # Streaming handlers resume on whichever thread Gradio picks, so register per step
+        return _Scope(self, name, capture)
+
+    # ==================== SAMPLING ====================
+    def sample(self, seconds: float, interval: float = 0.005) -> str:
+        """Sample all thread stacks for a window and write them as collapsed stacks."""
+        seconds = max(0.1, min(seconds, MAX_SAMPLE_SECONDS))
+        if not self._sample_lock.acquire(blocking=False):
+            raise RuntimeError("a sampling window is already running")
+        try:
+            self.sampling = True
+            own = threading.get_ident()
+            names = {}
+            stacks = Tally()
+            deadline = time.monotonic() + seconds
+            while time.monotonic() < deadline:
+                frames = sys._current_frames()
+                if len(names) != len(frames):
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                for ident, frame in frames.items():
+                    if ident != own:
+                        root = self._handlers.get(ident) or names.get(ident, "thread")
+                        stacks[_folded_stack(frame, root)] += 1
+                del frames, frame
+                time.sleep(interval)
+            count("profile_sample", "window")
+            return self._write("sample", f"{int(seconds)}s", stacks.most_common())
+        finally:
+            self.sampling = False
+            self._sample_lock.release()
+
+    # ==================== ALLOCATIONS ====================
+    def start_allocations(self, frames: int = 25):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        self._last_snapshot = tracemalloc.take_snapshot()
+
+    def stop_allocations(self):
+        self._last_snapshot = None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def allocation_snapshot(self, top: int = 25) -> tuple:
+        """Diff a snapshot against the previous one; returns (summary text, folded path)."""
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("allocation tracking is not running")
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>")
+        ))
+        previous, self._last_snapshot = self._last_snapshot, snapshot
+        lines = []
+        if previous is not None:
+            for stat in snapshot.compare_to(previous, "lineno")[:top]:
+                frame = stat.traceback[0]
+                lines.append(f"{stat.size_diff / 1024:+10.1f} KiB {stat.count_diff:+8d} blocks  "
+                             f"{frame.filename}:{frame.lineno}")
+        current, peak = tracemalloc.get_traced_memory()
+        lines.append(f"traced {current / 1048576:.1f} MiB, peak {peak / 1048576:.1f} MiB")
+        stacks = Tally()
+        for stat in snapshot.statistics("traceback"):
+            frames = [f"{os.path.basename(f.filename)}:{f.lineno}" for f in stat.traceback]
+            stacks[";".join(frames) or "?"] += stat.size
+        path = self._write("alloc", "heap", stacks.most_common())
+        return "\n".join(lines), path
+
+
+class _Scope:
+    __slots__ = ("profiler", "name", "capture", "previous")
+
+    def __init__(self, profiler: Profiler, name: str, capture):
+        self.profiler = profiler
+        self.name = name
+        self.capture = capture
+        self.previous = None
+
+    def __enter__(self):
+        handlers = self.profiler._handlers
+        ident = threading.get_ident()
+        self.previous = handlers.get(ident)
+        handlers[ident] = self.name
+        if self.capture is not None:
+            self.capture.enable()
+        return self
+
+    def __exit__(self, *exc):
+        if self.capture is not None:
+            self.capture.disable()
+        ident = threading.get_ident()
+        if self.previous is None:
+            self.profiler._handlers.pop(ident, None)
+        else:
+            self.profiler._handlers[ident] = self.previous
+        return False
+
+
+_profiler = Profiler()
+
+
+def get_profiler() -> Profiler:
+    return _profiler
+
+
+def profiled(name: str):
+    return _profiler.profiled(name)
+
+
+# ==================== OPERATOR ENDPOINTS ====================
+def _sample_endpoint(params: dict) -> str:
+    seconds = float(params.get("seconds", 30))
+    interval = float(params.get("interval_ms", 5)) / 1000
+    return f"wrote {_profiler.sample(seconds, interval)}\n"
+
+
+def _slow_state(params: dict) -> str:
+    state = f"over {_profiler.slow_ms:.0f} ms" if _profiler.slow_ms > 0 else "off"
+    return f"slow request capture: {state}\n"
+
+
+def _slow_endpoint(params: dict) -> str:
+    if "threshold_ms" not in params:
+        raise ValueError("threshold_ms required")
+    _profiler.slow_ms = float(params["threshold_ms"])
+    return _slow_state(params)
+
+
+def _allocations_endpoint(params: dict) -> str:
+    action = params.get("action")
+    if action == "start":
+        _profiler.start_allocations(int(params.get("frames", 25)))
+        return "allocation tracking started\n"
+    if action == "stop":
+        _profiler.stop_allocations()
+        return "allocation tracking stopped\n"
+    raise ValueError("action must be start or stop")
+
+
+def _snapshot_endpoint(params: dict) -> str:
+    summary, path = _profiler.allocation_snapshot(int(params.get("top", 25)))
+    return f"{summary}\nwrote {path}\n"
+
+
+def register_endpoints():
+    """Expose the profiler on the metrics port under /debug/, to loopback clients only.
+
+    Whatever starts, stops or reconfigures profiling is a POST.
+    """
+    register_endpoint("/debug/profile", _sample_endpoint, "POST", local_only=True)
+    register_endpoint("/debug/slow-requests", _slow_state, local_only=True)
+    register_endpoint("/debug/slow-requests", _slow_endpoint, "POST", local_only=True)
+    register_endpoint("/debug/allocations", _snapshot_endpoint, local_only=True)
+    register_endpoint("/debug/allocations", _allocations_endpoint, "POST", local_only=True)
@@ -0,0 +1,206 @@
+"""
+Token-bucket rate limits for the handlers that write to data_store.
+
+Each endpoint has its own budget per phone number and per client IP (BUDGETS).
+A bucket holds up to ``burst`` submissions and refills at ``per_minute``. A
+submission needs a token in every bucket that applies to it, and it takes one
+only when all of them have one, so a rejection by one key doesn't drain the
+other. A rejected handler returns its reply at once with the seconds to wait.
+It never reaches the lane scheduler or the data_store write path. A submission
+the handler would refuse anyway (``validate``) is answered before any bucket
+is charged, so a form sent without its location doesn't use up a number's
+first SOS. When the lane scheduler turns the handler away as busy, the tokens
+and the first-SOS exemption are given back: nothing was stored.
+
+The first SOS from a phone number always goes through, even with the IP
+bucket empty. Many people may share one IP (a shelter's Wi-Fi, mobile
+carrier NAT), and one of them flooding must not stop a neighbour's first
+alert.
+
+State is in memory, per process. At most MAX_KEYS buckets (and as many
+remembered SOS numbers) are kept, least recently used evicted first. An
+evicted bucket comes back full. Rejections are counted in
+``drc_events_total`` as ``rate_limited`` with ``endpoint/key``, exemptions as
+``rate_limit_exempt``.
+"""
+import functools
+import inspect
+import ipaddress
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from core.metrics import count
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.environ.get("DRC_RATE_LIMIT", "1") != "0"
+MAX_KEYS = int(os.environ.get("DRC_RATE_LIMIT_KEYS", "100000"))
+# Only behind a proxy that sets X-Forwarded-For; otherwise clients could pick their own key
+TRUST_FORWARDED = os.environ.get("DRC_TRUST_FORWARDED", "0") == "1"
+
+
+@dataclass(frozen=True)
+class Budget:
+    burst: float       # submissions allowed back to back
+    per_minute: float  # refill rate
+
+
+BUDGETS = {
+    "send_sos": {"phone": Budget(3, 1), "ip": Budget(20, 10)},
+    "report_safe_status": {"phone": Budget(3, 1), "ip": Budget(20, 10)},
+    "create_request": {"phone": Budget(5, 1), "ip": Budget(20, 6)},
+    "report_missing": {"phone": Budget(5, 1), "ip": Budget(20, 6)},
+    "register_donation": {"phone": Budget(5, 1), "ip": Budget(20, 6)},
+}
+
+
+def normalize_phone(phone) -> str:
+    """Digits only, national part (last 10 digits), so "+91 98..." and "098..." share a bucket."""
+    digits = re.sub(r"\D", "", str(phone or ""))
+    return digits[-10:]
+
+
+def client_ip(request) -> str:
+    """Client address of a gr.Request, or "" when it can't tell clients apart."""
+    if request is None:
+        return ""
+    if TRUST_FORWARDED:
+        forwarded = request.headers.get("x-forwarded-for", "")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    host = request.client.host if request.client else ""
+    try:
+        # Behind launcher.py's TCP proxy every client arrives from loopback
+        return "" if ipaddress.ip_address(host).is_loopback else host
+    except ValueError:
+        return ""
+
+
+class RateLimiter:
+    def __init__(self, budgets: dict = None, max_keys: int = MAX_KEYS):
+        self.budgets = budgets or BUDGETS
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()   # (endpoint, kind, value) -> [tokens, last refill]
+        self._sos_phones = OrderedDict()  # numbers that already sent an SOS
+        self._lock = threading.Lock()
+
+    def _bucket(self, key: tuple, budget: Budget, now: float) -> list:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [budget.burst, now]
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            bucket[0] = min(budget.burst, bucket[0] + (now - bucket[1]) * budget.per_minute / 60)
+            bucket[1] = now
+            self._buckets.move_to_end(key)
+        return bucket
+
+    def check(self, endpoint: str, phone: str = "", ip: str = "") -> float:
+        """0 if the submission may go ahead (and takes its tokens), else seconds until it may."""
+        return self.take(endpoint, phone, ip)[0]
+
+    def take(self, endpoint: str, phone: str = "", ip: str = "") -> tuple:
+        """Like check, but also returns a receipt for ``refund`` (None when nothing was taken)."""
+        budgets = self.budgets.get(endpoint)
+        if not budgets:
+            return 0.0, None
+        now = time.monotonic()
+        keys = [(kind, value) for kind, value in (("phone", phone), ("ip", ip)) if value and kind in budgets]
+        with self._lock:
+            buckets = [(kind, budgets[kind], self._bucket((endpoint, kind, value), budgets[kind], now))
+                       for kind, value in keys]
+            short = [(kind, (1 - bucket[0]) * 60 / budget.per_minute)
+                     for kind, budget, bucket in buckets if bucket[0] < 1]
+            if short:
+                if endpoint == "send_sos" and phone and phone not in self._sos_phones:
+                    count("rate_limit_exempt", endpoint)
+                else:
+                    kind, wait = max(short, key=lambda s: s[1])
+                    count("rate_limited", f"{endpoint}/{kind}")
+                    return wait, None
+            charged = [(endpoint, kind, value) for (kind, value), (_, _, bucket) in zip(keys, buckets) if bucket[0] >= 1]
+            for _, _, bucket in buckets:
+                bucket[0] = max(bucket[0] - 1, 0.0)
+            first_sos = None
+            if endpoint == "send_sos" and phone:
+                if phone not in self._sos_phones:
+                    first_sos = phone
+                self._sos_phones[phone] = None
+                self._sos_phones.move_to_end(phone)
+                if len(self._sos_phones) > self.max_keys:
+                    self._sos_phones.popitem(last=False)
+        return 0.0, (charged, first_sos)
+
+    def refund(self, receipt):
+        """Give back what ``take`` charged, for a submission that was not stored after all."""
+        if receipt is None:
+            return
+        charged, first_sos = receipt
+        with self._lock:
+            for endpoint, kind, value in charged:
+                bucket = self._buckets.get((endpoint, kind, value))
+                if bucket is not None:
+                    bucket[0] = min(self.budgets[endpoint][kind].burst, bucket[0] + 1)
+            if first_sos is not None:
+                self._sos_phones.pop(first_sos, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"buckets": len(self._buckets), "sos_phones": len(self._sos_phones), "max_keys": self.max_keys}
+
+
+_limiter = RateLimiter()
+
+
+def get_limiter() -> RateLimiter:
+    return _limiter
+
+
+def required(reply: str, *names: str):
+    """A ``validate`` for rate_limited: reply unless every named argument is filled in."""
+    return lambda arguments: None if all(arguments.get(name) for name in names) else reply
+
+
+def rate_limited(endpoint: str, reply: str, phone_arg: str = "phone", validate=None):
+    """Apply the endpoint's budgets to a handler taking a phone argument and ``request: gr.Request``.
+
+    reply is returned when the submission is rejected; ``{seconds}`` in it is
+    replaced by the time to wait. ``validate(arguments)`` runs first, on the
+    handler's arguments by name. If it returns a message, that message is the
+    reply and no tokens are taken.
+    """
+    if endpoint not in BUDGETS:
+        raise ValueError(f"no rate limit budget for {endpoint}")
+
+    def decorator(fn):
+        signature = inspect.signature(fn)
+        # core.lanes.in_lane marks its wrapper with the reply it gives when the lane is full
+        busy_reply = getattr(fn, "lane_busy_reply", object())
+
+        @functools.wraps(fn)
+        def call(*args, **kwargs):
+            arguments = signature.bind_partial(*args, **kwargs).arguments
+            if validate is not None:
+                error = validate(arguments)
+                if error:
+                    return error
+            if not ENABLED:
+                return fn(*args, **kwargs)
+            phone = normalize_phone(arguments.get(phone_arg))
+            wait, receipt = _limiter.take(endpoint, phone, client_ip(arguments.get("request")))
+            if wait:
+                logger.info("Rate limited %s", endpoint, extra={"endpoint": endpoint, "retry_after": round(wait, 1)})
+                return reply.format(seconds=math.ceil(wait))
+            result = fn(*args, **kwargs)
+            if result is busy_reply:
+                _limiter.refund(receipt)
+            return result
+        return call
+    return decorator
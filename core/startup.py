@@ -0,0 +1,270 @@
+"""
+Fast cold start.
+
+Importing gradio takes about two seconds, and building the Blocks layout takes
+a few hundred milliseconds more. Before this module, a new container served
+nothing until both were done. ``serve()`` binds the port first, with a light
+FastAPI app:
+- the plain HTTP routes in api.py (map tiles, operator feed, the /lite page)
+  work at once
+- /healthz reports "starting" or "ready"
+- any other page gets a short 503 "starting" page. It reloads itself and
+  lists the emergency numbers.
+
+A background thread then imports gradio and app.py and builds the UI. It runs
+the UI's ASGI lifespan on the server's event loop, then switches all traffic
+to it. With DRC_FAST_START=0 the UI is built before the port is bound, as
+before.
+
+Other startup work is taken off the critical path too:
+- ``warm()`` loads the data_store registries into the map aggregator, the
+  operator feed and the tile cache index, and imports the agent stack. It
+  runs in daemon threads, so the first request doesn't pay for any of it.
+- ``precomputed()`` serves values fixed at image build time (the default India
+  map, the preparedness guides) from DRC_STARTUP_CACHE. The Dockerfile writes
+  that file with ``python -m core.startup precompute``.
+
+    python -m core.startup            # serve app.py with fast start
+    python -m core.startup precompute # write the startup cache
+"""
+import asyncio
+import contextlib
+import importlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+from core.metrics import observe
+
+logger = logging.getLogger(__name__)
+
+_T0 = time.perf_counter()
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FAST_START = os.environ.get("DRC_FAST_START", "1") != "0"
+STARTUP_CACHE = os.environ.get("DRC_STARTUP_CACHE", os.path.join(_ROOT, "build", "startup_cache.json"))
+
+STARTING_PAGE = """<!doctype html><html><head><meta charset="utf-8"><meta http-equiv="refresh" content="2">
+<meta name="viewport" content="width=device-width, initial-scale=1"><title>Disaster Resource Connector</title></head>
+<body style="font-family: sans-serif; text-align: center; padding: 40px;">
+<h2>🆘 Disaster Resource Connector is starting…</h2><p>This page reloads by itself in a moment.</p>
+<p><b>In an emergency call 112</b> · Ambulance 102/108 · Police 100 · Disaster helpline 1070</p>
+</body></html>"""
+
+
+def since_start() -> float:
+    return time.perf_counter() - _T0
+
+
+# ==================== PRECOMPUTED VALUES ====================
+_precomputed = None
+
+
+def _load_cache() -> dict:
+    global _precomputed
+    if _precomputed is None:
+        try:
+            with open(STARTUP_CACHE, encoding="utf-8") as f:
+                _precomputed = json.load(f)
+        except (OSError, ValueError):
+            _precomputed = {}
+    return _precomputed
+
+
+def precomputed(name: str, build):
+    """Value stored at build time under name, else build() (and keep it for this process)."""
+    cache = _load_cache()
+    if name not in cache:
+        cache[name] = build()
+    return cache[name]
+
+
+def precompute(path: str = STARTUP_CACHE) -> dict:
+    """Build every precomputed value and write them to path."""
+    import app
+    values = {
+        "default_map": app.create_map(None, None),
+        "preparedness": {kind: app.render_preparedness(kind) for kind in app.DISASTER_TYPES}
+    }
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(values, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    return values
+
+
+# ==================== BACKGROUND WARM-UP ====================
+def _warm_one(name: str, fn):
+    start = time.perf_counter()
+    try:
+        fn()
+    except Exception:
+        logger.exception("Startup warm-up %s failed", name)
+        observe("startup", time.perf_counter() - start, name, "error")
+        return
+    observe("startup", time.perf_counter() - start, name)
+    logger.debug("Warmed %s in %.3fs", name, time.perf_counter() - start)
+
+
+def warm():
+    """Load registries and the agent stack in daemon threads."""
+    from core.geo_aggregation import get_aggregator
+    from core.operator_feed import get_feed
+    from core.tile_cache import get_tile_cache
+
+    jobs = {
+        "geo_aggregator": get_aggregator,
+        "operator_feed": get_feed,
+        "tile_cache": get_tile_cache,
+        "agent_stack": lambda: importlib.import_module("main_agent"),
+    }
+    for name, fn in jobs.items():
+        threading.Thread(target=_warm_one, args=(name, fn), name=f"warm-{name}", daemon=True).start()
+
+
+# ==================== SERVER ====================
+class _Lifespan:
+    """Runs an ASGI app's lifespan by hand, for an app added after the server started."""
+
+    def __init__(self, app):
+        self.app = app
+        self._inbox = asyncio.Queue()
+        self._task = None
+
+    async def start(self):
+        started = asyncio.get_running_loop().create_future()
+
+        async def send(message):
+            if message["type"] == "lifespan.startup.complete":
+                started.set_result(None)
+            elif message["type"] == "lifespan.startup.failed":
+                started.set_exception(RuntimeError(message.get("message", "startup failed")))
+
+        scope = {"type": "lifespan", "asgi": {"version": "3.0", "spec_version": "2.0"}, "state": {}}
+        await self._inbox.put({"type": "lifespan.startup"})
+        self._task = asyncio.ensure_future(self.app(scope, self._inbox.get, send))
+        await started
+
+    async def stop(self):
+        if self._task is not None:
+            await self._inbox.put({"type": "lifespan.shutdown"})
+            with contextlib.suppress(Exception):
+                await asyncio.wait_for(self._task, timeout=10)
+
+
+class FastStartServer:
+    """ASGI app that serves a light app until the full UI is built, then the UI."""
+
+    def __init__(self, build_ui):
+        self.build_ui = build_ui
+        self.ui = None
+        self.ready_seconds = None
+        self._ui_lifespan = None
+        self.light = self._light_app()
+
+    def _light_app(self):
+        from fastapi import FastAPI, Response
+        from api import install
+
+        @contextlib.asynccontextmanager
+        async def lifespan(_):
+            loop = asyncio.get_running_loop()
+            threading.Thread(target=self._load, args=(loop,), name="ui-loader", daemon=True).start()
+            yield
+            if self._ui_lifespan is not None:
+                await self._ui_lifespan.stop()
+
+        light = FastAPI(lifespan=lifespan)
+        install(light)
+        add_health_route(light, self)
+
+        @light.get("/{path:path}", include_in_schema=False)
+        def starting(path: str):
+            return Response(STARTING_PAGE, status_code=503, media_type="text/html",
+                            headers={"Retry-After": "2", "Cache-Control": "no-store"})
+        return light
+
+    def _load(self, loop):
+        start = time.perf_counter()
+        try:
+            ui = self.build_ui(self)
+            lifespan = _Lifespan(ui)
+            asyncio.run_coroutine_threadsafe(lifespan.start(), loop).result()
+        except Exception:
+            logger.exception("Building the UI failed")
+            observe("startup", time.perf_counter() - start, "ui", "error")
+            return
+        self._ui_lifespan = lifespan
+        self.ready_seconds = since_start()
+        self.ui = ui
+        observe("startup", time.perf_counter() - start, "ui")
+        logger.info("UI ready %.2fs after start", self.ready_seconds)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan" or self.ui is None:
+            await self.light(scope, receive, send)
+        else:
+            await self.ui(scope, receive, send)
+
+
+def add_health_route(server, status):
+    """/healthz reads status.ui (None until the UI is served) and status.ready_seconds."""
+    @server.get("/healthz", include_in_schema=False)
+    def healthz():
+        return {"status": "ready" if status.ui is not None else "starting",
+                "uptime_seconds": round(since_start(), 3), "ready_seconds": status.ready_seconds}
+
+
+def build_server(create_app, status):
+    """FastAPI app with api.py's routes, /healthz and the Gradio UI mounted at /."""
+    import gradio as gr
+    from fastapi import FastAPI
+    from api import install
+
+    server = FastAPI()
+    install(server)
+    add_health_route(server, status)  # before the mount, which matches every path
+    return gr.mount_gradio_app(server, create_app(), path="/")
+
+
+def serve(create_app=None):
+    """Run the app on GRADIO_SERVER_NAME:GRADIO_SERVER_PORT; create_app defaults to app.create_app."""
+    import uvicorn
+    from core.metrics import start_metrics_server
+    from core.profiling import register_endpoints
+
+    def build(status):
+        factory = create_app or importlib.import_module("app").create_app
+        return build_server(factory, status)
+
+    register_endpoints()
+    start_metrics_server()
+    warm()
+    if FAST_START:
+        server = FastStartServer(build)
+    else:
+        status = SimpleNamespace(ui=None, ready_seconds=None)
+        server = status.ui = build(status)
+        status.ready_seconds = since_start()
+    logger.info("Binding port %.2fs after start (fast start %s)", since_start(), "on" if FAST_START else "off")
+    # launcher.py starts several workers on their own ports through these variables
+    uvicorn.run(
+        server,
+        host=os.environ.get("GRADIO_SERVER_NAME", "0.0.0.0"),
+        port=int(os.environ.get("GRADIO_SERVER_PORT", "7860"))
+    )
+
+
+if __name__ == "__main__":
+    from core.logging_config import configure_logging
+
+    configure_logging()
+    if sys.argv[1:] == ["precompute"]:
+        written = precompute()
+        print(f"Wrote {', '.join(written)} to {STARTUP_CACHE}")
+    else:
+        serve()
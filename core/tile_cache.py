@@ -0,0 +1,243 @@
+"""
+Local base-map tile cache.
+
+Browsers fetch map tiles from this app (api.py, /api/tiles/{z}/{x}/{y}.png)
+instead of from the OSM servers. A tile is looked up in this order:
+1. MBTiles files listed in DRC_TILE_MBTILES (comma separated): read-only
+   seeds for the configured regions, never evicted.
+2. The disk cache in DRC_TILE_CACHE_DIR (data/tiles), kept under
+   DRC_TILE_CACHE_MB by least-recently-used eviction.
+3. The upstream server (DRC_TILE_UPSTREAM), unless DRC_TILE_OFFLINE=1. The
+   result is written to the disk cache.
+
+After an upstream failure, the upstream is left alone for UPSTREAM_BACKOFF
+seconds. Offline areas get fast misses and a struggling server isn't
+hammered. Concurrent requests for the same missing tile share one upstream
+fetch. The Leaflet scripts and styles the map needs go through the same cache
+(``asset()``), so a seeded region keeps working with no connectivity once they
+were fetched one time.
+"""
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+
+from core.metrics import count, timed
+
+logger = logging.getLogger(__name__)
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.environ.get("DRC_TILE_CACHE_DIR", os.path.join(_ROOT, "data", "tiles"))
+CACHE_LIMIT_BYTES = int(float(os.environ.get("DRC_TILE_CACHE_MB", "512")) * 1024 * 1024)
+UPSTREAM_URL = os.environ.get("DRC_TILE_UPSTREAM", "https://tile.openstreetmap.org/{z}/{x}/{y}.png")
+MBTILES_PATHS = [p.strip() for p in os.environ.get("DRC_TILE_MBTILES", "").split(",") if p.strip()]
+OFFLINE = os.environ.get("DRC_TILE_OFFLINE", "0") == "1"
+UPSTREAM_TIMEOUT = 10
+UPSTREAM_BACKOFF = 30
+MAX_ZOOM = 19
+# OSM's tile usage policy requires an identifying User-Agent
+USER_AGENT = "DisasterResourceConnector/1.0 (tile cache)"
+
+ASSETS = {
+    "leaflet.js": "https://unpkg.com/leaflet@1.9.4/dist/leaflet.js",
+    "leaflet.css": "https://unpkg.com/leaflet@1.9.4/dist/leaflet.css",
+    "leaflet.markercluster.js": "https://unpkg.com/leaflet.markercluster@1.5.3/dist/leaflet.markercluster.js",
+    "MarkerCluster.css": "https://unpkg.com/leaflet.markercluster@1.5.3/dist/MarkerCluster.css",
+    "MarkerCluster.Default.css": "https://unpkg.com/leaflet.markercluster@1.5.3/dist/MarkerCluster.Default.css",
+}
+
+
+def content_type(data: bytes) -> str:
+    if data[:8] == b"\x89PNG\r\n\x1a\n":
+        return "image/png"
+    if data[:3] == b"\xff\xd8\xff":
+        return "image/jpeg"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return "application/octet-stream"
+
+
+class MBTiles:
+    """Read-only MBTiles (SQLite) file; rows are stored in TMS order (y flipped)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+            self._local.conn = conn
+        return conn
+
+    def get(self, z: int, x: int, y: int):
+        row = self._conn().execute(
+            "SELECT tile_data FROM tiles WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?",
+            (z, x, (1 << z) - 1 - y)
+        ).fetchone()
+        return bytes(row[0]) if row else None
+
+
+class TileCache:
+    def __init__(self, cache_dir: str = CACHE_DIR, limit_bytes: int = CACHE_LIMIT_BYTES,
+                 upstream: str = UPSTREAM_URL, mbtiles: list = None, offline: bool = OFFLINE):
+        self.cache_dir = cache_dir
+        self.limit_bytes = limit_bytes
+        self.upstream = upstream
+        self.offline = offline
+        self.seeds = [MBTiles(p) for p in (MBTILES_PATHS if mbtiles is None else mbtiles) if os.path.exists(p)]
+        self._lru = OrderedDict()  # relative path -> size, least recently used first
+        self._size = 0
+        self._lock = threading.Lock()
+        self._inflight = {}        # relative path -> Event of the fetch in progress
+        self._upstream_down_until = 0.0
+        self._session = requests.Session()
+        self._session.headers["User-Agent"] = USER_AGENT
+        self._scan()
+
+    def _scan(self):
+        """Rebuild the LRU order from the files already on disk (oldest access first)."""
+        entries = []
+        for folder, dirs, files in os.walk(self.cache_dir):
+            if folder == self.cache_dir and "assets" in dirs:
+                dirs.remove("assets")  # map library files are never evicted
+            for name in files:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(folder, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_atime, os.path.relpath(path, self.cache_dir), st.st_size))
+        for _, rel, size in sorted(entries):
+            self._lru[rel] = size
+            self._size += size
+
+    # ==================== DISK CACHE ====================
+    def _read(self, rel: str):
+        try:
+            with open(os.path.join(self.cache_dir, rel), "rb") as f:
+                data = f.read()
+        except OSError:
+            with self._lock:
+                self._size -= self._lru.pop(rel, 0)
+            return None
+        with self._lock:
+            if rel in self._lru:
+                self._lru.move_to_end(rel)
+        return data
+
+    def _store(self, rel: str, data: bytes, evictable: bool = True):
+        path = os.path.join(self.cache_dir, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        if not evictable:
+            return
+        with self._lock:
+            self._size += len(data) - self._lru.pop(rel, 0)
+            self._lru[rel] = len(data)
+            evict = []
+            while self._size > self.limit_bytes and len(self._lru) > 1:
+                old, size = self._lru.popitem(last=False)
+                self._size -= size
+                evict.append(old)
+        for old in evict:
+            try:
+                os.remove(os.path.join(self.cache_dir, old))
+            except OSError:
+                pass
+        if evict:
+            count("tile_cache", "evicted", len(evict))
+
+    # ==================== UPSTREAM ====================
+    def _fetch(self, rel: str, url: str, evictable: bool = True):
+        """Fetch url into the cache once, however many callers want it at the same time."""
+        if self.offline or time.monotonic() < self._upstream_down_until:
+            return None
+        with self._lock:
+            event = self._inflight.get(rel)
+            leader = event is None
+            if leader:
+                event = self._inflight[rel] = threading.Event()
+        if not leader:
+            event.wait(UPSTREAM_TIMEOUT)
+            return self._read(rel)
+        try:
+            with timed("tile_upstream") as t:
+                try:
+                    response = self._session.get(url, timeout=UPSTREAM_TIMEOUT)
+                except requests.RequestException as e:
+                    t.outcome = "error"
+                    self._upstream_down_until = time.monotonic() + UPSTREAM_BACKOFF
+                    logger.warning("Tile upstream unreachable, backing off %ss: %s", UPSTREAM_BACKOFF, e)
+                    return None
+                if response.status_code != 200 or not response.content:
+                    t.outcome = "http_error"
+                    if response.status_code >= 500 or response.status_code == 429:
+                        self._upstream_down_until = time.monotonic() + UPSTREAM_BACKOFF
+                    return None
+            self._store(rel, response.content, evictable)
+            return response.content
+        finally:
+            with self._lock:
+                del self._inflight[rel]
+            event.set()
+
+    # ==================== LOOKUP ====================
+    def tile(self, z: int, x: int, y: int):
+        """(bytes, source) for a tile, or (None, "miss") if it can't be had right now."""
+        if not 0 <= z <= MAX_ZOOM or not (0 <= x < 1 << z and 0 <= y < 1 << z):
+            raise ValueError("tile out of range")
+        for seed in self.seeds:
+            data = seed.get(z, x, y)
+            if data:
+                count("tile_cache", "mbtiles")
+                return data, "mbtiles"
+        rel = os.path.join(str(z), str(x), f"{y}.tile")
+        data = self._read(rel)
+        if data is not None:
+            count("tile_cache", "hit")
+            return data, "cache"
+        data = self._fetch(rel, self.upstream.format(z=z, x=x, y=y))
+        count("tile_cache", "upstream" if data else "miss")
+        return (data, "upstream") if data else (None, "miss")
+
+    def asset(self, name: str):
+        """Cached copy of a whitelisted map library file (leaflet.js etc.), or None."""
+        url = ASSETS.get(name)
+        if url is None:
+            raise ValueError("unknown asset")
+        rel = os.path.join("assets", name)
+        return self._read(rel) or self._fetch(rel, url, evictable=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"tiles": len(self._lru), "bytes": self._size, "limit_bytes": self.limit_bytes,
+                    "seeds": [s.path for s in self.seeds], "offline": self.offline}
+
+
+def etag(data: bytes) -> str:
+    return '"' + hashlib.blake2b(data, digest_size=8).hexdigest() + '"'
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_tile_cache() -> TileCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = TileCache()
+    return _cache
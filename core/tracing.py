@@ -0,0 +1,311 @@
+"""
+Lightweight request tracing.
+
+A trace starts in app.process_request, or in MainAgent when it is called
+directly. Its spans cover the planner, each worker, the ResourceTools HTTP
+calls and the evaluator. Work that crosses a thread or a message bus process
+gets its parent explicitly, through a Span or a ``trace_context`` dict carried
+on the A2A Message. Nested calls on the same thread find their parent through a
+context variable.
+
+Every trace is buffered in memory until its root span ends, then:
+- head sampling: kept if it was picked at start (DRC_TRACE_SAMPLE_RATE)
+- tail sampling: always kept if it took longer than DRC_TRACE_SLOW_SECONDS
+  or any span failed
+
+Kept traces are appended by a background thread to DRC_TRACE_FILE as
+OpenTelemetry OTLP/JSON, one export request per line. Collectors, Jaeger and
+most trace viewers can load that format.
+
+A span started under a remote parent (a bus process working on one message)
+buffers its subtree under its own span id, not the trace id. Several messages
+of one request can run at once in the same process, and each reply takes back
+only the spans of its own message.
+"""
+import contextvars
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from collections import OrderedDict
+
+from core.metrics import count
+
+logger = logging.getLogger(__name__)
+
+TRACING_ENABLED = os.environ.get("DRC_TRACING", "1") != "0"
+SAMPLE_RATE = float(os.environ.get("DRC_TRACE_SAMPLE_RATE", "0.05"))
+SLOW_TRACE_SECONDS = float(os.environ.get("DRC_TRACE_SLOW_SECONDS", "5.0"))
+TRACE_FILE = os.environ.get(
+    "DRC_TRACE_FILE",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "traces.jsonl")
+)
+SERVICE_NAME = "disaster-resource-connector"
+MAX_OPEN_TRACES = 1000
+MAX_SPANS_PER_TRACE = 256
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+def _new_id(nbytes: int) -> str:
+    return random.getrandbits(nbytes * 8).to_bytes(nbytes, "big").hex()
+
+
+class Span:
+    __slots__ = ("tracer", "name", "trace_id", "span_id", "parent_id", "sampled", "local_root",
+                 "buffer", "start_ns", "end_ns", "attributes", "error", "_token")
+
+    def __init__(self, tracer, name: str, trace_id: str, parent_id: str, sampled: bool,
+                 local_root: bool, attributes: dict = None, buffer: str = None):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = _new_id(8)
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.local_root = local_root
+        # Key of the buffer this span ends up in: the trace id, or a remote root's span id
+        self.buffer = buffer or (trace_id if parent_id is None else self.span_id)
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = dict(attributes or {})
+        self.error = None
+        self._token = None
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def record_error(self, error):
+        self.error = f"{type(error).__name__}: {error}" if isinstance(error, BaseException) else str(error)
+
+    def context(self) -> dict:
+        """Serializable parent reference for work in another thread or process."""
+        return {"trace_id": self.trace_id, "span_id": self.span_id, "sampled": self.sampled}
+
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            self.tracer._on_end(self)
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None and not isinstance(exc, GeneratorExit):
+            self.record_error(exc)
+        if self._token is not None:
+            _current_span.reset(self._token)
+            self._token = None
+        self.end()
+        return False
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id, "span_id": self.span_id, "parent_id": self.parent_id,
+            "name": self.name, "start_ns": self.start_ns, "end_ns": self.end_ns,
+            "attributes": self.attributes, "error": self.error
+        }
+
+
+class _NoopSpan:
+    """Stand-in when tracing is disabled; every operation is free."""
+    trace_id = span_id = None
+    sampled = False
+
+    def set_attribute(self, key, value):
+        pass
+
+    def record_error(self, error):
+        pass
+
+    def context(self):
+        return None
+
+    def end(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    def __init__(self, sample_rate: float = SAMPLE_RATE, slow_seconds: float = SLOW_TRACE_SECONDS,
+                 trace_file: str = TRACE_FILE, enabled: bool = TRACING_ENABLED):
+        self.sample_rate = sample_rate
+        self.slow_seconds = slow_seconds
+        self.trace_file = trace_file
+        self.enabled = enabled
+        self._traces = OrderedDict()
+        self._lock = threading.Lock()
+        self._export_queue = queue.Queue(maxsize=1000)
+        self._exporter = None
+
+    # ==================== SPANS ====================
+    def start_span(self, name: str, parent=None, attributes: dict = None):
+        """Start a span under parent (a Span, a context dict, or the current span)."""
+        if not self.enabled:
+            return NOOP_SPAN
+        if parent is None:
+            parent = _current_span.get()
+        if isinstance(parent, _NoopSpan):
+            parent = None
+        if isinstance(parent, Span):
+            return Span(self, name, parent.trace_id, parent.span_id, parent.sampled, False, attributes, parent.buffer)
+        if isinstance(parent, dict) and parent.get("trace_id"):
+            # Remote parent: this process only buffers the spans for the caller to adopt
+            span = Span(self, name, parent["trace_id"], parent["span_id"], parent.get("sampled", False), True, attributes)
+            self._open_buffer(span.buffer)
+            return span
+        return self.start_trace(name, attributes)
+
+    def start_trace(self, name: str, attributes: dict = None):
+        if not self.enabled:
+            return NOOP_SPAN
+        span = Span(self, name, _new_id(16), None, random.random() < self.sample_rate, True, attributes)
+        self._open_buffer(span.buffer)
+        return span
+
+    def _open_buffer(self, key: str):
+        # Bounded: a root that never ends, or a reply that never collects its spans, is evicted
+        with self._lock:
+            self._traces[key] = []
+            while len(self._traces) > MAX_OPEN_TRACES:
+                self._traces.popitem(last=False)
+                count("traces", "overflow")
+
+    def _on_end(self, span: Span):
+        with self._lock:
+            spans = self._traces.get(span.buffer)
+            if spans is None:
+                return  # trace already finished or evicted
+            if len(spans) < MAX_SPANS_PER_TRACE:
+                spans.append(span.to_dict())
+            if not span.local_root or span.parent_id is not None:
+                return
+            del self._traces[span.buffer]
+        self._finish_trace(span, spans)
+
+    def take(self, span: Span) -> list:
+        """Remove and return the spans buffered under a span started from a remote parent."""
+        with self._lock:
+            return self._traces.pop(span.buffer, None) or []
+
+    def adopt(self, spans: list):
+        """Add spans recorded in another process to their (still open) trace here."""
+        if not spans:
+            return
+        with self._lock:
+            buffered = self._traces.get(spans[0]["trace_id"])
+            if buffered is not None:
+                buffered.extend(spans[:MAX_SPANS_PER_TRACE - len(buffered)])
+
+    # ==================== SAMPLING & EXPORT ====================
+    def _finish_trace(self, root: Span, spans: list):
+        duration = (root.end_ns - root.start_ns) / 1e9
+        if root.sampled:
+            reason = "head"
+        elif duration >= self.slow_seconds:
+            reason = "slow"
+        elif any(s["error"] for s in spans):
+            reason = "error"
+        else:
+            count("traces", "dropped")
+            return
+        count("traces", f"kept_{reason}")
+        if duration >= self.slow_seconds:
+            logger.warning("Slow trace %s: %s took %.2fs", root.trace_id, root.name, duration,
+                           extra={"trace_id": root.trace_id})
+        try:
+            self._export_queue.put_nowait(spans)
+        except queue.Full:
+            count("traces", "export_dropped")
+            return
+        self._ensure_exporter()
+
+    def _ensure_exporter(self):
+        if self._exporter is None or not self._exporter.is_alive():
+            with self._lock:
+                if self._exporter is None or not self._exporter.is_alive():
+                    self._exporter = threading.Thread(target=self._export_loop, name="trace-exporter", daemon=True)
+                    self._exporter.start()
+
+    def _export_loop(self):
+        while True:
+            spans = self._export_queue.get()
+            try:
+                os.makedirs(os.path.dirname(self.trace_file) or ".", exist_ok=True)
+                with open(self.trace_file, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(to_otlp(spans), ensure_ascii=False) + "\n")
+            except Exception as e:
+                logger.error("Trace export failed: %s", e)
+            finally:
+                self._export_queue.task_done()
+
+    def flush(self, timeout: float = 5.0):
+        """Wait until queued traces are written (used by benchmarks and shutdown)."""
+        deadline = time.monotonic() + timeout
+        while self._export_queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(spans: list) -> dict:
+    """Convert buffered spans to an OTLP/JSON ExportTraceServiceRequest."""
+    otlp_spans = []
+    for s in spans:
+        span = {
+            "traceId": s["trace_id"],
+            "spanId": s["span_id"],
+            "name": s["name"],
+            "kind": 1,
+            "startTimeUnixNano": str(s["start_ns"]),
+            "endTimeUnixNano": str(s["end_ns"]),
+            "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s["attributes"].items()],
+            "status": {"code": 2, "message": s["error"]} if s["error"] else {"code": 1}
+        }
+        if s["parent_id"]:
+            span["parentSpanId"] = s["parent_id"]
+        otlp_spans.append(span)
+    return {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+        "scopeSpans": [{"scope": {"name": "drc.tracing"}, "spans": otlp_spans}]
+    }]}
+
+
+_tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+
+def start_span(name: str, parent=None, **attributes):
+    """Start a child of parent (or of the current span); use as a context manager."""
+    return _tracer.start_span(name, parent, attributes)
+
+
+def start_trace(name: str, **attributes):
+    return _tracer.start_trace(name, attributes)
+
+
+def current_span():
+    return _current_span.get() or NOOP_SPAN
@@ -4,14 +4,32 @@ Data storage module for persistent data:
 - Volunteer registration
 - Resource requests
 - SOS alerts
+- Safe reports and donations
+
+Records come one at a time from the UI handlers, or in batches from the SMS
+gateway API (api.py, core/batch_ingest.py). A batch is written with one
+read-modify-write of its registry.
 """
 import json
+import logging
 import os
-from datetime import datetime
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 import hashlib
+from tools.gazetteer import geocode
+from memory.shared_store import get_shared_store
+from core.metrics import timed
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fcntl
+except ImportError:  # Windows: in-process locking only
+    fcntl = None
 
-DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+DATA_DIR = os.environ.get("DRC_DATA_DIR", os.path.join(os.path.dirname(__file__), "data"))
 os.makedirs(DATA_DIR, exist_ok=True)
 
 MISSING_PERSONS_FILE = os.path.join(DATA_DIR, "missing_persons.json")
@@ -20,18 +38,117 @@ RESOURCE_REQUESTS_FILE = os.path.join(DATA_DIR, "resource_requests.json")
 SOS_ALERTS_FILE = os.path.join(DATA_DIR, "sos_alerts.json")
 SAFE_REPORTS_FILE = os.path.join(DATA_DIR, "safe_reports.json")
 
+# Registries are JSON files by default. DRC_STORAGE_BACKEND=sqlite keeps them in
+# the shared SQLite store instead, for several app processes on one machine.
+STORAGE_BACKEND = os.environ.get("DRC_STORAGE_BACKEND", "json")
+
+# Bumped on every write so caches built from the store can tell when it changed
+_store_version = 0
+_write_lock = threading.RLock()
+
+# In-memory indexes (map aggregation, operator views) follow SOS alerts and
+# resource requests through these callbacks instead of re-reading the registries
+_listeners = []
+
+def get_store_version() -> int:
+    """Return a counter that changes whenever any registry is written."""
+    if STORAGE_BACKEND == "sqlite":
+        return get_shared_store().collections_version()
+    return _store_version
+
+def _collection_name(filepath: str) -> str:
+    return os.path.splitext(os.path.basename(filepath))[0]
+
 def _load_json(filepath: str) -> list:
-    try:
-        if os.path.exists(filepath):
-            with open(filepath, "r", encoding="utf-8") as f:
-                return json.load(f)
-    except:
-        pass
-    return []
+    with timed("data_store_load", _collection_name(filepath)):
+        if STORAGE_BACKEND == "sqlite":
+            return get_shared_store().load_collection(_collection_name(filepath))
+        try:
+            if os.path.exists(filepath):
+                with open(filepath, "r", encoding="utf-8") as f:
+                    return json.load(f)
+        except:
+            pass
+        return []
 
 def _save_json(filepath: str, data: list):
-    with open(filepath, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    global _store_version
+    _store_version += 1
+    with timed("data_store_save", _collection_name(filepath)):
+        if STORAGE_BACKEND == "sqlite":
+            get_shared_store().save_collection(_collection_name(filepath), data)
+            return
+        # Write a temp file and rename so readers never see a half-written registry
+        tmp_path = f"{filepath}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, filepath)
+
+@contextmanager
+def _file_lock(filepath: str):
+    with _write_lock:
+        if fcntl is None:
+            yield
+            return
+        with open(filepath + ".lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+class _Unchanged(Exception):
+    """Raised inside a _mutate block that changed nothing, so the registry is not rewritten."""
+
+@contextmanager
+def _mutate(filepath: str):
+    """Load a registry for read-modify-write and save it when the block exits.
+
+    The registry stays locked against other threads and processes for the whole
+    block, so concurrent writers cannot lose each other's records. A block that
+    raises _Unchanged skips the save, and the store version stays the same.
+    """
+    if STORAGE_BACKEND == "sqlite":
+        with _write_lock, get_shared_store().transaction():
+            data = _load_json(filepath)
+            try:
+                yield data
+            except _Unchanged:
+                return
+            _save_json(filepath, data)
+    else:
+        with _file_lock(filepath):
+            data = _load_json(filepath)
+            try:
+                yield data
+            except _Unchanged:
+                return
+            _save_json(filepath, data)
+
+def subscribe(listener):
+    """Call listener(collection, record) after an SOS alert or resource request is written."""
+    _listeners.append(listener)
+
+def _notify(filepath: str, record: dict):
+    collection = _collection_name(filepath)
+    for listener in _listeners:
+        try:
+            listener(collection, record)
+        except Exception as e:
+            logger.error("data_store listener failed for %s: %s", collection, e)
+
+def _geocode(location: str) -> Optional[dict]:
+    """Resolve a free-text location with the offline gazetteer (None if unknown)."""
+    try:
+        return geocode(location)
+    except Exception:
+        return None
+
+def _fill_coordinates(record: dict, geo: Optional[dict]):
+    """Use gazetteer coordinates when the client did not send a position."""
+    if geo and (not record.get("lat") or not record.get("lon")):
+        record["lat"] = geo["lat"]
+        record["lon"] = geo["lon"]
 
 # ==================== MISSING PERSONS ====================
 def report_missing_person(name: str, age: int, gender: str, description: str, 
@@ -39,7 +156,6 @@ def report_missing_person(name: str, age: int, gender: str, description: str,
                           contact_name: str, contact_phone: str,
                           photo_url: str = "", lat: float = None, lon: float = None) -> dict:
     """Report a missing person."""
-    persons = _load_json(MISSING_PERSONS_FILE)
     person_id = hashlib.md5(f"{name}{datetime.now().isoformat()}".encode()).hexdigest()[:8].upper()
     
     new_person = {
@@ -50,6 +166,7 @@ def report_missing_person(name: str, age: int, gender: str, description: str,
         "description": description,
         "last_seen_location": last_seen_location,
         "last_seen_time": last_seen_time,
+        "last_seen_geo": _geocode(last_seen_location),
         "contact_name": contact_name,
         "contact_phone": contact_phone,
         "photo_url": photo_url,
@@ -59,8 +176,8 @@ def report_missing_person(name: str, age: int, gender: str, description: str,
         "reported_at": datetime.now().isoformat(),
         "found_at": None
     }
-    persons.append(new_person)
-    _save_json(MISSING_PERSONS_FILE, persons)
+    with _mutate(MISSING_PERSONS_FILE) as persons:
+        persons.append(new_person)
     return new_person
 
 def search_missing_persons(query: str = "", status: str = "missing") -> List[dict]:
@@ -77,15 +194,14 @@ def search_missing_persons(query: str = "", status: str = "missing") -> List[dic
 
 def mark_person_found(person_id: str, found_location: str = "") -> bool:
     """Mark a missing person as found."""
-    persons = _load_json(MISSING_PERSONS_FILE)
-    for p in persons:
-        if p.get("id") == person_id:
-            p["status"] = "found"
-            p["found_at"] = datetime.now().isoformat()
-            p["found_location"] = found_location
-            _save_json(MISSING_PERSONS_FILE, persons)
-            return True
-    return False
+    with _mutate(MISSING_PERSONS_FILE) as persons:
+        person = next((p for p in persons if p.get("id") == person_id), None)
+        if person is None:
+            raise _Unchanged
+        person["status"] = "found"
+        person["found_at"] = datetime.now().isoformat()
+        person["found_location"] = found_location
+    return person is not None
 
 def get_missing_stats() -> dict:
     """Get statistics on missing persons."""
@@ -99,7 +215,6 @@ def register_volunteer(name: str, phone: str, email: str, skills: List[str],
                        available_areas: str, availability: str,
                        has_vehicle: bool = False, lat: float = None, lon: float = None) -> dict:
     """Register a new volunteer."""
-    volunteers = _load_json(VOLUNTEERS_FILE)
     vol_id = hashlib.md5(f"{phone}{datetime.now().isoformat()}".encode()).hexdigest()[:8].upper()
     
     new_volunteer = {
@@ -117,8 +232,8 @@ def register_volunteer(name: str, phone: str, email: str, skills: List[str],
         "registered_at": datetime.now().isoformat(),
         "tasks_completed": 0
     }
-    volunteers.append(new_volunteer)
-    _save_json(VOLUNTEERS_FILE, volunteers)
+    with _mutate(VOLUNTEERS_FILE) as volunteers:
+        volunteers.append(new_volunteer)
     return new_volunteer
 
 def search_volunteers(skill: str = "", area: str = "") -> List[dict]:
@@ -146,7 +261,6 @@ def create_resource_request(requester_name: str, phone: str, resource_type: str,
                             description: str, urgency: str, quantity: int = 1,
                             location: str = "", lat: float = None, lon: float = None) -> dict:
     """Create a new resource request."""
-    requests = _load_json(RESOURCE_REQUESTS_FILE)
     req_id = hashlib.md5(f"{phone}{datetime.now().isoformat()}".encode()).hexdigest()[:8].upper()
     
     new_request = {
@@ -158,6 +272,7 @@ def create_resource_request(requester_name: str, phone: str, resource_type: str,
         "urgency": urgency,
         "quantity": quantity,
         "location": location,
+        "location_geo": _geocode(location),
         "lat": lat,
         "lon": lon,
         "status": "pending",
@@ -165,8 +280,10 @@ def create_resource_request(requester_name: str, phone: str, resource_type: str,
         "fulfilled_at": None,
         "fulfilled_by": None
     }
-    requests.append(new_request)
-    _save_json(RESOURCE_REQUESTS_FILE, requests)
+    _fill_coordinates(new_request, new_request["location_geo"])
+    with _mutate(RESOURCE_REQUESTS_FILE) as requests:
+        requests.append(new_request)
+    _notify(RESOURCE_REQUESTS_FILE, new_request)
     return new_request
 
 def get_resource_requests(status: str = "", resource_type: str = "") -> List[dict]:
@@ -183,15 +300,17 @@ def get_resource_requests(status: str = "", resource_type: str = "") -> List[dic
 
 def fulfill_resource_request(request_id: str, fulfilled_by: str) -> bool:
     """Mark a resource request as fulfilled."""
-    requests = _load_json(RESOURCE_REQUESTS_FILE)
-    for r in requests:
-        if r.get("id") == request_id:
-            r["status"] = "fulfilled"
-            r["fulfilled_at"] = datetime.now().isoformat()
-            r["fulfilled_by"] = fulfilled_by
-            _save_json(RESOURCE_REQUESTS_FILE, requests)
-            return True
-    return False
+    with _mutate(RESOURCE_REQUESTS_FILE) as requests:
+        request = next((r for r in requests if r.get("id") == request_id), None)
+        if request is None:
+            raise _Unchanged
+        request["status"] = "fulfilled"
+        request["fulfilled_at"] = datetime.now().isoformat()
+        request["fulfilled_by"] = fulfilled_by
+    if request is None:
+        return False
+    _notify(RESOURCE_REQUESTS_FILE, request)
+    return True
 
 def get_request_stats() -> dict:
     """Get resource request statistics."""
@@ -205,7 +324,6 @@ def get_request_stats() -> dict:
 def create_sos_alert(name: str, phone: str, emergency_type: str, message: str,
                      lat: float, lon: float) -> dict:
     """Create an SOS emergency alert."""
-    alerts = _load_json(SOS_ALERTS_FILE)
     alert_id = hashlib.md5(f"{phone}{datetime.now().isoformat()}".encode()).hexdigest()[:8].upper()
     
     new_alert = {
@@ -220,8 +338,9 @@ def create_sos_alert(name: str, phone: str, emergency_type: str, message: str,
         "created_at": datetime.now().isoformat(),
         "resolved_at": None
     }
-    alerts.append(new_alert)
-    _save_json(SOS_ALERTS_FILE, alerts)
+    with _mutate(SOS_ALERTS_FILE) as alerts:
+        alerts.append(new_alert)
+    _notify(SOS_ALERTS_FILE, new_alert)
     return new_alert
 
 def get_active_sos_alerts() -> List[dict]:
@@ -231,32 +350,34 @@ def get_active_sos_alerts() -> List[dict]:
 
 def resolve_sos_alert(alert_id: str) -> bool:
     """Mark an SOS alert as resolved."""
-    alerts = _load_json(SOS_ALERTS_FILE)
-    for a in alerts:
-        if a.get("id") == alert_id:
-            a["status"] = "resolved"
-            a["resolved_at"] = datetime.now().isoformat()
-            _save_json(SOS_ALERTS_FILE, alerts)
-            return True
-    return False
+    with _mutate(SOS_ALERTS_FILE) as alerts:
+        alert = next((a for a in alerts if a.get("id") == alert_id), None)
+        if alert is None:
+            raise _Unchanged
+        alert["status"] = "resolved"
+        alert["resolved_at"] = datetime.now().isoformat()
+    if alert is None:
+        return False
+    _notify(SOS_ALERTS_FILE, alert)
+    return True
 
 # ==================== SAFE REPORTS ("I'M SAFE") ====================
 def report_safe(name: str, phone: str, location: str, message: str = "",
                 lat: float = None, lon: float = None) -> dict:
     """Report that someone is safe."""
-    reports = _load_json(SAFE_REPORTS_FILE)
-    
     new_report = {
         "name": name,
         "phone": phone,
         "location": location,
+        "location_geo": _geocode(location),
         "message": message,
         "lat": lat,
         "lon": lon,
         "reported_at": datetime.now().isoformat()
     }
-    reports.append(new_report)
-    _save_json(SAFE_REPORTS_FILE, reports)
+    _fill_coordinates(new_report, new_report["location_geo"])
+    with _mutate(SAFE_REPORTS_FILE) as reports:
+        reports.append(new_report)
     return new_report
 
 def search_safe_reports(name: str = "", phone: str = "") -> List[dict]:
@@ -278,7 +399,6 @@ def register_donation(donor_name: str, phone: str, donation_type: str,
                       items: str, quantity: str, pickup_location: str,
                       lat: float = None, lon: float = None) -> dict:
     """Register a donation offer."""
-    donations = _load_json(DONATIONS_FILE)
     don_id = hashlib.md5(f"{phone}{datetime.now().isoformat()}".encode()).hexdigest()[:8].upper()
     
     new_donation = {
@@ -289,13 +409,15 @@ def register_donation(donor_name: str, phone: str, donation_type: str,
         "items": items,
         "quantity": quantity,
         "pickup_location": pickup_location,
+        "pickup_geo": _geocode(pickup_location),
         "lat": lat,
         "lon": lon,
         "status": "available",
         "created_at": datetime.now().isoformat()
     }
-    donations.append(new_donation)
-    _save_json(DONATIONS_FILE, donations)
+    _fill_coordinates(new_donation, new_donation["pickup_geo"])
+    with _mutate(DONATIONS_FILE) as donations:
+        donations.append(new_donation)
     return new_donation
 
 def get_available_donations(donation_type: str = "") -> List[dict]:
@@ -305,3 +427,127 @@ def get_available_donations(donation_type: str = "") -> List[dict]:
     if donation_type:
         results = [d for d in results if d.get("donation_type") == donation_type]
     return results
+
+# ==================== BATCH WRITES (SMS gateway API) ====================
+# A safe report has no open/closed status, so the same content only counts as a
+# duplicate while it is this recent; after that it is a new report
+SAFE_REPORT_DEDUPE_WINDOW = timedelta(hours=1)
+
+def _batch_id(*parts) -> str:
+    return hashlib.md5("|".join(str(p) for p in parts).encode()).hexdigest()[:8].upper()
+
+def dedupe_key(ref: str, *fields) -> str:
+    """The sender's message id if it gave one, else a hash of the record's content."""
+    if ref:
+        return f"ref:{ref}"
+    return "hash:" + hashlib.blake2b("|".join(str(f) for f in fields).encode(), digest_size=8).hexdigest()
+
+def _append_batch(filepath: str, records: List[dict], is_open, admit=None) -> List[tuple]:
+    """Append records in one locked write and return (status, record) for each.
+
+    A record whose dedupe_key matches a stored one (or one earlier in the batch)
+    is not written; its status is "duplicate" and the stored record is returned.
+    Content-hash keys only match records that are still open (``is_open``), so
+    the same message sent again after its alert was resolved is a new alert.
+
+    ``admit(record)`` is asked only about records that are not duplicates, so a
+    retry never uses up the sender's rate limit. A record it refuses is not
+    written and gets the status "rate_limited".
+    """
+    results, created = [], []
+    with _mutate(filepath) as stored:
+        index = {r["dedupe_key"]: r for r in stored
+                 if r.get("dedupe_key") and (r["dedupe_key"].startswith("ref:") or is_open(r))}
+        for record in records:
+            existing = index.get(record["dedupe_key"])
+            if existing is not None:
+                results.append(("duplicate", existing))
+                continue
+            if admit is not None and not admit(record):
+                results.append(("rate_limited", record))
+                continue
+            index[record["dedupe_key"]] = record
+            stored.append(record)
+            created.append(record)
+            results.append(("created", record))
+        if not created:
+            raise _Unchanged
+    if filepath in (SOS_ALERTS_FILE, RESOURCE_REQUESTS_FILE):
+        for record in created:
+            _notify(filepath, record)
+    return results
+
+def create_sos_alert_batch(alerts: List[dict], admit=None) -> List[tuple]:
+    """Store many SOS alerts in one write (fields as create_sos_alert, plus optional location and ref)."""
+    now = datetime.now().isoformat()
+    records = []
+    for a in alerts:
+        key = dedupe_key(a.get("ref"), a["phone"], a["emergency_type"], a["message"], a.get("lat"), a.get("lon"))
+        record = {
+            "id": _batch_id(a["phone"], now, key),
+            "name": a["name"],
+            "phone": a["phone"],
+            "emergency_type": a["emergency_type"],
+            "message": a["message"],
+            "location": a.get("location", ""),
+            "lat": a.get("lat"),
+            "lon": a.get("lon"),
+            "status": "active",
+            "created_at": now,
+            "resolved_at": None,
+            "dedupe_key": key
+        }
+        _fill_coordinates(record, _geocode(record["location"]))
+        records.append(record)
+    return _append_batch(SOS_ALERTS_FILE, records, lambda r: r.get("status") == "active", admit)
+
+def report_safe_batch(reports: List[dict], admit=None) -> List[tuple]:
+    """Store many safe reports in one write (fields as report_safe, plus optional ref)."""
+    now = datetime.now().isoformat()
+    records = []
+    for r in reports:
+        key = dedupe_key(r.get("ref"), r["name"], r["phone"], r["location"], r["message"])
+        record = {
+            "id": _batch_id(r["phone"], now, key),
+            "name": r["name"],
+            "phone": r["phone"],
+            "location": r["location"],
+            "location_geo": _geocode(r["location"]),
+            "message": r["message"],
+            "lat": r.get("lat"),
+            "lon": r.get("lon"),
+            "reported_at": now,
+            "dedupe_key": key
+        }
+        _fill_coordinates(record, record["location_geo"])
+        records.append(record)
+    cutoff = (datetime.fromisoformat(now) - SAFE_REPORT_DEDUPE_WINDOW).isoformat()
+    return _append_batch(SAFE_REPORTS_FILE, records, lambda r: r.get("reported_at", "") >= cutoff, admit)
+
+def create_resource_request_batch(requests: List[dict], admit=None) -> List[tuple]:
+    """Store many resource requests in one write (fields as create_resource_request, plus optional ref)."""
+    now = datetime.now().isoformat()
+    records = []
+    for q in requests:
+        key = dedupe_key(q.get("ref"), q["phone"], q["resource_type"], q["description"], q["quantity"], q["location"])
+        record = {
+            "id": _batch_id(q["phone"], now, key),
+            "requester_name": q["requester_name"],
+            "phone": q["phone"],
+            "resource_type": q["resource_type"],
+            "description": q["description"],
+            "urgency": q["urgency"],
+            "quantity": q["quantity"],
+            "location": q["location"],
+            "location_geo": _geocode(q["location"]),
+            "lat": q.get("lat"),
+            "lon": q.get("lon"),
+            "status": "pending",
+            "created_at": now,
+            "fulfilled_at": None,
+            "fulfilled_by": None,
+            "dedupe_key": key
+        }
+        _fill_coordinates(record, record["location_geo"])
+        records.append(record)
+    return _append_batch(RESOURCE_REQUESTS_FILE, records, lambda r: r.get("status") == "pending", admit)
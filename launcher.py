@@ -0,0 +1,121 @@
+"""
+Run several app.py workers behind a local load balancer.
+
+Each worker is a separate Python process on its own port, so requests are
+handled in parallel instead of sharing one interpreter. Sessions, caches and the
+data_store registries move to the shared SQLite store so every worker sees the
+same state. The balancer is a plain TCP proxy that pins each client IP to one
+worker, which keeps Gradio's per-connection queue and event stream on a single
+process.
+
+    python launcher.py --workers 4 --port 7860
+"""
+import argparse
+import asyncio
+import hashlib
+import logging
+import os
+import signal
+import subprocess
+import sys
+
+from core.logging_config import configure_logging
+
+logger = logging.getLogger(__name__)
+
+APP_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+
+
+def start_workers(count: int, base_port: int, host: str = "127.0.0.1", metrics_port: int = 9464) -> list:
+    """Start app.py workers on base_port + 1 .. base_port + count.
+
+    Worker i serves Prometheus metrics on metrics_port + i - 1 (0 disables them)
+    and writes its own log file, agent_system.worker<i>.log.
+    """
+    env = dict(os.environ)
+    log_base, log_ext = os.path.splitext(env.get("DRC_LOG_FILE", "agent_system.log"))
+    env.setdefault("DRC_STATE_BACKEND", "sqlite")
+    env.setdefault("DRC_STORAGE_BACKEND", "sqlite")
+    workers = []
+    for i in range(1, count + 1):
+        worker_env = dict(env, GRADIO_SERVER_NAME=host, GRADIO_SERVER_PORT=str(base_port + i),
+                          DRC_METRICS_PORT=str(metrics_port + i - 1) if metrics_port > 0 else "0",
+                          DRC_LOG_FILE=f"{log_base}.worker{i}{log_ext}")
+        workers.append(subprocess.Popen([sys.executable, APP_FILE], env=worker_env))
+    return workers
+
+
+class LoadBalancer:
+    """TCP proxy that spreads clients over workers by a hash of their IP."""
+
+    def __init__(self, backends: list):
+        self.backends = backends
+
+    def pick(self, client_ip: str) -> tuple:
+        digest = hashlib.md5(client_ip.encode()).digest()
+        return self.backends[int.from_bytes(digest[:4], "big") % len(self.backends)]
+
+    async def handle(self, client_reader, client_writer):
+        client_ip = (client_writer.get_extra_info("peername") or ("?",))[0]
+        host, port = self.pick(client_ip)
+        try:
+            upstream_reader, upstream_writer = await asyncio.open_connection(host, port)
+        except OSError as e:
+            logger.warning("Worker %s:%s unavailable: %s", host, port, e)
+            client_writer.close()
+            return
+        await asyncio.gather(
+            self._pipe(client_reader, upstream_writer),
+            self._pipe(upstream_reader, client_writer)
+        )
+
+    @staticmethod
+    async def _pipe(reader, writer):
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                writer.write(data)
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str, port: int):
+        server = await asyncio.start_server(self.handle, host, port)
+        logger.info("Balancing %s:%s over %d workers", host, port, len(self.backends))
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run app workers behind a local load balancer")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--host", default=os.environ.get("GRADIO_SERVER_NAME", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("GRADIO_SERVER_PORT", "7860")))
+    parser.add_argument("--metrics-port", type=int, default=int(os.environ.get("DRC_METRICS_PORT", "9464")))
+    args = parser.parse_args()
+
+    configure_logging()
+    workers = start_workers(args.workers, args.port, metrics_port=args.metrics_port)
+    balancer = LoadBalancer([("127.0.0.1", args.port + i) for i in range(1, args.workers + 1)])
+
+    def shutdown(*_):
+        for worker in workers:
+            worker.terminate()
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, shutdown)
+    try:
+        asyncio.run(balancer.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for worker in workers:
+            worker.terminate()
+
+
+if __name__ == "__main__":
+    main()
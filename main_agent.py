@@ -4,24 +4,104 @@ from agents.evaluator import Evaluator
 from core.context_engineering import ContextEngine
 from core.observability import Observability
 from core.a2a_protocol import Message, A2AProtocol
+from core.message_bus import MessageBus, BusFull
+from core.metrics import count, observe, timed
+from core.tracing import NOOP_SPAN, start_span, start_trace
 from memory.session_memory import SessionMemory
+from memory.response_cache import ResponseCache
+from tools.geo import geohash_encode
+from tools.tools import CATALOG_VERSION
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import logging
+import os
+import threading
 import time
 
+# Workers run concurrently on a shared, bounded pool. Each worker gets its own
+# deadline and the whole fan-out is capped by REQUEST_DEADLINE; whatever has not
+# finished by then is reported to the Evaluator as degraded instead of failing.
+# A running thread cannot be cancelled, so each worker's upstream HTTP calls
+# time out at its deadline too and a straggler gives its pool slot back.
+MAX_WORKER_THREADS = 16
+REQUEST_DEADLINE = 12.0
+WORKER_DEADLINES = {
+    "shelter": 5.0,
+    "food": 5.0,
+    "medical": 12.0,  # Overpass lookup
+    "government": 3.0
+}
+
+_worker_pool = ThreadPoolExecutor(max_workers=MAX_WORKER_THREADS, thread_name_prefix="worker")
+
+# Worker results are shared across requests with the same normalized plan in
+# the same ~5 km geohash tile; distances are recomputed per user on a hit.
+RESPONSE_CACHE_TTL = 300
+RESPONSE_CACHE_SIZE = 1024
+RESPONSE_CACHE_GEOHASH_PRECISION = 5
+
+# One bounded, swept session store for every MainAgent in the process
+_session_memory = SessionMemory()
+
+# Worker results come from the static catalogs, Overpass and Open-Meteo, never
+# from the data_store registries, so only a catalog change drops them. Keying
+# on the store version emptied the cache on every SOS or safe report.
+_response_cache = ResponseCache(
+    max_entries=RESPONSE_CACHE_SIZE,
+    ttl=RESPONSE_CACHE_TTL,
+    version_fn=lambda: CATALOG_VERSION
+)
+
+# DRC_BUS_WORKERS > 0 runs the resource workers in that many separate processes
+# behind the A2A message bus instead of on the in-process thread pool, each
+# process handling up to DRC_BUS_CONCURRENCY lookups at once. Planning and
+# evaluation stay in this process: they are quick and render the streamed sections.
+MESSAGE_BUS_WORKERS = int(os.environ.get("DRC_BUS_WORKERS", "0"))
+MESSAGE_BUS_CONCURRENCY = int(os.environ.get("DRC_BUS_CONCURRENCY", "8"))
+MESSAGE_BUS_SUBMIT_TIMEOUT = 1.0
+
+_message_bus = None
+_message_bus_lock = threading.Lock()
+
+def get_message_bus():
+    """Return the process-wide message bus, or None when it is not enabled."""
+    global _message_bus
+    if MESSAGE_BUS_WORKERS <= 0:
+        return None
+    if _message_bus is None:
+        with _message_bus_lock:
+            if _message_bus is None:
+                _message_bus = MessageBus(build_role_handler, {"planner": 0, "worker": MESSAGE_BUS_WORKERS, "evaluator": 0},
+                                          concurrency={"worker": MESSAGE_BUS_CONCURRENCY})
+    return _message_bus
+
+def build_role_handler(role: str):
+    """Message handler for one bus process; runs in the child process."""
+    agent = MainAgent()
+    return {
+        "planner": agent.handle_planner_message,
+        "worker": agent.handle_worker_message,
+        "evaluator": agent.handle_evaluator_message
+    }[role]
+
 class MainAgent:
-    def __init__(self):
-        self.planner = Planner()
+    def __init__(self, request_deadline: float = REQUEST_DEADLINE, worker_deadlines: dict = None,
+                 response_cache: ResponseCache = None, session_memory: SessionMemory = None,
+                 message_bus: MessageBus = None):
+        self.session_memory = session_memory if session_memory is not None else _session_memory
+        self.context_engine = ContextEngine(self.session_memory)
+        self.planner = Planner(self.context_engine)
+        self.request_deadline = request_deadline
+        self.worker_deadlines = {**WORKER_DEADLINES, **(worker_deadlines or {})}
         self.workers = {
-            "shelter": Worker("shelter"),
-            "food": Worker("food"), 
-            "medical": Worker("medical"),
-            "government": Worker("government")
+            resource_type: Worker(resource_type, http_timeout=self._deadline(resource_type))
+            for resource_type in ("shelter", "food", "medical", "government")
         }
         self.evaluator = Evaluator()
-        self.context_engine = ContextEngine()
-        self.session_memory = SessionMemory()
         self.observability = Observability()
         self.a2a_protocol = A2AProtocol()
+        self.response_cache = response_cache if response_cache is not None else _response_cache
+        self.message_bus = message_bus
+        self.logger = logging.getLogger(__name__)
         
         self.setup_message_handlers()
     
@@ -31,63 +111,242 @@ class MainAgent:
         self.a2a_protocol.register_handler("evaluator", self.handle_evaluator_message)
     
     def handle_message(self, user_input: str, user_lat: float = None, user_lon: float = None) -> dict:
+        final_result = None
+        for event in self.stream_message(user_input, user_lat, user_lon):
+            if event["event"] == "final":
+                final_result = event["result"]
+        return final_result
+    
+    def stream_message(self, user_input: str, user_lat: float = None, user_lon: float = None, trace=None,
+                       lite: bool = False):
+        """Yield pipeline events as they become available.
+
+        Events are dicts with an "event" key:
+        - "header": plan is ready; carries the rendered response header
+        - "section": one worker finished; carries its rendered Markdown and map resources
+        - "final": everything is done; carries the full evaluated result
+
+        ``trace`` is the caller's root span; without one the request gets its own trace.
+        With ``lite``, header and sections carry no Markdown and the final response
+        is the Evaluator's plain-text summary (see Evaluator.render_lite).
+        """
+        root = trace if trace is not None else start_trace("handle_message")
+        try:
+            yield from self._stream(user_input, user_lat, user_lon, root, lite)
+        except Exception as e:
+            root.record_error(e)
+            raise
+        finally:
+            if trace is None:
+                root.end()
+    
+    def _stream(self, user_input: str, user_lat: float, user_lon: float, root, lite: bool = False):
+        # Generators may resume on another thread, so spans get their parent explicitly
         start_time = time.time()
         
         session_id = self.session_memory.create_session(user_input)
-        self.observability.log_agent_activity("main_agent", "process_start", session_id, {"user_input": user_input})
+        root.set_attribute("session_id", session_id)
+        self.observability.log_agent_activity("main_agent", "process_start", session_id,
+                                              {"user_input": user_input, "trace_id": root.trace_id})
         
         # Pass user coordinates to the planner
-        plan = self.planner.create_plan(user_input, session_id, user_lat, user_lon)
+        with timed("planner"), start_span("planner.create_plan", root):
+            plan = self.planner.create_plan(user_input, session_id, user_lat, user_lon)
+        yield {"event": "header", "plan": plan, "markdown": "" if lite else self.evaluator.render_header(plan)}
+        
+        cache_key = self._cache_key(plan)
+        cached_results = self.response_cache.get(cache_key)
+        count("response_cache", "miss" if cached_results is None else "hit")
+        root.set_attribute("cache_hit", cached_results is not None)
+        if cached_results is not None:
+            worker_iter = (self._personalize(r, plan) for r in cached_results)
+        else:
+            worker_iter = self._iter_workers(plan, root)
         
-        worker_results = []
+        results_by_type = {}
         all_map_resources = []
+        for result in worker_iter:
+            resource_type = result.get("resource_type")
+            results_by_type[resource_type] = result
+            if lite:
+                yield {"event": "section", "resource_type": resource_type, "markdown": "", "map_resources": []}
+                continue
+            map_resources = self._collect_map_resources(result)
+            all_map_resources.extend(map_resources)
+            with timed("render_section", resource_type), start_span("evaluator.render_section", root, resource_type=resource_type):
+                markdown = self.evaluator.render_section(result, plan)
+            yield {
+                "event": "section",
+                "resource_type": resource_type,
+                "markdown": markdown,
+                "map_resources": map_resources
+            }
         
-        for resource_type in plan.get("resource_types", []):
-            if resource_type in self.workers:
-                worker = self.workers[resource_type]
-                result = worker.execute_task(plan)
-                worker_results.append(result)
-                
-                # Collect resources for map display
-                for item in result.get("results", []):
-                    if item.get("lat") and item.get("lon"):
-                        all_map_resources.append({
-                            "type": resource_type,
-                            "name": item.get("name", "Unknown"),
-                            "address": item.get("address", ""),
-                            "lat": item.get("lat"),
-                            "lon": item.get("lon"),
-                            "details": item.get("details", "")
-                        })
+        worker_results = [results_by_type[rt] for rt in self._plan_resource_types(plan)]
+        if cached_results is None and not any(r.get("degraded") for r in worker_results):
+            self.response_cache.put(cache_key, worker_results)
         
-        final_result = self.evaluator.evaluate_results(worker_results, plan)
+        with timed("evaluator"), start_span("evaluator.evaluate_results", root):
+            final_result = self.evaluator.evaluate_results(worker_results, plan, lite=lite)
         final_result["map_resources"] = all_map_resources
         
         end_time = time.time()
-        self.observability.log_performance_metrics("handle_message", start_time, end_time, True)
+        outcome = "cache_hit" if cached_results is not None else ("degraded" if final_result.get("degraded") else "ok")
+        self.observability.log_performance_metrics("handle_message", start_time, end_time, True, outcome=outcome)
         self.observability.log_agent_activity("main_agent", "process_complete", session_id, {
             "resource_count": final_result.get("resource_count", 0),
-            "confidence": final_result.get("evaluation_confidence", 0)
+            "confidence": final_result.get("evaluation_confidence", 0),
+            "degraded": final_result.get("degraded", []),
+            "cache_hit": cached_results is not None,
+            "trace_id": root.trace_id
         })
         
-        return final_result
+        yield {"event": "final", "result": final_result}
+    
+    def _cache_key(self, plan: dict) -> tuple:
+        coords = plan.get("user_coordinates", {})
+        lat, lon = coords.get("lat"), coords.get("lon")
+        tile = geohash_encode(lat, lon, RESPONSE_CACHE_GEOHASH_PRECISION) if lat and lon else None
+        return (
+            tuple(sorted(self._plan_resource_types(plan))),
+            plan.get("priority", "medium"),
+            plan.get("disaster_type", "general"),
+            tile
+        )
+    
+    def _personalize(self, result: dict, plan: dict) -> dict:
+        """Recompute per-user details (distances) on a cached worker result."""
+        worker = self.workers.get(result.get("resource_type"))
+        if worker:
+            worker.refresh_distances(result, plan)
+        result["timestamp"] = plan.get("timestamp")
+        return result
+    
+    def _plan_resource_types(self, plan: dict) -> list:
+        return [rt for rt in plan.get("resource_types", []) if rt in self.workers]
+    
+    def _collect_map_resources(self, result: dict) -> list:
+        resources = []
+        for item in result.get("results", []):
+            if item.get("lat") and item.get("lon"):
+                resources.append({
+                    "type": result.get("resource_type"),
+                    "name": item.get("name", "Unknown"),
+                    "address": item.get("address", ""),
+                    "lat": item.get("lat"),
+                    "lon": item.get("lon"),
+                    "details": item.get("details", "")
+                })
+        return resources
+    
+    def _iter_workers(self, plan: dict, trace=None):
+        """Run the plan's workers concurrently, yielding results as they finish.
+
+        A worker that misses its deadline (or raises) is replaced by an empty,
+        degraded result so the Evaluator can still answer with what did finish.
+        """
+        start = time.monotonic()
+        
+        pending = {}
+        deadlines = {}
+        for resource_type in self._plan_resource_types(plan):
+            try:
+                future = self._submit_worker(resource_type, plan, trace)
+            except BusFull:
+                self.logger.warning("%s worker queue is full", resource_type)
+                count("worker", "busy")
+                yield self._degraded_result(resource_type, plan, "busy")
+                continue
+            pending[future] = resource_type
+            deadlines[future] = start + self._deadline(resource_type)
+        
+        while pending:
+            timeout = max(0.0, min(deadlines[f] for f in pending) - time.monotonic())
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+            
+            for future in done:
+                resource_type = pending.pop(future)
+                try:
+                    result = future.result()
+                    outcome = "ok"
+                except Exception as e:
+                    self.logger.error("%s worker failed: %s", resource_type, e)
+                    result = self._degraded_result(resource_type, plan, "error")
+                    outcome = "error"
+                observe("worker", time.monotonic() - start, resource_type, outcome)
+                yield result
+            
+            now = time.monotonic()
+            for future in [f for f in pending if deadlines[f] <= now]:
+                resource_type = pending.pop(future)
+                if not future.cancel():
+                    count("worker", "straggler")
+                self.logger.warning("%s worker missed its deadline", resource_type)
+                observe("worker", now - start, resource_type, "timeout")
+                yield self._degraded_result(resource_type, plan, "timeout")
+    
+    def _deadline(self, resource_type: str) -> float:
+        return min(self.worker_deadlines.get(resource_type, self.request_deadline), self.request_deadline)
+    
+    def _submit_worker(self, resource_type: str, plan: dict, trace=None):
+        if self.message_bus is None:
+            return _worker_pool.submit(self._run_worker, resource_type, plan, trace)
+        message = Message("", plan.get("session_id", ""), "main_agent", "worker", "execute_task",
+                          {"resource_type": resource_type, "plan": plan}, 0,
+                          "high" if plan.get("priority") == "high" else "medium",
+                          trace_context=trace.context() if trace is not None else None)
+        return self.message_bus.submit(message, timeout=MESSAGE_BUS_SUBMIT_TIMEOUT)
+    
+    def _run_worker(self, resource_type: str, plan: dict, trace=None):
+        span = start_span("worker.execute_task", trace, resource_type=resource_type) if trace is not None else NOOP_SPAN
+        with span:
+            return self.workers[resource_type].execute_task(plan)
+    
+    def _degraded_result(self, resource_type: str, plan: dict, reason: str) -> dict:
+        return {
+            "resource_type": resource_type,
+            "results": [],
+            "confidence": 0.0,
+            "degraded": True,
+            "degraded_reason": reason,
+            "timestamp": plan.get("timestamp")
+        }
     
     def handle_planner_message(self, message: Message) -> dict:
-        return {"status": "planner_message_processed"}
+        payload = message.payload
+        return self.planner.create_plan(payload["user_input"], message.session_id,
+                                        payload.get("user_lat"), payload.get("user_lon"))
     
     def handle_worker_message(self, message: Message) -> dict:
-        return {"status": "worker_message_processed"}
+        resource_type = message.payload["resource_type"]
+        if resource_type not in self.workers:
+            raise ValueError(f"Unknown worker type: {resource_type}")
+        return self.workers[resource_type].execute_task(message.payload["plan"])
     
     def handle_evaluator_message(self, message: Message) -> dict:
-        return {"status": "evaluator_message_processed"}
+        return self.evaluator.evaluate_results(message.payload["results"], message.payload["plan"])
 
 def run_agent(user_input: str):
-    agent = MainAgent()
+    agent = MainAgent(message_bus=get_message_bus())
     result = agent.handle_message(user_input)
     return result["final_response"]
 
 def run_agent_with_location(user_input: str, latitude: float = None, longitude: float = None):
     """Run agent with user's location for map display."""
-    agent = MainAgent()
+    agent = MainAgent(message_bus=get_message_bus())
     result = agent.handle_message(user_input, latitude, longitude)
     return result["final_response"], result.get("map_resources", [])
+
+def response_cache_stats() -> dict:
+    """Hit-rate and size metrics for the shared response cache."""
+    return _response_cache.stats()
+
+def session_memory_stats() -> dict:
+    """Size, eviction and hit-rate metrics for the shared session store."""
+    return _session_memory.stats()
+
+def stream_agent_with_location(user_input: str, latitude: float = None, longitude: float = None, trace=None,
+                               lite: bool = False):
+    """Stream agent events (see MainAgent.stream_message) for incremental display."""
+    agent = MainAgent(message_bus=get_message_bus())
+    yield from agent.stream_message(user_input, latitude, longitude, trace, lite)
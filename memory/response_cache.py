@@ -0,0 +1,79 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResponseCache:
+    """LRU + TTL cache of worker results for near-identical requests.
+
+    Entries are keyed by the normalized plan (resource types, priority, disaster
+    type) and a geohash tile of the user's coordinates. ``version_fn`` returns a
+    token describing the backing data (e.g. the resource catalog); when it
+    changes the whole cache is dropped.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl: int = 300, version_fn=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.version_fn = version_fn
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = version_fn() if version_fn else None
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        with self._lock:
+            self._check_version()
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if time.time() - entry["stored_at"] >= self.ttl:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(entry["data"])
+
+    def put(self, key, data):
+        with self._lock:
+            self._check_version()
+            self._entries[key] = {"data": copy.deepcopy(data), "stored_at": time.time()}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "expirations": self.expirations,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
+
+    def _check_version(self):
+        if not self.version_fn:
+            return
+        version = self.version_fn()
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+            self.invalidations += 1
@@ -1,15 +1,90 @@
 import uuid
+import sys
 import time
+import threading
+import weakref
+from collections import OrderedDict
 from datetime import datetime
+from memory.shared_store import SharedStore, get_shared_store, shared_state_enabled
+
+# Sessions expire after SESSION_TTL seconds without access; cached data after its
+# own ttl. Both stores are also LRU-bounded by entry count and by an approximate
+# byte budget, and a background thread sweeps expired entries. With a shared
+# store (DRC_STATE_BACKEND=sqlite) writes go through to it and local misses are
+# read from it, so several app processes see the same sessions and cached data.
+# Session access times are written through at most every ACCESS_PERSIST_INTERVAL
+# seconds, so the shared copy of an active session does not expire.
+MAX_SESSIONS = 10000
+SESSION_TTL = 1800
+ACCESS_PERSIST_INTERVAL = 60
+MAX_CACHE_ENTRIES = 1000
+MAX_BYTES = 64 * 1024 * 1024
+SWEEP_INTERVAL = 60
+
+_instances = weakref.WeakSet()
+_sweeper = None
+_sweeper_lock = threading.Lock()
+_sweeper_stop = threading.Event()
+
+
+def _sweep_loop():
+    while not _sweeper_stop.wait(SWEEP_INTERVAL):
+        for memory in list(_instances):
+            memory.sweep()
+
+
+def _start_sweeper():
+    global _sweeper
+    with _sweeper_lock:
+        if _sweeper is None or not _sweeper.is_alive():
+            _sweeper_stop.clear()
+            _sweeper = threading.Thread(target=_sweep_loop, name="session-sweeper", daemon=True)
+            _sweeper.start()
+
+
+def stop_sweeper():
+    """Stop the background sweeper (it restarts with the next SessionMemory)."""
+    _sweeper_stop.set()
+
+
+def _estimate_size(obj, depth: int = 0) -> int:
+    """Approximate deep size in bytes of session/cache payloads."""
+    size = sys.getsizeof(obj)
+    if depth > 6:
+        return size
+    if isinstance(obj, dict):
+        size += sum(_estimate_size(k, depth + 1) + _estimate_size(v, depth + 1) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(_estimate_size(item, depth + 1) for item in obj)
+    return size
+
 
 class SessionMemory:
-    def __init__(self):
-        self.sessions = {}
-        self.cache = {}
-        
+    def __init__(self, max_sessions: int = MAX_SESSIONS, session_ttl: int = SESSION_TTL,
+                 max_cache_entries: int = MAX_CACHE_ENTRIES, max_bytes: int = MAX_BYTES,
+                 shared_store: SharedStore = None):
+        self.sessions = OrderedDict()
+        self.cache = OrderedDict()
+        self.max_sessions = max_sessions
+        self.session_ttl = session_ttl
+        self.max_cache_entries = max_cache_entries
+        self.max_bytes = max_bytes
+        if shared_store is None and shared_state_enabled():
+            shared_store = get_shared_store()
+        self.shared_store = shared_store
+        self._lock = threading.RLock()
+        self._sizes = {}
+        self._bytes = 0
+        self._persisted = {}  # session_id -> when it was last written to the shared store
+        self.hits = 0
+        self.misses = 0
+        self.evictions = {"lru": 0, "ttl": 0, "bytes": 0}
+        _instances.add(self)
+        _start_sweeper()
+
     def create_session(self, user_input: str) -> str:
         session_id = str(uuid.uuid4())
-        self.sessions[session_id] = {
+        session = {
             "session_id": session_id,
             "created_at": datetime.now(),
             "user_input": user_input,
@@ -17,32 +92,163 @@ class SessionMemory:
             "interactions": [],
             "last_accessed": time.time()
         }
+        with self._lock:
+            self.sessions[session_id] = session
+            self._account(("session", session_id), session)
+            self._enforce_bounds()
+            self._persisted[session_id] = session["last_accessed"]
+        if self.shared_store:
+            self.shared_store.set("session", session_id, session, ttl=self.session_ttl)
         return session_id
-    
+
     def get_session(self, session_id: str) -> dict:
-        session = self.sessions.get(session_id)
-        if session:
-            session["last_accessed"] = time.time()
+        with self._lock:
+            session = self._touch_session(session_id)
+        if session is None and self.shared_store:
+            # Only a local miss reads SQLite: another process may have created the session
+            shared = self.shared_store.get("session", session_id)
+            if shared is not None:
+                with self._lock:
+                    if session_id not in self.sessions:
+                        self.sessions[session_id] = shared
+                        self._account(("session", session_id), shared)
+                        self._enforce_bounds()
+                        self._persisted[session_id] = shared["last_accessed"]
+                    session = self._touch_session(session_id)
+        if session is not None and self.shared_store:
+            self._persist_access(session_id, session)
         return session
-    
+
     def update_session(self, session_id: str, updates: dict):
-        if session_id in self.sessions:
-            self.sessions[session_id].update(updates)
-            self.sessions[session_id]["last_accessed"] = time.time()
-    
+        if session_id not in self.sessions:
+            self.get_session(session_id)
+        with self._lock:
+            session = self.sessions.get(session_id)
+            if session is None:
+                return
+            session.update(updates)
+            session["last_accessed"] = time.time()
+            self.sessions.move_to_end(session_id)
+            self._account(("session", session_id), session)
+            self._enforce_bounds()
+            self._persisted[session_id] = session["last_accessed"]
+        if self.shared_store:
+            self.shared_store.set("session", session_id, session, ttl=self.session_ttl)
+
     def cache_resource_data(self, key: str, data: list, ttl: int = 3600):
-        self.cache[key] = {
+        entry = {
             "data": data,
             "timestamp": time.time(),
             "ttl": ttl
         }
-    
+        with self._lock:
+            self.cache[key] = entry
+            self.cache.move_to_end(key)
+            self._account(("cache", key), entry)
+            self._enforce_bounds()
+        if self.shared_store:
+            self.shared_store.set("cache", key, entry, ttl=ttl)
+
     def get_cached_data(self, key: str) -> list:
         cached = self.cache.get(key)
-        if cached and (time.time() - cached["timestamp"]) < cached["ttl"]:
-            return cached["data"]
-        return None
-    
+        if cached is None and self.shared_store:
+            # Read SQLite outside the lock
+            cached = self.shared_store.get("cache", key)
+        with self._lock:
+            if cached is not None and key not in self.cache:
+                self.cache[key] = cached
+                self._account(("cache", key), cached)
+                self._enforce_bounds()
+            cached = self.cache.get(key)
+            if cached and (time.time() - cached["timestamp"]) < cached["ttl"]:
+                self.cache.move_to_end(key)
+                self.hits += 1
+                return cached["data"]
+            if cached:
+                self._remove(("cache", key))
+                self.evictions["ttl"] += 1
+            self.misses += 1
+            return None
+
+    def sweep(self) -> int:
+        """Drop expired sessions and cache entries; returns how many were removed."""
+        now = time.time()
+        with self._lock:
+            expired = [("session", sid) for sid, s in self.sessions.items() if self._session_expired(s, now)]
+            expired += [("cache", key) for key, c in self.cache.items() if now - c["timestamp"] >= c["ttl"]]
+            for slot in expired:
+                self._remove(slot)
+            self.evictions["ttl"] += len(expired)
+        if self.shared_store:
+            self.shared_store.sweep()
+        return len(expired)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "sessions": len(self.sessions),
+                "cache_entries": len(self.cache),
+                "approx_bytes": self._bytes,
+                "cache_hits": self.hits,
+                "cache_misses": self.misses,
+                "cache_hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": dict(self.evictions),
+                "backend": "sqlite" if self.shared_store else "memory"
+            }
+
+    def _touch_session(self, session_id: str):
+        """The local session marked as just used, or None if it is absent or expired (holds _lock)."""
+        session = self.sessions.get(session_id)
+        if session is None:
+            return None
+        if self._session_expired(session):
+            self._remove(("session", session_id))
+            self.evictions["ttl"] += 1
+            return None
+        session["last_accessed"] = time.time()
+        self.sessions.move_to_end(session_id)
+        return session
+
+    def _persist_access(self, session_id: str, session: dict):
+        """Write the session's access time through, at most every ACCESS_PERSIST_INTERVAL seconds."""
+        with self._lock:
+            if session["last_accessed"] - self._persisted.get(session_id, 0) < ACCESS_PERSIST_INTERVAL:
+                return
+            self._persisted[session_id] = session["last_accessed"]
+        self.shared_store.set("session", session_id, session, ttl=self.session_ttl)
+
+    def _session_expired(self, session: dict, now: float = None) -> bool:
+        return ((now or time.time()) - session["last_accessed"]) >= self.session_ttl
+
+    def _store(self, kind: str) -> OrderedDict:
+        return self.sessions if kind == "session" else self.cache
+
+    def _account(self, slot: tuple, value):
+        size = _estimate_size(value)
+        self._bytes += size - self._sizes.get(slot, 0)
+        self._sizes[slot] = size
+
+    def _remove(self, slot: tuple):
+        kind, key = slot
+        self._store(kind).pop(key, None)
+        self._bytes -= self._sizes.pop(slot, 0)
+        if kind == "session":
+            self._persisted.pop(key, None)
+
+    def _enforce_bounds(self):
+        while len(self.sessions) > self.max_sessions:
+            self._remove(("session", next(iter(self.sessions))))
+            self.evictions["lru"] += 1
+        while len(self.cache) > self.max_cache_entries:
+            self._remove(("cache", next(iter(self.cache))))
+            self.evictions["lru"] += 1
+        while self._bytes > self.max_bytes and (self.sessions or self.cache):
+            # Cached data is cheaper to lose than a live session
+            kind = "cache" if self.cache else "session"
+            self._remove((kind, next(iter(self._store(kind)))))
+            self.evictions["bytes"] += 1
+
     def _extract_location(self, user_input: str) -> dict:
         location_keywords = ["downtown", "northside", "eastside", "westside", "central"]
         for location in location_keywords:
@@ -0,0 +1,223 @@
+"""
+Shared state for running several app processes on one machine.
+
+SharedStore keeps sessions, caches and the data_store registries in one SQLite
+database in WAL mode: readers never block the single writer, and writes from
+different processes are serialized by SQLite's own locking. Registries are
+stored one row per record, so a write rewrites only the records that changed;
+data_store runs each read-modify-write in ``transaction()`` (BEGIN IMMEDIATE).
+Values are JSON, never pickle: any process that can write the database file
+must not be able to run code in the others. Select it with
+
+    DRC_STATE_BACKEND=sqlite   (sessions and caches)
+    DRC_STORAGE_BACKEND=sqlite (data_store registries)
+    DRC_STATE_PATH=/path/to/shared_state.db
+"""
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+STATE_BACKEND = os.environ.get("DRC_STATE_BACKEND", "memory")
+STATE_PATH = os.environ.get(
+    "DRC_STATE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "shared_state.db")
+)
+
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS kv (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    expires_at REAL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE INDEX IF NOT EXISTS kv_expires ON kv (expires_at);
+CREATE TABLE IF NOT EXISTS records (
+    collection TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (collection, position)
+);
+CREATE TABLE IF NOT EXISTS collection_versions (
+    name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _json_object(obj: dict):
+    if len(obj) == 1 and "__datetime__" in obj:
+        return datetime.fromisoformat(obj["__datetime__"])
+    return obj
+
+
+def _encode(value) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=_json_default)
+
+
+def _decode(text: str):
+    return json.loads(text, object_hook=_json_object)
+
+
+class SharedStore:
+    """Process-safe key/value and collection store backed by SQLite WAL."""
+
+    def __init__(self, path: str = STATE_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._local = threading.local()
+        self._connection().executescript(_SCHEMA)
+        with self.transaction() as conn:
+            if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+                self._migrate(conn)
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _migrate(self, conn: sqlite3.Connection):
+        """Move a database written by an older version (pickled blobs) to JSON rows.
+
+        The old registries are this app's own data, so they are unpickled once
+        here; old sessions and caches are dropped.
+        """
+        conn.execute("DELETE FROM kv")
+        if not conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'collections'").fetchone():
+            return
+        for name, data in conn.execute("SELECT name, data FROM collections").fetchall():
+            self._write_records(conn, name, [], [_encode(record) for record in pickle.loads(data)])
+        conn.execute("DROP TABLE collections")
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread; SQLite connections must not be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """Hold the database write lock for a read-modify-write sequence."""
+        conn = self._connection()
+        if getattr(self._local, "depth", 0):
+            self._local.depth += 1
+            try:
+                yield conn
+            finally:
+                self._local.depth -= 1
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        self._local.depth = 1
+        self._local.loaded = {}
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            self._local.depth = 0
+            self._local.loaded = {}
+
+    # ==================== KEY/VALUE ====================
+    def get(self, namespace: str, key: str):
+        row = self._connection().execute(
+            "SELECT value, expires_at FROM kv WHERE namespace = ? AND key = ?", (namespace, key)
+        ).fetchone()
+        if row is None:
+            return None
+        if row[1] is not None and row[1] <= time.time():
+            self.delete(namespace, key)
+            return None
+        return _decode(row[0])
+
+    def set(self, namespace: str, key: str, value, ttl: float = None):
+        expires_at = time.time() + ttl if ttl else None
+        self._connection().execute(
+            "INSERT OR REPLACE INTO kv (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+            (namespace, key, _encode(value), expires_at)
+        )
+
+    def delete(self, namespace: str, key: str):
+        self._connection().execute("DELETE FROM kv WHERE namespace = ? AND key = ?", (namespace, key))
+
+    def sweep(self) -> int:
+        """Delete expired keys in every namespace; returns how many were removed."""
+        cursor = self._connection().execute(
+            "DELETE FROM kv WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),)
+        )
+        return cursor.rowcount
+
+    def count(self, namespace: str) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM kv WHERE namespace = ?", (namespace,)).fetchone()[0]
+
+    # ==================== COLLECTIONS ====================
+    def load_collection(self, name: str) -> list:
+        rows = [text for text, in self._connection().execute(
+            "SELECT data FROM records WHERE collection = ? ORDER BY position", (name,)
+        )]
+        if getattr(self._local, "depth", 0):
+            # Inside a read-modify-write: save_collection compares against these rows
+            self._local.loaded[name] = rows
+        return [_decode(text) for text in rows]
+
+    def save_collection(self, name: str, data: list):
+        """Replace a collection, writing only the records that changed."""
+        with self.transaction() as conn:
+            old = self._local.loaded.pop(name, None)
+            if old is None:
+                old = [text for text, in conn.execute(
+                    "SELECT data FROM records WHERE collection = ? ORDER BY position", (name,)
+                )]
+            self._write_records(conn, name, old, [_encode(record) for record in data])
+
+    def _write_records(self, conn: sqlite3.Connection, name: str, old: list, new: list):
+        conn.executemany(
+            "INSERT OR REPLACE INTO records (collection, position, data) VALUES (?, ?, ?)",
+            [(name, i, text) for i, text in enumerate(new) if i >= len(old) or old[i] != text]
+        )
+        if len(new) < len(old):
+            conn.execute("DELETE FROM records WHERE collection = ? AND position >= ?", (name, len(new)))
+        conn.execute(
+            "INSERT INTO collection_versions (name, version) VALUES (?, 1) "
+            "ON CONFLICT(name) DO UPDATE SET version = version + 1",
+            (name,)
+        )
+
+    def collections_version(self) -> int:
+        """Total number of collection writes from any process."""
+        return self._connection().execute(
+            "SELECT COALESCE(SUM(version), 0) FROM collection_versions"
+        ).fetchone()[0]
+
+
+_shared_store = None
+_shared_store_lock = threading.Lock()
+
+
+def get_shared_store(path: str = None) -> SharedStore:
+    """Return the process-wide SharedStore (created on first use)."""
+    global _shared_store
+    if _shared_store is None:
+        with _shared_store_lock:
+            if _shared_store is None:
+                _shared_store = SharedStore(path or STATE_PATH)
+    return _shared_store
+
+
+def shared_state_enabled() -> bool:
+    return STATE_BACKEND == "sqlite"
@@ -0,0 +1,10 @@
+import os
+import tempfile
+
+# Registries, tiles, traces and logs are placed at import time; keep them out of the checkout
+_scratch = tempfile.mkdtemp(prefix="drc-tests-")
+os.environ.setdefault("DRC_DATA_DIR", os.path.join(_scratch, "data"))
+os.environ.setdefault("DRC_TILE_CACHE_DIR", os.path.join(_scratch, "tiles"))
+os.environ.setdefault("DRC_TRACE_FILE", os.path.join(_scratch, "traces.jsonl"))
+os.environ.setdefault("DRC_PROFILE_DIR", os.path.join(_scratch, "profiles"))
+os.environ.setdefault("DRC_LOG_FILE", os.path.join(_scratch, "agent_system.log"))
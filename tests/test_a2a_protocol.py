@@ -0,0 +1,45 @@
+from core.a2a_protocol import A2AProtocol, Message
+
+
+def _message(recipient: str, priority: str, label: str) -> Message:
+    return Message("", "session", "main_agent", recipient, "execute_task", {"label": label}, 0, priority)
+
+
+def test_higher_priority_first_and_fifo_within_a_priority():
+    protocol = A2AProtocol()
+    for label, priority in [("m1", "medium"), ("l1", "low"), ("h1", "high"), ("m2", "medium"),
+                            ("c1", "critical"), ("h2", "high"), ("x1", "unknown")]:
+        protocol.send_message(_message("worker", priority, label))
+
+    received = [protocol.receive_message("worker").payload["label"] for _ in range(protocol.pending("worker"))]
+
+    assert received == ["c1", "h1", "h2", "m1", "m2", "x1", "l1"]
+
+
+def test_each_recipient_has_its_own_queue():
+    protocol = A2AProtocol()
+    protocol.send_message(_message("worker", "low", "w1"))
+    protocol.send_message(_message("planner", "critical", "p1"))
+
+    assert protocol.receive_message("worker").payload["label"] == "w1"
+    assert protocol.receive_message("worker") is None
+    assert protocol.stats()["depth_by_agent"] == {"worker": 0, "planner": 1}
+
+
+def test_failed_messages_stay_queued_in_order():
+    protocol = A2AProtocol()
+    handled = []
+
+    def handler(message):
+        handled.append(message.payload["label"])
+        if message.payload["label"] != "h1":
+            raise RuntimeError("upstream down")
+
+    protocol.register_handler("worker", handler)
+    for label, priority in [("m1", "medium"), ("h1", "high"), ("m2", "medium")]:
+        protocol.send_message(_message("worker", priority, label))
+    protocol.process_messages()
+
+    assert handled == ["h1", "m1", "m2"]
+    assert [m.payload["label"] for m in protocol.message_queue] == ["m1", "m2"]
+    assert protocol.stats()["failed"] == 2
@@ -0,0 +1,86 @@
+from datetime import timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import api
+import data_store
+from core import batch_ingest, rate_limit
+from core.rate_limit import Budget, RateLimiter
+
+GATEWAY_KEY = "test-gateway"
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    monkeypatch.setattr(data_store, "SOS_ALERTS_FILE", str(tmp_path / "sos_alerts.json"))
+    monkeypatch.setattr(data_store, "SAFE_REPORTS_FILE", str(tmp_path / "safe_reports.json"))
+    monkeypatch.setattr(api, "GATEWAY_KEY", GATEWAY_KEY)
+    monkeypatch.setattr(batch_ingest, "RATE_LIMIT_ENABLED", False)
+    app = FastAPI()
+    api.install(app)
+    return TestClient(app)
+
+
+def _post(client, kind: str, records: list, key: str = GATEWAY_KEY):
+    return client.post(f"/api/batch/{kind}", json={"records": records}, headers={"X-Gateway-Key": key})
+
+
+def test_each_record_is_validated_on_its_own(client):
+    response = _post(client, "sos", [
+        {"ref": "gw-1", "phone": "+91 98765 43210", "message": "trapped on roof", "emergency_type": "Trapped"},
+        {"ref": "gw-2", "phone": "12", "message": "help"},
+        {"ref": "gw-3", "phone": "+91 98765 43211", "lat": 123},
+        {"ref": "gw-4", "phone": "+91 98765 43212", "emergency_type": "Tsunami"},
+    ])
+
+    body = response.json()
+    assert response.status_code == 200
+    assert (body["created"], body["invalid"]) == (1, 3)
+    assert [r["status"] for r in body["results"]] == ["created", "invalid", "invalid", "invalid"]
+    assert body["results"][1]["error"] == "phone: at least 6 digits"
+    assert body["results"][2]["error"].startswith("lat:")
+    assert len(data_store._load_json(data_store.SOS_ALERTS_FILE)) == 1
+
+
+def test_gateway_retries_and_repeated_messages_are_duplicates(client):
+    sos = {"phone": "+91 98765 43210", "message": "water rising", "emergency_type": "Flood"}
+    first = _post(client, "sos", [{**sos, "ref": "gw-1"}, sos, sos]).json()
+    retry = _post(client, "sos", [{**sos, "ref": "gw-1"}, sos]).json()
+
+    assert [r["status"] for r in first["results"]] == ["created", "created", "duplicate"]
+    assert [r["status"] for r in retry["results"]] == ["duplicate", "duplicate"]
+    assert retry["results"][0]["id"] == first["results"][0]["id"]
+    assert retry["results"][1]["id"] == first["results"][1]["id"]
+    assert len(data_store._load_json(data_store.SOS_ALERTS_FILE)) == 2
+
+
+def test_duplicates_do_not_use_up_the_rate_limit(client, monkeypatch):
+    monkeypatch.setattr(batch_ingest, "RATE_LIMIT_ENABLED", True)
+    limiter = RateLimiter({"report_safe_status": {"phone": Budget(burst=1, per_minute=1e-6)}})
+    monkeypatch.setattr(rate_limit, "_limiter", limiter)
+    report = {"ref": "gw-1", "name": "Asha", "phone": "+91 98765 43210", "location": "Kurla"}
+
+    assert _post(client, "safe", [report]).json()["created"] == 1
+    assert _post(client, "safe", [report]).json()["duplicate"] == 1
+    assert _post(client, "safe", [{**report, "ref": "gw-2"}]).json()["rate_limited"] == 1
+
+
+def test_gateway_key_and_batch_size_are_enforced(client, monkeypatch):
+    assert _post(client, "sos", [], key="wrong").status_code == 403
+    assert _post(client, "unknown", []).status_code == 404
+    monkeypatch.setattr(batch_ingest, "MAX_BATCH", 1)
+    assert _post(client, "sos", [{"phone": "+91 98765 43210"}] * 2).status_code == 413
+    monkeypatch.setattr(api, "GATEWAY_KEY", "")
+    assert _post(client, "sos", []).status_code == 503
+
+
+def test_repeated_safe_report_is_new_after_the_dedupe_window(client, monkeypatch):
+    report = {"name": "Asha", "phone": "+91 98765 43210", "location": "Kurla", "message": "All fine"}
+    assert _post(client, "safe", [report]).json()["created"] == 1
+    assert _post(client, "safe", [report]).json()["duplicate"] == 1
+
+    monkeypatch.setattr(data_store, "SAFE_REPORT_DEDUPE_WINDOW", timedelta(0))
+    assert _post(client, "safe", [report]).json()["created"] == 1
+    assert _post(client, "safe", [{**report, "ref": "gw-1"}, {**report, "ref": "gw-1"}]).json()["duplicate"] == 1
@@ -0,0 +1,13 @@
+from core.intent_classifier import classify_intent
+
+
+def test_bare_now_is_urgent():
+    assert classify_intent("need shelter now").urgency == "high"
+    assert classify_intent("need shelter right now").urgency == "high"
+    assert classify_intent("I know the snow is deep, need shelter").urgency == "medium"
+
+
+def test_home_means_shelter_only_when_it_was_lost():
+    assert "shelter" in classify_intent("we lost our home in the flood, need food").resource_types
+    assert "shelter" in classify_intent("family is homeless after the cyclone").resource_types
+    assert "shelter" not in classify_intent("I am home safe but need medicine").resource_types
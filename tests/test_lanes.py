@@ -0,0 +1,73 @@
+import threading
+import time
+
+import pytest
+
+from core import lanes
+from core.lanes import Lane, LaneBusy, LaneScheduler, in_lane
+
+
+def _lanes(max_wait: float = 0.05) -> dict:
+    return {
+        "life_safety": Lane("life_safety", 0, concurrency=4, max_waiting=10, max_wait=5.0),
+        "reads": Lane("reads", 1, concurrency=4, max_waiting=1, max_wait=max_wait),
+        "upstream": Lane("upstream", 2, concurrency=4, max_waiting=1, max_wait=max_wait),
+    }
+
+
+def test_reserved_slots_stay_free_for_life_safety():
+    scheduler = LaneScheduler(_lanes(), total_slots=4, reserve=2)
+    scheduler.acquire("upstream")
+    scheduler.acquire("reads")
+
+    with pytest.raises(LaneBusy):
+        scheduler.acquire("upstream")
+    scheduler.acquire("life_safety")
+    scheduler.acquire("life_safety")
+    assert scheduler.stats()["life_safety"] == {"active": 2, "waiting": 0}
+
+
+def test_freed_slot_goes_to_the_highest_priority_waiter():
+    scheduler = LaneScheduler(_lanes(max_wait=5.0), total_slots=1, reserve=0)
+    scheduler.acquire("reads")
+    order = []
+
+    def wait_for(name):
+        scheduler.acquire(name)
+        order.append(name)
+        scheduler.release(name)
+
+    upstream = threading.Thread(target=wait_for, args=("upstream",))
+    upstream.start()
+    while scheduler.stats()["upstream"]["waiting"] == 0:
+        time.sleep(0.005)
+    sos = threading.Thread(target=wait_for, args=("life_safety",))
+    sos.start()
+    while scheduler.stats()["life_safety"]["waiting"] == 0:
+        time.sleep(0.005)
+    scheduler.release("reads")
+    upstream.join(5)
+    sos.join(5)
+
+    assert order == ["life_safety", "upstream"]
+
+
+def test_full_lane_gets_the_busy_reply(monkeypatch):
+    scheduler = LaneScheduler(_lanes(), total_slots=1, reserve=0)
+    monkeypatch.setattr(lanes, "_scheduler", scheduler)
+    scheduler.acquire("reads")
+
+    @in_lane("upstream", "busy")
+    def lookup():
+        return "found"
+
+    @in_lane("upstream", "busy")
+    def stream():
+        yield "found"
+
+    assert lookup() == "busy"
+    assert list(stream()) == ["busy"]
+    scheduler.release("reads")
+    assert lookup() == "found"
+    assert list(stream()) == ["found"]
+    assert scheduler.stats()["upstream"] == {"active": 0, "waiting": 0}
@@ -0,0 +1,93 @@
+import re
+from urllib.parse import urlencode
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import api
+from agents.evaluator import LITE_TOP_N, Evaluator
+from core import lite
+
+
+def _client(monkeypatch):
+    calls = []
+
+    def answer(query, lat=None, lon=None):
+        calls.append((query, lat, lon))
+        return "Shelter: Andheri Sports Complex 022-1234"
+
+    monkeypatch.setattr(lite, "answer", answer)
+    app = FastAPI()
+    api.install(app)
+    return TestClient(app), calls
+
+
+def _form_fields(page: str) -> dict:
+    return dict(re.findall(r'<input name="(\w+)" value="([^"]*)"', page))
+
+
+def test_lite_form_submits_without_coordinates(monkeypatch):
+    client, calls = _client(monkeypatch)
+    fields = _form_fields(client.get("/lite").text)
+    assert set(fields) == {"q", "lat", "lon"}
+
+    fields["q"] = "need shelter"
+    response = client.get("/lite?" + urlencode(fields))
+
+    assert response.status_code == 200
+    assert calls == [("need shelter", None, None)]
+    assert "Andheri Sports Complex" in response.text
+
+
+def test_lite_routes_parse_coordinates_leniently(monkeypatch):
+    client, calls = _client(monkeypatch)
+
+    assert client.get("/lite?q=food&lat=19.07&lon=72.87").status_code == 200
+    response = client.get("/api/lite?q=food&lat=abc&lon=500")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert calls == [("food", 19.07, 72.87), ("food", None, None)]
+
+
+def test_front_page_redirects_slow_clients(monkeypatch):
+    client, _ = _client(monkeypatch)
+
+    response = client.get("/", headers={"Save-Data": "on"}, follow_redirects=False)
+
+    assert response.status_code == 307
+    assert response.headers["location"] == "/lite"
+
+
+def test_long_lite_answers_are_gzipped(monkeypatch):
+    client, _ = _client(monkeypatch)
+    monkeypatch.setattr(lite, "answer", lambda query, lat=None, lon=None: "Shelter: school 022-1234\n" * 100)
+
+    response = client.get("/api/lite?q=shelter", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.text.startswith("Shelter: school")
+
+
+def test_lite_summary_lists_the_nearest_resources_with_phones():
+    results = [
+        {"resource_type": rt, "confidence": 0.9, "results": [
+            {"name": f"{rt} {i}", "phone": f"022-{i:04d}", "distance": f"{d:.1f} km", "distance_value": d}
+            for i, d in enumerate(distances)]}
+        for rt, distances in [("shelter", [0.5, 3.0, 9.0]), ("food", [1.2, 2.0, 7.5])]
+    ]
+
+    text = Evaluator().render_lite(results, {"user_input": "need shelter and food"})
+    lines = text.splitlines()
+
+    assert lines[0] == "Help near you for: need shelter and food"
+    assert lines[2:2 + LITE_TOP_N] == [
+        "1. Shelter: shelter 0 - 0.5 km - tel 022-0000",
+        "2. Food: food 0 - 1.2 km - tel 022-0000",
+        "3. Food: food 1 - 2.0 km - tel 022-0001",
+        "4. Shelter: shelter 1 - 3.0 km - tel 022-0001",
+        "5. Food: food 2 - 7.5 km - tel 022-0002",
+    ]
+    assert "shelter 2" not in text
+    assert lines[-1].startswith("Emergency 112")
+    assert "#" not in text and "**" not in text
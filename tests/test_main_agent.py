@@ -0,0 +1,91 @@
+import threading
+
+import main_agent
+from main_agent import MainAgent
+from memory.response_cache import ResponseCache
+from memory.session_memory import SessionMemory
+
+MUMBAI = (19.0760, 72.8777)
+
+
+class _StubWorker:
+    """Stands in for agents.worker.Worker without touching upstream APIs."""
+
+    def __init__(self, resource_type: str, release: threading.Event = None):
+        self.resource_type = resource_type
+        self.release = release
+        self.calls = 0
+
+    def execute_task(self, plan: dict) -> dict:
+        self.calls += 1
+        if self.release is not None:
+            self.release.wait(5)
+        lat, lon = plan["user_coordinates"]["lat"], plan["user_coordinates"]["lon"]
+        return {
+            "resource_type": self.resource_type,
+            "results": [{"name": f"{self.resource_type.title()} Point", "phone": "1078",
+                         "lat": lat + 0.01, "lon": lon + 0.01}],
+            "confidence": 0.9,
+            "timestamp": plan.get("timestamp"),
+        }
+
+    def refresh_distances(self, result: dict, plan: dict) -> dict:
+        return result
+
+
+def _agent(workers: dict = None, **kwargs) -> MainAgent:
+    kwargs.setdefault("response_cache", ResponseCache(max_entries=16, ttl=60))
+    agent = MainAgent(session_memory=SessionMemory(), **kwargs)
+    agent.workers = workers or {rt: _StubWorker(rt) for rt in ("shelter", "food", "medical", "government")}
+    return agent
+
+
+def test_worker_past_its_deadline_is_reported_as_degraded():
+    release = threading.Event()
+    workers = {"shelter": _StubWorker("shelter"), "food": _StubWorker("food", release)}
+    agent = _agent(workers, worker_deadlines={"food": 0.05})
+    try:
+        result = agent.handle_message("need shelter and food after the flood", *MUMBAI)
+    finally:
+        release.set()
+
+    assert result["degraded"] == ["food"]
+    assert "FOOD lookup did not respond in time" in result["final_response"]
+    assert "Shelter Point" in result["final_response"]
+
+
+def test_stream_yields_header_then_sections_then_final():
+    agent = _agent()
+    events = list(agent.stream_message("need shelter and food after the flood", *MUMBAI))
+
+    assert [e["event"] for e in events] == ["header", "section", "section", "final"]
+    assert events[0]["plan"]["resource_types"] == ["shelter", "food"]
+    assert events[0]["markdown"]
+    sections = {e["resource_type"]: e for e in events[1:3]}
+    assert set(sections) == {"shelter", "food"}
+    assert "Shelter Point" in sections["shelter"]["markdown"]
+    assert sections["food"]["map_resources"][0]["name"] == "Food Point"
+    final = events[-1]["result"]
+    assert final["degraded"] == []
+    assert len(final["map_resources"]) == 2
+
+
+def test_cache_key_ignores_wording_and_nearby_coordinates():
+    agent = _agent()
+    agent.handle_message("need shelter and food after the flood", *MUMBAI)
+    agent.handle_message("Flood here. Where can I get food and shelter?", MUMBAI[0] + 0.001, MUMBAI[1] + 0.001)
+
+    assert agent.workers["shelter"].calls == 1
+    assert agent.response_cache.stats()["hits"] == 1
+
+
+def test_catalog_version_change_drops_cached_results(monkeypatch):
+    main_agent._response_cache.invalidate()
+    agent = _agent(response_cache=main_agent._response_cache)
+    agent.handle_message("need shelter and food after the flood", *MUMBAI)
+    agent.handle_message("need shelter and food after the flood", *MUMBAI)
+    assert agent.workers["shelter"].calls == 1
+
+    monkeypatch.setattr(main_agent, "CATALOG_VERSION", "next")
+    agent.handle_message("need shelter and food after the flood", *MUMBAI)
+    assert agent.workers["shelter"].calls == 2
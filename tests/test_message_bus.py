@@ -0,0 +1,62 @@
+import os
+import time
+
+import pytest
+
+from core.a2a_protocol import Message
+from core.message_bus import BusFull, MessageBus, WorkerCrashed
+
+
+def role_handler(role: str):
+    """Bus handler factory; runs in the child processes, so it lives at module level."""
+    def handle(message: Message):
+        if message.payload.get("crash"):
+            os._exit(1)
+        time.sleep(message.payload.get("sleep", 0))
+        return message.payload.get("echo")
+    return handle
+
+
+def _message(**payload) -> Message:
+    return Message("", "session", "main_agent", "worker", "execute_task", payload, 0, "medium")
+
+
+@pytest.fixture
+def bus_factory():
+    buses = []
+
+    def build(**kwargs):
+        bus = MessageBus(role_handler, {"planner": 0, "worker": 1, "evaluator": 0}, **kwargs)
+        buses.append(bus)
+        return bus
+
+    yield build
+    for bus in buses:
+        bus.close()
+
+
+def test_messages_lost_in_a_crash_are_retried_apart_from_the_culprit(bus_factory):
+    bus = bus_factory()
+    bystander = bus.submit(_message(echo="ok", sleep=0.5))
+    culprit = bus.submit(_message(crash=True))
+
+    assert bystander.result(timeout=30) == "ok"
+    with pytest.raises(WorkerCrashed):
+        culprit.result(timeout=30)
+    stats = bus.stats()
+    assert stats["crashes"] == 1 + bus.max_retries
+    assert stats["completed"] == 1
+    assert stats["outstanding"] == 0
+
+
+def test_full_queue_pushes_back_on_the_sender(bus_factory):
+    bus = bus_factory(max_queue=1, concurrency={"worker": 1})
+    running = bus.submit(_message(echo="first", sleep=1.0))
+    queued = bus.submit(_message(echo="second"), timeout=0.1)
+
+    with pytest.raises(BusFull):
+        bus.submit(_message(echo="third"), timeout=0.1)
+    assert bus.stats()["rejected"] == 1
+    assert running.result(timeout=30) == "first"
+    assert queued.result(timeout=30) == "second"
+    assert bus.submit(_message(echo="fourth"), timeout=5).result(timeout=30) == "fourth"
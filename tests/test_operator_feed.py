@@ -0,0 +1,60 @@
+import pytest
+
+from core.operator_feed import OperatorFeed
+
+
+def _sos(record_id: str, emergency_type: str = "Flood", status: str = "active", created_at: str = "2025-12-01T10:00") -> dict:
+    return {"id": record_id, "emergency_type": emergency_type, "status": status, "name": "Asha",
+            "phone": "+91 98765 43210", "message": "Water rising", "lat": 19.07, "lon": 72.87,
+            "created_at": created_at}
+
+
+@pytest.fixture
+def feed(monkeypatch):
+    # Only this process's writes; the registries on disk are not consulted
+    monkeypatch.setattr(OperatorFeed, "reconcile", lambda self, force=False: None)
+    return OperatorFeed()
+
+
+def test_first_poll_is_a_snapshot_in_triage_order(feed):
+    feed.on_record("sos_alerts", _sos("a", "Other", created_at="2025-12-01T09:00"))
+    feed.on_record("sos_alerts", _sos("b", "Trapped", created_at="2025-12-01T10:00"))
+    feed.on_record("resource_requests", {"id": "r", "status": "pending", "urgency": "critical",
+                                         "resource_type": "Water", "created_at": "2025-12-01T08:00"})
+    feed.on_record("resource_requests", {"id": "s", "status": "pending", "urgency": "low"})
+
+    snapshot = feed.changes()
+    assert snapshot["reset"] is True
+    assert [item["key"] for item in snapshot["upsert"]] == ["sos:b", "sos:a", "request:r"]
+
+
+def test_poll_returns_only_what_changed_since(feed):
+    feed.on_record("sos_alerts", _sos("a"))
+    feed.on_record("sos_alerts", _sos("b"))
+    first = feed.changes()
+
+    idle = feed.changes(first["seq"], first["epoch"])
+    assert (idle["reset"], idle["upsert"], idle["remove"]) == (False, [], [])
+
+    feed.on_record("sos_alerts", _sos("c"))
+    feed.on_record("sos_alerts", {**_sos("c"), "message": "Roof now"})
+    feed.on_record("sos_alerts", _sos("a", status="resolved"))
+    feed.on_record("sos_alerts", _sos("b"))  # unchanged, no new sequence number
+    diff = feed.changes(first["seq"], first["epoch"])
+
+    assert diff["reset"] is False
+    assert [(item["key"], item["text"]) for item in diff["upsert"]] == [("sos:c", "Roof now")]
+    assert diff["remove"] == ["sos:a"]
+    assert diff["seq"] == first["seq"] + 3
+
+
+def test_client_behind_the_log_or_from_another_epoch_gets_a_snapshot(feed):
+    feed.log_size = 2
+    feed.on_record("sos_alerts", _sos("a"))
+    first = feed.changes()
+    for i in range(5):
+        feed.on_record("sos_alerts", _sos(f"n{i}"))
+
+    assert feed.changes(first["seq"], first["epoch"])["reset"] is True
+    assert feed.changes(feed.seq, "another-process")["reset"] is True
+    assert feed.changes(feed.seq, feed.epoch)["reset"] is False
@@ -0,0 +1,51 @@
+import functools
+
+from core import rate_limit
+from core.rate_limit import Budget, RateLimiter, rate_limited, required
+
+NO_LOCATION = "location required"
+
+
+def test_invalid_sos_does_not_use_up_the_first_sos(monkeypatch):
+    monkeypatch.setattr(rate_limit, "ENABLED", True)
+    # One token per key that never refills, and the IP is already spent by a neighbour
+    budget = Budget(burst=1, per_minute=1e-6)
+    limiter = RateLimiter({"send_sos": {"phone": budget, "ip": budget}})
+    limiter.check("send_sos", "", "203.0.113.7")
+    monkeypatch.setattr(rate_limit, "_limiter", limiter)
+    monkeypatch.setattr(rate_limit, "client_ip", lambda request: "203.0.113.7")
+
+    @rate_limited("send_sos", "limited", validate=required(NO_LOCATION, "lat", "lon"))
+    def send_sos(name, phone, lat, lon, request=None):
+        return "sent"
+
+    assert send_sos("Asha", "+91 98765 43210", None, None) == NO_LOCATION
+    assert send_sos("Asha", "+91 98765 43210", 19.07, 72.87) == "sent"
+    assert send_sos("Asha", "+91 98765 43210", 19.07, 72.87) == "limited"
+
+
+def test_busy_lane_gives_back_the_first_sos(monkeypatch):
+    monkeypatch.setattr(rate_limit, "ENABLED", True)
+    budget = Budget(burst=1, per_minute=1e-6)
+    limiter = RateLimiter({"send_sos": {"phone": budget, "ip": budget}})
+    limiter.check("send_sos", "", "203.0.113.7")
+    monkeypatch.setattr(rate_limit, "_limiter", limiter)
+    monkeypatch.setattr(rate_limit, "client_ip", lambda request: "203.0.113.7")
+    lane_full = [True]
+
+    def in_busy_lane(fn):
+        @functools.wraps(fn)
+        def call(*args, **kwargs):
+            return "busy" if lane_full[0] else fn(*args, **kwargs)
+        call.lane_busy_reply = "busy"
+        return call
+
+    @rate_limited("send_sos", "limited")
+    @in_busy_lane
+    def send_sos(name, phone, lat, lon, request=None):
+        return "sent"
+
+    assert send_sos("Asha", "+91 98765 43210", 19.07, 72.87) == "busy"
+    lane_full[0] = False
+    assert send_sos("Asha", "+91 98765 43210", 19.07, 72.87) == "sent"
+    assert send_sos("Asha", "+91 98765 43210", 19.07, 72.87) == "limited"
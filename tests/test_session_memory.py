@@ -0,0 +1,70 @@
+from memory import session_memory, shared_store
+from memory.session_memory import SessionMemory
+from memory.shared_store import SharedStore
+
+
+def test_least_recently_used_session_is_evicted_first():
+    memory = SessionMemory(max_sessions=2)
+    first = memory.create_session("need shelter")
+    second = memory.create_session("need food")
+    memory.get_session(first)
+    third = memory.create_session("need a doctor")
+
+    assert memory.get_session(second) is None
+    assert memory.get_session(first) is not None
+    assert memory.get_session(third) is not None
+    assert memory.stats()["evictions"]["lru"] == 1
+
+
+def test_idle_session_and_stale_cache_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(session_memory.time, "time", lambda: now[0])
+    memory = SessionMemory(session_ttl=60)
+    session_id = memory.create_session("need shelter")
+    memory.cache_resource_data("shelters:mumbai", [{"name": "School"}], ttl=30)
+
+    now[0] += 45
+    assert memory.get_session(session_id) is not None
+    assert memory.get_cached_data("shelters:mumbai") is None
+
+    now[0] += 45
+    assert memory.get_session(session_id) is not None
+    now[0] += 61
+    assert memory.sweep() == 1
+    assert memory.get_session(session_id) is None
+    assert memory.stats()["approx_bytes"] == 0
+
+
+def test_byte_budget_evicts_cached_data_before_sessions():
+    memory = SessionMemory(max_bytes=4096)
+    session_id = memory.create_session("need shelter")
+    for i in range(20):
+        memory.cache_resource_data(f"page:{i}", ["x" * 100] * 3)
+
+    stats = memory.stats()
+    assert stats["approx_bytes"] <= 4096
+    assert stats["evictions"]["bytes"] > 0
+    assert 0 < stats["cache_entries"] < 20
+    assert memory.get_session(session_id) is not None
+
+
+def test_shared_store_is_read_only_on_a_local_miss(monkeypatch, tmp_path):
+    now = [1000.0]
+    monkeypatch.setattr(session_memory.time, "time", lambda: now[0])
+    monkeypatch.setattr(shared_store.time, "time", lambda: now[0])
+    store = SharedStore(str(tmp_path / "state.db"))
+    reads = []
+    monkeypatch.setattr(store, "get", lambda namespace, key, get=store.get: reads.append(key) or get(namespace, key))
+    session_id = SessionMemory(shared_store=store).create_session("need shelter")
+    other_process = SessionMemory(shared_store=store, session_ttl=120)
+
+    assert other_process.get_session(session_id)["user_input"] == "need shelter"
+    assert other_process.get_session(session_id) is not None
+    assert reads == [session_id]
+
+    # Access times reach the shared copy, throttled, so an active session does not expire there
+    for _ in range(3):
+        now[0] += 50
+        assert other_process.get_session(session_id) is not None
+    assert store.get("session", session_id)["last_accessed"] == 1100.0
+    assert SessionMemory(shared_store=store, session_ttl=120).get_session(session_id) is not None
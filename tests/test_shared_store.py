@@ -0,0 +1,83 @@
+import multiprocessing
+import pickle
+import sqlite3
+from datetime import datetime
+
+from memory.shared_store import SharedStore
+
+
+def append_records(path: str, writer: int, n: int):
+    """Read-modify-write from another process, as data_store._mutate does."""
+    store = SharedStore(path)
+    for i in range(n):
+        with store.transaction():
+            records = store.load_collection("sos_alerts")
+            records.append({"id": f"{writer}-{i}"})
+            store.save_collection("sos_alerts", records)
+
+
+def test_concurrent_processes_do_not_lose_records(tmp_path):
+    path = str(tmp_path / "state.db")
+    SharedStore(path)
+    ctx = multiprocessing.get_context("spawn")
+    writers = [ctx.Process(target=append_records, args=(path, w, 25)) for w in range(3)]
+    for process in writers:
+        process.start()
+    for process in writers:
+        process.join(60)
+
+    records = SharedStore(path).load_collection("sos_alerts")
+    assert len(records) == 75
+    assert len({r["id"] for r in records}) == 75
+
+
+def test_a_write_only_touches_the_records_that_changed(tmp_path):
+    store = SharedStore(str(tmp_path / "state.db"))
+    store.save_collection("sos_alerts", [{"id": i, "status": "active"} for i in range(100)])
+    version = store.collections_version()
+    conn = store._connection()
+
+    with store.transaction():
+        records = store.load_collection("sos_alerts")
+        records[7]["status"] = "resolved"
+        records.append({"id": 100, "status": "active"})
+        before = conn.total_changes
+        store.save_collection("sos_alerts", records)
+        changed = conn.total_changes - before
+
+    assert changed == 3  # two records and the version counter
+    assert store.collections_version() == version + 1
+    assert store.load_collection("sos_alerts")[7] == {"id": 7, "status": "resolved"}
+    store.save_collection("sos_alerts", records[:10])
+    assert len(store.load_collection("sos_alerts")) == 10
+
+
+def test_values_are_stored_as_json(tmp_path):
+    path = str(tmp_path / "state.db")
+    store = SharedStore(path)
+    session = {"session_id": "s1", "created_at": datetime(2025, 12, 1, 10, 30), "interactions": []}
+    store.set("session", "s1", session)
+
+    raw = sqlite3.connect(path).execute("SELECT value FROM kv WHERE key = 's1'").fetchone()[0]
+    assert raw.startswith('{"session_id":"s1"')
+    assert store.get("session", "s1") == session
+
+
+def test_older_pickled_registries_are_migrated(tmp_path):
+    path = str(tmp_path / "state.db")
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE kv (namespace TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL, expires_at REAL,
+                         PRIMARY KEY (namespace, key));
+        CREATE TABLE collections (name TEXT PRIMARY KEY, data BLOB NOT NULL, version INTEGER NOT NULL DEFAULT 0);
+    """)
+    conn.execute("INSERT INTO kv VALUES ('session', 's1', ?, NULL)", (pickle.dumps({"session_id": "s1"}),))
+    conn.execute("INSERT INTO collections VALUES ('sos_alerts', ?, 4)", (pickle.dumps([{"id": "A1"}, {"id": "A2"}]),))
+    conn.commit()
+    conn.close()
+
+    store = SharedStore(path)
+
+    assert store.load_collection("sos_alerts") == [{"id": "A1"}, {"id": "A2"}]
+    assert store.get("session", "s1") is None
+    assert SharedStore(path).load_collection("sos_alerts") == [{"id": "A1"}, {"id": "A2"}]
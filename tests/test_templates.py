@@ -0,0 +1,90 @@
+from agents.evaluator import Evaluator
+from agents.templates import _render_fragment
+from agents.worker import Worker
+
+PLAN = {
+    "user_input": "need shelter, food and a doctor", "priority": "medium", "disaster_type": "hurricane",
+    "user_coordinates": {"lat": None, "lon": None},
+    "location_constraints": {"user_lat": None, "user_lon": None, "needs_pets": False}
+}
+
+# Items that exercise every optional line of every template
+EDGE_ITEMS = [
+    {"name": "School Gym", "phone": "", "website": "shelter.example.org", "services": "Cots, Water",
+     "pet_friendly": True, "hours": "24/7", "verified": True, "agency": "District Office",
+     "type": "Relief camp", "eligibility": "All", "notes": "Bring ID", "how_to_apply": "Walk in",
+     "deadline": "March 31", "description": "Carry documents", "additional_info": "Free"},
+    {"name": "Helpline", "phone": "1078", "website": "https://ndma.gov.in/", "services": [],
+     "deadline": "Check with agency", "description": "Only for tips"},
+    {},
+]
+
+
+def _legacy_item(i: int, item: dict, resource_type: str) -> list:
+    """Evaluator.render_section's per-item output before the templates (user-035)."""
+    def link(website):
+        return f"   - 🌐 [{website}]({website if website.startswith('http') else 'https://' + website})"
+
+    services = item.get("services", "" if resource_type == "government" else [])
+    services_str = ", ".join(services) if isinstance(services, list) else services
+    lines = [f"**{i}. {item.get('name', 'Unknown')}** {'✅' if item.get('verified') else ''}"]
+    if resource_type == "government":
+        phone = item.get("phone", "")
+        for value, line in [(item.get("agency", ""), "   - 🏛️ *{}*"), (phone, "   - 📞 **{}**"),
+                            (item.get("website", ""), None), (services, "   - 📋 {}"),
+                            (item.get("how_to_apply", ""), "   - ✍️ **How to Apply:** {}")]:
+            if value:
+                lines.append(link(value) if line is None else line.format(value))
+        deadline = item.get("deadline", "")
+        if deadline and deadline != "Check with agency":
+            lines.append(f"   - ⏰ Deadline: {deadline}")
+        if item.get("description", "") and not phone:
+            lines.append(f"   - {item['description']}")
+        if item.get("additional_info", ""):
+            lines.append(f"   - ℹ️ {item['additional_info']}")
+        return lines + [""]
+    if item.get("organization", ""):
+        lines.append(f"   - 🏛️ *{item['organization']}*")
+    if resource_type != "shelter" and item.get("type", ""):
+        lines.append(f"   - {'📦' if resource_type == 'food' else '🏥'} Type: {item['type']}")
+    lines.append(f"   - 📞 **{item.get('phone', 'Not available')}**")
+    if item.get("website", ""):
+        lines.append(link(item["website"]))
+    if services_str:
+        lines.append(f"   - {({'shelter': '🛠️', 'food': '🍽️', 'medical': '🩺'})[resource_type]} {services_str}")
+    if resource_type == "shelter":
+        if item.get("hours", ""):
+            lines.append(f"   - 🕐 {item['hours']} {'🐾 Pet-friendly' if item.get('pet_friendly') == True else ''}")
+        return lines + [""]
+    if resource_type == "food" and item.get("eligibility", ""):
+        lines.append(f"   - ✅ Eligibility: {item['eligibility']}")
+    if resource_type == "medical" and item.get("notes", ""):
+        lines.append(f"   - 💡 *{item['notes']}*")
+    if item.get("hours", ""):
+        lines.append(f"   - 🕐 {item['hours']}")
+    return lines + [""]
+
+
+def _legacy_section(result: dict) -> str:
+    resource_type = result["resource_type"]
+    emoji = {"shelter": "🏠", "food": "🍲", "medical": "🏥", "government": "📋"}[resource_type]
+    parts = [f"### {emoji} {resource_type.upper()} RESOURCES\n"]
+    for i, item in enumerate(result["results"][:5], 1):
+        parts += _legacy_item(i, item, resource_type)
+    return "\n".join(parts)
+
+
+def test_templates_match_the_legacy_renderer_byte_for_byte(monkeypatch):
+    monkeypatch.setattr("tools.tools.ResourceTools._fetch_nearby_osm", lambda self, lat, lon, amenity, radius=5000: [])
+    evaluator = Evaluator()
+    _render_fragment.cache_clear()
+    for resource_type in ("shelter", "food", "medical", "government"):
+        catalog = Worker(resource_type).execute_task(PLAN)
+        windows = [catalog["results"][start:start + 5] for start in range(0, len(catalog["results"]), 5)]
+        for items in windows + [EDGE_ITEMS]:
+            result = {**catalog, "results": items, "confidence": 0.9}
+            expected = _legacy_section(result)
+            # Cold, then from the fragment cache
+            assert evaluator.render_section(result, PLAN) == expected
+            assert evaluator.render_section(result, PLAN) == expected
+    assert _render_fragment.cache_info().hits > 0
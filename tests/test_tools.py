@@ -0,0 +1,21 @@
+import tools.tools as tools_module
+from tools.tools import ResourceTools
+
+
+def test_osm_cache_is_shared_between_instances(monkeypatch):
+    monkeypatch.setattr(tools_module, "shared_state_enabled", lambda: False)
+    monkeypatch.setattr(tools_module, "_osm_cache", tools_module.ResponseCache(max_entries=8, ttl=60))
+    calls = []
+
+    def query(self, lat, lon, amenity, radius):
+        calls.append((lat, lon, amenity))
+        return [{"name": "City Hospital", "lat": lat, "lon": lon}]
+
+    monkeypatch.setattr(ResourceTools, "_query_overpass", query)
+
+    first = ResourceTools()._fetch_nearby_osm(19.076, 72.877, "hospital")
+    second = ResourceTools()._fetch_nearby_osm(19.0761, 72.8771, "hospital")
+
+    assert len(calls) == 1
+    assert second == first
+    assert tools_module._osm_cache.stats()["hits"] == 1
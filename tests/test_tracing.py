@@ -0,0 +1,29 @@
+from core import tracing
+from core.tracing import Tracer
+
+
+def test_concurrent_remote_messages_take_only_their_own_spans():
+    tracer = Tracer(sample_rate=0, enabled=True)
+    caller = tracer.start_trace("request")
+    first = tracer.start_span("worker.execute_task", caller.context())
+    second = tracer.start_span("worker.execute_task", caller.context())
+    with first:
+        with tracer.start_span("overpass", first):
+            pass
+    with second:
+        with tracer.start_span("open_meteo", second):
+            pass
+
+    first_spans = tracer.take(first)
+    assert [s["name"] for s in first_spans] == ["overpass", "worker.execute_task"]
+    assert [s["name"] for s in tracer.take(second)] == ["open_meteo", "worker.execute_task"]
+    assert tracer.take(first) == []
+
+
+def test_uncollected_remote_buffers_are_bounded(monkeypatch):
+    monkeypatch.setattr(tracing, "MAX_OPEN_TRACES", 10)
+    tracer = Tracer(sample_rate=0, enabled=True)
+    for _ in range(50):
+        tracer.start_span("worker.execute_task", {"trace_id": "t" * 32, "span_id": "s" * 16})
+
+    assert len(tracer._traces) == 10
@@ -0,0 +1,310 @@
+"""
+Offline gazetteer for Indian states, cities and localities.
+
+Place names and aliases (old names, common spellings, Devanagari and Tamil
+forms) are folded into a phonetic key and loaded into a prefix trie. Lookups
+are exact on the folded key first and fall back to a bounded edit-distance
+search over the trie, so free-text locations can be geocoded at ingest time
+without any network geocoding service.
+"""
+import json
+import os
+import re
+import threading
+import unicodedata
+from functools import lru_cache
+from typing import Optional
+
+GAZETTEER_FILE = os.path.join(os.path.dirname(__file__), "data", "gazetteer_in.json")
+
+# More specific places win when several are mentioned ("Andheri, Mumbai")
+KIND_RANK = {"locality": 3, "city": 2, "state": 1}
+
+# Names that are also everyday words; only geocoded when they are the whole query
+AMBIGUOUS_NAMES = {"gaya", "mandi", "cp", "kota", "puri", "salem", "daman", "leh"}
+
+MAX_NGRAM = 4
+
+# ==================== TRANSLITERATION ====================
+_DEVANAGARI_VOWELS = {
+    "अ": "a", "आ": "aa", "इ": "i", "ई": "ii", "उ": "u", "ऊ": "uu", "ऋ": "ri",
+    "ए": "e", "ऐ": "ai", "ओ": "o", "औ": "au"
+}
+_DEVANAGARI_SIGNS = {
+    "ा": "aa", "ि": "i", "ी": "ii", "ु": "u", "ू": "uu", "ृ": "ri",
+    "े": "e", "ै": "ai", "ो": "o", "ौ": "au", "ॅ": "e", "ॉ": "o"
+}
+_DEVANAGARI_CONSONANTS = {
+    "क": "k", "ख": "kh", "ग": "g", "घ": "gh", "ङ": "n", "च": "ch", "छ": "chh", "ज": "j", "झ": "jh",
+    "ञ": "n", "ट": "t", "ठ": "th", "ड": "d", "ढ": "dh", "ण": "n", "त": "t", "थ": "th", "द": "d",
+    "ध": "dh", "न": "n", "प": "p", "फ": "ph", "ब": "b", "भ": "bh", "म": "m", "य": "y", "र": "r",
+    "ल": "l", "ळ": "l", "व": "v", "श": "sh", "ष": "sh", "स": "s", "ह": "h",
+    "क़": "k", "ख़": "kh", "ग़": "g", "ज़": "z", "ड़": "r", "ढ़": "rh", "फ़": "f"
+}
+_TAMIL_VOWELS = {
+    "அ": "a", "ஆ": "aa", "இ": "i", "ஈ": "ii", "உ": "u", "ஊ": "uu",
+    "எ": "e", "ஏ": "e", "ஐ": "ai", "ஒ": "o", "ஓ": "o", "ஔ": "au"
+}
+_TAMIL_SIGNS = {
+    "ா": "aa", "ி": "i", "ீ": "ii", "ு": "u", "ூ": "uu", "ெ": "e", "ே": "e", "ை": "ai",
+    "ொ": "o", "ோ": "o", "ௌ": "au"
+}
+_TAMIL_CONSONANTS = {
+    "க": "k", "ங": "n", "ச": "ch", "ஞ": "n", "ட": "d", "ண": "n", "த": "th", "ந": "n", "ப": "p",
+    "ம": "m", "ய": "y", "ர": "r", "ல": "l", "வ": "v", "ழ": "zh", "ள": "l", "ற": "r", "ன": "n",
+    "ஜ": "j", "ஷ": "sh", "ஸ": "s", "ஹ": "h"
+}
+_VOWELS = {**_DEVANAGARI_VOWELS, **_TAMIL_VOWELS}
+_SIGNS = {**_DEVANAGARI_SIGNS, **_TAMIL_SIGNS}
+_CONSONANTS = {**_DEVANAGARI_CONSONANTS, **_TAMIL_CONSONANTS}
+_VIRAMA = {"्", "்"}
+_NASALS = {"ं", "ँ"}
+_LABIALS = {"प", "फ", "ब", "भ", "म"}
+
+# Romanization variants folded onto one spelling (applied in order)
+_FOLDS = [
+    ("aa", "a"), ("ee", "i"), ("ii", "i"), ("oo", "u"), ("uu", "u"), ("ou", "u"),
+    ("chh", "c"), ("ch", "c"), ("sh", "s"), ("zh", "l"), ("ph", "f"),
+    ("th", "t"), ("dh", "d"), ("bh", "b"), ("kh", "k"), ("gh", "g"), ("jh", "j"),
+    ("w", "v"), ("q", "k"), ("z", "j")
+]
+_NON_WORD = re.compile(r"[^a-z0-9 ]+")
+_REPEATS = re.compile(r"(.)\1+")
+
+
+def transliterate(text: str) -> str:
+    """Romanize Devanagari and Tamil text; other characters pass through."""
+    out = []
+    pending_a = False
+    chars = unicodedata.normalize("NFC", text)
+    for i, ch in enumerate(chars):
+        if ch in _CONSONANTS:
+            if pending_a:
+                out.append("a")
+            out.append(_CONSONANTS[ch])
+            pending_a = True
+        elif ch in _SIGNS:
+            out.append(_SIGNS[ch])
+            pending_a = False
+        elif ch in _VIRAMA or ch == "़":
+            if ch in _VIRAMA:
+                pending_a = False
+        elif ch in _NASALS:
+            if pending_a:
+                out.append("a")
+                pending_a = False
+            nxt = chars[i + 1] if i + 1 < len(chars) else ""
+            out.append("m" if nxt in _LABIALS else "n")
+        elif ch in _VOWELS:
+            if pending_a:
+                out.append("a")
+                pending_a = False
+            out.append(_VOWELS[ch])
+        else:
+            # Final inherent vowel is silent in Hindi/Marathi names ("पुर" -> "pur")
+            pending_a = False
+            out.append(ch)
+    return "".join(out)
+
+
+def fold(text: str) -> str:
+    """Reduce a place name to the phonetic key used by the trie."""
+    text = transliterate(text or "").lower()
+    text = _NON_WORD.sub(" ", text)
+    for src, dst in _FOLDS:
+        text = text.replace(src, dst)
+    text = _REPEATS.sub(r"\1", text)
+    return " ".join(text.split())
+
+
+# ==================== TRIE ====================
+class _TrieNode:
+    __slots__ = ("children", "places")
+
+    def __init__(self):
+        self.children = {}
+        self.places = None
+
+
+class PlaceTrie:
+    """Prefix trie over folded keys with bounded edit-distance search."""
+
+    def __init__(self):
+        self.root = _TrieNode()
+
+    def insert(self, key: str, place_index: int):
+        node = self.root
+        for ch in key:
+            node = node.children.setdefault(ch, _TrieNode())
+        if node.places is None:
+            node.places = []
+        if place_index not in node.places:
+            node.places.append(place_index)
+
+    def get(self, key: str) -> list:
+        node = self.root
+        for ch in key:
+            node = node.children.get(ch)
+            if node is None:
+                return []
+        return node.places or []
+
+    def complete(self, prefix: str, limit: int = 10) -> list:
+        node = self.root
+        for ch in prefix:
+            node = node.children.get(ch)
+            if node is None:
+                return []
+        found, stack = [], [node]
+        while stack and len(found) < limit:
+            node = stack.pop()
+            if node.places:
+                found.extend(node.places)
+            stack.extend(node.children.values())
+        return found[:limit]
+
+    def search(self, key: str, max_distance: int) -> list:
+        """Return (distance, place_index) pairs within max_distance edits of key.
+
+        The first character is assumed correct, which keeps the search inside one
+        subtree; misspellings of Indian place names rarely change the initial.
+        """
+        results = []
+        child = self.root.children.get(key[:1])
+        if child is not None:
+            first_row = list(range(len(key) + 1))
+            self._search(child, key[0], key, first_row, max_distance, results)
+        return results
+
+    def _search(self, node, ch, key, previous_row, max_distance, results):
+        row = [previous_row[0] + 1]
+        for col in range(1, len(key) + 1):
+            cost = 0 if key[col - 1] == ch else 1
+            row.append(min(row[col - 1] + 1, previous_row[col] + 1, previous_row[col - 1] + cost))
+        if row[-1] <= max_distance and node.places:
+            results.extend((row[-1], p) for p in node.places)
+        if min(row) <= max_distance:
+            for next_ch, child in node.children.items():
+                self._search(child, next_ch, key, row, max_distance, results)
+
+
+# ==================== GAZETTEER ====================
+class Gazetteer:
+    def __init__(self, places: list):
+        self.places = places
+        self.trie = PlaceTrie()
+        self.exact = {}
+        for index, place in enumerate(places):
+            for name in [place["name"]] + place.get("aliases", []):
+                key = fold(name)
+                if key:
+                    self.trie.insert(key, index)
+                    self.exact.setdefault(key, []).append(index)
+
+    @classmethod
+    def load(cls, filepath: str = GAZETTEER_FILE) -> "Gazetteer":
+        with open(filepath, "r", encoding="utf-8") as f:
+            return cls(json.load(f)["places"])
+
+    def _best(self, indices: list) -> int:
+        return max(indices, key=lambda i: KIND_RANK.get(self.places[i]["kind"], 0))
+
+    def _result(self, index: int, match: str, query: str) -> dict:
+        place = self.places[index]
+        result = {
+            "name": place["name"],
+            "kind": place["kind"],
+            "state": place["state"],
+            "lat": place["lat"],
+            "lon": place["lon"],
+            "match": match,
+            "query": query
+        }
+        if place.get("city"):
+            result["city"] = place["city"]
+        return result
+
+    def lookup(self, query: str) -> Optional[dict]:
+        """Geocode a location field: the whole string, else a place mentioned in it."""
+        key = fold(query)
+        if not key:
+            return None
+        hit = self._lookup_key(key)
+        return self._result(hit[0], hit[1], query) if hit else None
+
+    @lru_cache(maxsize=4096)
+    def _lookup_key(self, key: str) -> Optional[tuple]:
+        if key in self.exact:
+            return self._best(self.exact[key]), "exact"
+        hit = self._find_key(key)
+        if hit or len(key) < 4 or len(key.split()) > 3:
+            return hit
+        matches = self.trie.search(key, 1 if len(key) <= 6 else 2)
+        if not matches:
+            return None
+        best_distance = min(d for d, _ in matches)
+        return self._best([p for d, p in matches if d == best_distance]), "fuzzy"
+
+    def find_in_text(self, text: str) -> Optional[dict]:
+        """Find the most specific place mentioned anywhere in free text."""
+        hit = self._find_key(fold(text))
+        return self._result(hit[0], hit[1], text) if hit else None
+
+    @lru_cache(maxsize=4096)
+    def _find_key(self, folded: str) -> Optional[tuple]:
+        tokens = folded.split()
+        candidates = []
+        for n in range(min(MAX_NGRAM, len(tokens)), 0, -1):
+            for start in range(len(tokens) - n + 1):
+                key = " ".join(tokens[start:start + n])
+                if key in self.exact and key not in AMBIGUOUS_NAMES:
+                    index = self._best(self.exact[key])
+                    candidates.append((KIND_RANK.get(self.places[index]["kind"], 0), n, index))
+        if candidates:
+            return max(candidates)[2], "exact"
+
+        # Fuzzy fallback only for long tokens, where a stray edit is unlikely to be a real word
+        fuzzy = []
+        for token in tokens:
+            if len(token) >= 6:
+                for distance, index in self.trie.search(token, 1):
+                    fuzzy.append((-distance, KIND_RANK.get(self.places[index]["kind"], 0), index))
+        if fuzzy:
+            return max(fuzzy)[2], "fuzzy"
+        return None
+
+    def suggest(self, prefix: str, limit: int = 10) -> list:
+        """Autocomplete place names for a typed prefix."""
+        seen, names = set(), []
+        for index in self.trie.complete(fold(prefix), limit * 3):
+            if index not in seen:
+                seen.add(index)
+                names.append(self.places[index]["name"])
+        return names[:limit]
+
+
+_gazetteer = None
+_gazetteer_lock = threading.Lock()
+
+
+def get_gazetteer() -> Gazetteer:
+    global _gazetteer
+    if _gazetteer is None:
+        with _gazetteer_lock:
+            if _gazetteer is None:
+                _gazetteer = Gazetteer.load()
+    return _gazetteer
+
+
+def geocode(query: str) -> Optional[dict]:
+    """Geocode a location string ("Andheri", "Bombay", "चेन्नई") to coordinates."""
+    if not query or not str(query).strip():
+        return None
+    return get_gazetteer().lookup(str(query))
+
+
+def geocode_text(text: str) -> Optional[dict]:
+    """Geocode the most specific place mentioned in free text, if any."""
+    if not text or not str(text).strip():
+        return None
+    return get_gazetteer().find_in_text(str(text))
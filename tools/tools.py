@@ -1,12 +1,35 @@
 import random
+import time
 from datetime import datetime, timedelta
 import math
 import requests
 import logging
 import json
+import os
+from memory.response_cache import ResponseCache
+from memory.shared_store import get_shared_store, shared_state_enabled
+from core.metrics import count, timed
+from core.tracing import start_span
 
 logger = logging.getLogger(__name__)
 
+# Bump whenever the static resource catalogs below change; cached agent
+# responses built from an older catalog are dropped.
+CATALOG_VERSION = "2025-12"
+
+# Overpass results change slowly; reuse them for nearby repeat lookups. The
+# cache is shared by every ResourceTools in the process (each worker builds its
+# own), and with DRC_STATE_BACKEND=sqlite by every app process.
+OSM_CACHE_TTL = 600
+OSM_CACHE_SIZE = 512
+
+# Upstream endpoints; benchmarks/bench_pipeline.py points them at local stubs
+OVERPASS_URL = os.environ.get("DRC_OVERPASS_URL", "https://overpass-api.de/api/interpreter")
+OPEN_METEO_URL = os.environ.get("DRC_OPEN_METEO_URL", "https://api.open-meteo.com/v1/forecast")
+OVERPASS_TIMEOUT = 15
+
+_osm_cache = ResponseCache(max_entries=OSM_CACHE_SIZE, ttl=OSM_CACHE_TTL)
+
 # Verified disaster information sources (December 2025)
 VERIFIED_SOURCES = {
     "IMD": {"name": "India Meteorological Department", "website": "https://mausam.imd.gov.in/", "verified": True},
@@ -24,9 +47,9 @@ RECENT_DISASTERS = [
 ]
 
 class ResourceTools:
-    def __init__(self):
-        self.overpass_api = "https://overpass-api.de/api/interpreter"
-        self._cache = {}
+    def __init__(self, http_timeout: float = OVERPASS_TIMEOUT):
+        self.overpass_api = OVERPASS_URL
+        self.http_timeout = http_timeout
         self.verified_sources = VERIFIED_SOURCES
         self.recent_disasters = RECENT_DISASTERS
         
@@ -52,12 +75,38 @@ class ResourceTools:
         return resources
 
     def _fetch_nearby_osm(self, lat: float, lon: float, amenity: str, radius: int = 5000) -> list:
-        places = []
         if not lat or not lon:
-            return places
+            return []
+        # ~100 m grid, well inside the search radius
+        key = f"{amenity}:{radius}:{round(lat, 3)}:{round(lon, 3)}"
+        cached = self._osm_cache_get(key)
+        count("osm_cache", "miss" if cached is None else "hit")
+        if cached is None:
+            cached = self._query_overpass(lat, lon, amenity, radius)
+            if cached:
+                self._osm_cache_put(key, cached)
+        # Callers annotate results with distances, so hand out copies
+        return [dict(p) for p in cached]
+
+    def _osm_cache_get(self, key: str):
+        if shared_state_enabled():
+            return get_shared_store().get("osm", key)
+        return _osm_cache.get(key)
+
+    def _osm_cache_put(self, key: str, places: list):
+        if shared_state_enabled():
+            get_shared_store().set("osm", key, places, ttl=OSM_CACHE_TTL)
+            return
+        _osm_cache.put(key, places)
+
+    def _query_overpass(self, lat: float, lon: float, amenity: str, radius: int) -> list:
+        places = []
         try:
             query = f'[out:json][timeout:10];(node["amenity"="{amenity}"](around:{radius},{lat},{lon});way["amenity"="{amenity}"](around:{radius},{lat},{lon}););out center 10;'
-            response = requests.post(self.overpass_api, data={"data": query}, headers={"User-Agent": "DisasterApp/1.0"}, timeout=15)
+            with timed("overpass", amenity) as t, start_span("http.overpass", amenity=amenity, radius=radius) as span:
+                response = requests.post(self.overpass_api, data={"data": query}, headers={"User-Agent": "DisasterApp/1.0"}, timeout=self.http_timeout)
+                t.outcome = "ok" if response.status_code == 200 else f"http_{response.status_code}"
+                span.set_attribute("http.status_code", response.status_code)
             if response.status_code == 200:
                 for elem in response.json().get("elements", []):
                     tags = elem.get("tags", {})
@@ -141,8 +190,11 @@ class ResourceTools:
     # ==================== WEATHER ALERTS ====================
     def get_weather_alerts(self, lat: float, lon: float) -> dict:
         try:
-            url = f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&current=temperature_2m,relative_humidity_2m,wind_speed_10m,weather_code&daily=weather_code,temperature_2m_max,temperature_2m_min,precipitation_probability_max&timezone=auto"
-            response = requests.get(url, timeout=10)
+            url = f"{OPEN_METEO_URL}?latitude={lat}&longitude={lon}&current=temperature_2m,relative_humidity_2m,wind_speed_10m,weather_code&daily=weather_code,temperature_2m_max,temperature_2m_min,precipitation_probability_max&timezone=auto"
+            with timed("open_meteo") as t, start_span("http.open_meteo") as span:
+                response = requests.get(url, timeout=10)
+                t.outcome = "ok" if response.status_code == 200 else f"http_{response.status_code}"
+                span.set_attribute("http.status_code", response.status_code)
             if response.status_code == 200:
                 data = response.json()
                 current = data.get("current", {})